@@ -14,11 +14,96 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./sweetshop.db"
+    # How long a SQLite connection waits for a lock before "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Write transactions that still hit a lock are retried with jittered
+    # exponential backoff until this deadline
+    DB_WRITE_RETRY_DEADLINE_SECONDS: float = 15.0
+    DB_WRITE_RETRY_BASE_MS: float = 10.0
+    DB_WRITE_RETRY_MAX_MS: float = 1000.0
     
     # JWT Security
     JWT_SECRET_KEY: str = "your-super-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified tokens remembered (until they expire) to skip re-verifying them
+    JWT_CACHE_SIZE: int = 10000
+    # Refresh-token sessions: lifetime of each refresh token, and how
+    # expired sessions are pruned
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    SESSION_PRUNE_INTERVAL_SECONDS: float = 3600.0
+    SESSION_PRUNE_BATCH: int = 1000
+    # Access-token revocation (logout, password change): the Bloom filter in
+    # front of the revoked_tokens table is sized for this many revocations at
+    # this false-positive rate; other workers' revocations are picked up
+    # within the sync interval; expired revocations are compacted
+    TOKEN_REVOCATION_CAPACITY: int = 100000
+    TOKEN_REVOCATION_FP_RATE: float = 0.001
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 2.0
+    TOKEN_REVOCATION_COMPACT_INTERVAL_SECONDS: float = 3600.0
+    TOKEN_REVOCATION_COMPACT_BATCH: int = 1000
+    
+    # Password hashing pool: bcrypt runs off the event loop in "thread" or
+    # "process" workers, with at most PASSWORD_HASH_MAX_PENDING calls
+    # waiting for a worker before sign-ins are refused
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Principal cache: authenticated users by token subject, so requests
+    # skip the users lookup (0 TTL disables; other workers' changes to a
+    # user show up within the TTL)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    
+    # Purchase coalescing (group commit for flash-sale traffic, opt-in)
+    PURCHASE_COALESCING_ENABLED: bool = False
+    PURCHASE_COALESCE_WINDOW_MS: float = 2.0
+    PURCHASE_COALESCE_MAX_BATCH: int = 64
+    
+    # Purchase queue (admission control under overload, opt-in)
+    PURCHASE_QUEUE_ENABLED: bool = False
+    PURCHASE_QUEUE_WORKERS: int = 4
+    PURCHASE_QUEUE_MAX_DEPTH: int = 256
+    
+    # Sharded stock: how often sweets.quantity is refreshed from shard totals
+    STOCK_SHARD_RECONCILE_INTERVAL_SECONDS: float = 5.0
+    
+    # Cart reservations: how long a hold lasts and how stale holds are swept
+    STOCK_HOLD_TTL_SECONDS: int = 600
+    STOCK_HOLD_SWEEP_INTERVAL_SECONDS: float = 5.0
+    STOCK_HOLD_SWEEP_BATCH: int = 500
+    
+    # Idempotency-Key replay: how long keys are kept and how many stay in memory
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    # A key claimed longer ago than this without a response is taken to be
+    # abandoned (its worker died mid-request) and may be claimed again;
+    # keep it above the longest a purchase or checkout can take
+    IDEMPOTENCY_CLAIM_LEASE_SECONDS: float = 60.0
+    IDEMPOTENCY_PRUNE_INTERVAL_SECONDS: float = 300.0
+    IDEMPOTENCY_PRUNE_BATCH: int = 1000
+    
+    # Catalog read cache: how long entries live and how many are kept (0 TTL disables)
+    CATALOG_CACHE_TTL_SECONDS: float = 5.0
+    CATALOG_CACHE_SIZE: int = 1024
+    
+    # Catalog facets: how often a snapshot behind other workers' writes is rebuilt
+    CATALOG_FACETS_REFRESH_SECONDS: float = 5.0
+    
+    # Name suggestions: how often the in-memory index is rebuilt, which
+    # reloads popularity and picks up renames made by other workers
+    SUGGEST_INDEX_REFRESH_INTERVAL_SECONDS: float = 300.0
+    
+    # Stock event stream: how often changes made by other workers are
+    # polled, how many sweets a slow client may have waiting before it is
+    # told to resync, how often idle streams send a keepalive, and how many
+    # logged changes are kept (pruned on an interval)
+    STOCK_EVENTS_POLL_INTERVAL_SECONDS: float = 1.0
+    STOCK_EVENTS_MAX_PENDING: int = 256
+    STOCK_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    STOCK_CHANGES_KEEP: int = 10000
+    STOCK_CHANGES_PRUNE_INTERVAL_SECONDS: float = 60.0
     
     # Admin Security
     ADMIN_IP_WHITELIST: str = "127.0.0.1,::1"
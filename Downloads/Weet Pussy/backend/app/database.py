@@ -1,12 +1,50 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import get_settings
 
 settings = get_settings()
 
+
+def configure_sqlite(engine: AsyncEngine) -> AsyncEngine:
+    """
+    Make a SQLite engine behave under several writer processes.
+    
+    Every connection gets ``PRAGMA busy_timeout`` so a writer waits for
+    the lock instead of failing at once, and SQLAlchemy (not the driver)
+    emits BEGIN. Transactions stay deferred by default; a connection
+    with the ``sqlite_begin`` execution option set to ``"IMMEDIATE"``
+    (see ``app.repositories.transactions.write_transaction``) takes the
+    write lock up front, so it never has to upgrade a read lock
+    mid-transaction, which is where SQLite gives up without waiting.
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Stop the driver from issuing its own BEGIN
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+    
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(conn):
+        mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+        conn.exec_driver_sql(f"BEGIN {mode}")
+    
+    return engine
+
+
+def build_engine(url: str, **kwargs) -> AsyncEngine:
+    """Create an async engine, applying the SQLite settings for SQLite URLs."""
+    new_engine = create_async_engine(url, **kwargs)
+    if new_engine.dialect.name == "sqlite":
+        configure_sqlite(new_engine)
+    return new_engine
+
+
 # Create async engine
-engine = create_async_engine(
+engine = build_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True
@@ -5,10 +5,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.config import get_settings
-from app.database import create_tables
-from app.routers import auth_router, sweets_router
+from app.database import async_session, create_tables
+from app.routers import auth_router, sweets_router, checkout_router, holds_router
 from app.routers.upload import router as upload_router
 from app.routers.users import router as users_router
+from app.routers.metrics import router as metrics_router
+from app.routers.admin import router as admin_router
+from app.services.purchase_coalescer import close_purchase_coalescers
+from app.services.purchase_queue import close_purchase_queues
+from app.services.stock_events import close_stock_broadcasters
+from app.services.maintenance import start_background_jobs, stop_background_jobs
+from app.services.suggest_index import load_suggest_index
+from app.security.revocation import load_revocations
+from app.security.password import shutdown_password_pool
 
 settings = get_settings()
 
@@ -19,11 +28,23 @@ UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown."""
-    # Startup: Create tables and upload directory
+    # Startup: Create tables and upload directory, index sweet names
+    # for suggestions and load the revoked tokens' Bloom filter
     await create_tables()
     os.makedirs(UPLOAD_DIR, exist_ok=True)
+    async with async_session() as session:
+        await load_suggest_index(session)
+        await load_revocations(session)
+    start_background_jobs()
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop maintenance jobs, end stock event streams, commit
+    # any purchases still waiting in the purchase queue or a coalescing
+    # window and stop the password hashing workers
+    await stop_background_jobs()
+    await close_stock_broadcasters()
+    await close_purchase_queues()
+    await close_purchase_coalescers()
+    shutdown_password_pool()
 
 
 # Create FastAPI application
@@ -41,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Mount static files for uploaded images
@@ -52,7 +74,11 @@ app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(sweets_router, prefix="/api")
+app.include_router(checkout_router, prefix="/api")
+app.include_router(holds_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
 app.include_router(upload_router)
 
 
@@ -82,7 +108,11 @@ async def api_root():
         "endpoints": {
             "auth": "/api/auth",
             "sweets": "/api/sweets",
+            "checkout": "/api/checkout",
+            "holds": "/api/holds",
             "users": "/api/users",
+            "metrics": "/api/metrics",
+            "admin": "/api/admin",
             "upload": "/upload"
         }
     }
@@ -1,5 +1,17 @@
 from app.models.user import User
-from app.models.sweet import Sweet, SweetCategory
+from app.models.sweet import Sweet, SweetCategory, SweetStockShard
 from app.models.order import Order, OrderStatus
+from app.models.stock_hold import StockHold, HoldStatus
+from app.models.idempotency_key import IdempotencyKey
+from app.models.catalog_version import CatalogVersion
+from app.models.stock_change import StockChange
+from app.models.user_session import UserSession
+from app.models.revoked_token import RevokedToken
+# Registers the full-text search index DDL on the sweets table
+from app.models import sweet_search  # noqa: F401
 
-__all__ = ["User", "Sweet", "SweetCategory", "Order", "OrderStatus"]
+__all__ = [
+    "User", "Sweet", "SweetCategory", "SweetStockShard",
+    "Order", "OrderStatus", "StockHold", "HoldStatus", "IdempotencyKey",
+    "CatalogVersion", "StockChange", "UserSession", "RevokedToken"
+]
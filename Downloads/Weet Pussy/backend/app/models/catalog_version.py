@@ -0,0 +1,61 @@
+from sqlalchemy import DDL, Integer, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.sweet import Sweet, SweetStockShard
+
+
+class CatalogVersion(Base):
+    """
+    Single-row change counter of the catalog.
+
+    Triggers bump ``version`` on every insert, update or delete of sweets
+    and their stock shards, inside the writing transaction, so it can
+    serve as the catalog's ETag whichever worker made the change. On
+    databases without the triggers (see ``TRIGGER_DIALECTS``) the sweet
+    repository bumps it in each of its catalog writes instead.
+    """
+
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<CatalogVersion(version={self.version})>"
+
+
+# Moves the catalog on without a write to sweets (e.g. after a search
+# index rebuild, so workers look at the database again)
+BUMP_CATALOG_VERSION = "UPDATE catalog_version SET version = version + 1 WHERE id = 1"
+
+# Dialects the catalog triggers (here and in app.models.stock_change) are
+# written for
+TRIGGER_DIALECTS = ("sqlite",)
+
+# The one row is created with the table
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+)
+
+# (table, CREATE TRIGGER statement) of each trigger keeping the version;
+# migrate_db.py adds the same statements to existing databases
+CATALOG_VERSION_TRIGGERS = [
+    (
+        _table,
+        f"CREATE TRIGGER IF NOT EXISTS bump_catalog_version_{_table.name}_{_action.lower()} "
+        f"AFTER {_action} ON {_table.name} "
+        f"BEGIN {BUMP_CATALOG_VERSION}; END"
+    )
+    for _table in (Sweet.__table__, SweetStockShard.__table__)
+    for _action in ("INSERT", "UPDATE", "DELETE")
+]
+
+for _table, _statement in CATALOG_VERSION_TRIGGERS:
+    event.listen(
+        _table,
+        "after_create",
+        DDL(_statement).execute_if(dialect=TRIGGER_DIALECTS)
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, String, Text, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """The stored outcome of a request sent with an Idempotency-Key header."""
+
+    __tablename__ = "idempotency_keys"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Hash of the request the key was first used with (endpoint and body)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # JSON of the first successful response; NULL while it is in progress
+    response_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True, default=None)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+    # When the key was claimed; an in-progress claim older than the lease
+    # was abandoned and can be claimed again
+    createdAt: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'key', name='uq_idempotency_key'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey(user_id={self.user_id}, key={self.key})>"
@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """
+    An access token (by its ``jti``) that must no longer be accepted, or
+    a subject key (``sub:<email>``) revoking every token of that user
+    issued before ``revoked_at``.
+
+    Rows are only needed until the tokens would have expired anyway, and
+    are compacted after that. ``id`` grows with every revocation, so
+    workers follow new revocations by polling past the last id they saw.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    jti: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+        # Never reuse the id of a compacted row: workers poll past the last id
+        {"sqlite_autoincrement": True},
+    )
+
+    def __repr__(self) -> str:
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
@@ -0,0 +1,62 @@
+from sqlalchemy import CHAR, DDL, Integer, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.catalog_version import TRIGGER_DIALECTS
+from app.models.sweet import Sweet, SweetStockShard
+
+
+class StockChange(Base):
+    """
+    Append-only log of sweets whose live stock changed.
+
+    Triggers add a row, inside the writing transaction, whenever a sweet
+    is added or deleted or its stock (or a shard's) changes, so every
+    worker can follow stock changes by polling for rows after the last
+    ``seq`` it has seen (see ``app.services.stock_events``). On databases
+    without the triggers the sweet repository writes the rows itself.
+    Old rows are pruned by a maintenance job.
+    """
+
+    __tablename__ = "stock_changes"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Not a foreign key: deleted sweets are logged too
+    sweet_id: Mapped[str] = mapped_column(CHAR(36), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<StockChange(seq={self.seq}, sweet_id={self.sweet_id})>"
+
+
+# (table, CREATE TRIGGER statement) of each trigger logging changes;
+# migrate_db.py adds the same statements to existing databases
+STOCK_CHANGE_TRIGGERS = [
+    (
+        _table,
+        f"CREATE TRIGGER IF NOT EXISTS {_name} {_when} "
+        f"BEGIN INSERT INTO stock_changes (sweet_id) VALUES ({_sweet_id}); END"
+    )
+    for _name, _table, _when, _sweet_id in (
+        ("log_stock_change_sweets_insert", Sweet.__table__, "AFTER INSERT ON sweets", "new.id"),
+        (
+            "log_stock_change_sweets_update",
+            Sweet.__table__,
+            "AFTER UPDATE OF quantity ON sweets WHEN new.quantity IS NOT old.quantity",
+            "new.id"
+        ),
+        ("log_stock_change_sweets_delete", Sweet.__table__, "AFTER DELETE ON sweets", "old.id"),
+        (
+            "log_stock_change_sweet_stock_shards_update",
+            SweetStockShard.__table__,
+            "AFTER UPDATE OF quantity ON sweet_stock_shards WHEN new.quantity IS NOT old.quantity",
+            "new.sweet_id"
+        ),
+    )
+]
+
+for _table, _statement in STOCK_CHANGE_TRIGGERS:
+    event.listen(
+        _table,
+        "after_create",
+        DDL(_statement).execute_if(dialect=TRIGGER_DIALECTS)
+    )
@@ -0,0 +1,54 @@
+import uuid
+import enum
+from datetime import datetime
+from sqlalchemy import Integer, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.sqlite import CHAR
+
+from app.database import Base
+
+
+class HoldStatus(str, enum.Enum):
+    """Enum for stock hold status."""
+    ACTIVE = "active"
+    CONFIRMED = "confirmed"
+    RELEASED = "released"
+    EXPIRED = "expired"
+
+
+class StockHold(Base):
+    """Stock set aside for a user's cart until it is confirmed or expires."""
+
+    __tablename__ = "stock_holds"
+
+    id: Mapped[str] = mapped_column(
+        CHAR(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    sweet_id: Mapped[str] = mapped_column(
+        CHAR(36),
+        ForeignKey("sweets.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[HoldStatus] = mapped_column(
+        Enum(HoldStatus),
+        default=HoldStatus.ACTIVE,
+        nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    createdAt: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    __table_args__ = (
+        # The expiry sweeper scans active holds in expires_at order
+        Index('ix_stock_holds_status_expires_at', 'status', 'expires_at'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<StockHold(id={self.id}, sweet_id={self.sweet_id}, quantity={self.quantity}, status={self.status})>"
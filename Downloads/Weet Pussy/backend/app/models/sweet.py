@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, Integer, String, Float, Enum, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Enum, CheckConstraint, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.sqlite import CHAR
 
@@ -40,10 +40,49 @@ class Sweet(Base):
         nullable=True,
         default=None
     )
+    # Number of sweet_stock_shards rows holding this sweet's stock.
+    # 0 means stock lives in `quantity`; otherwise `quantity` is a
+    # reconciled cache of the shard total.
+    stock_shards: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False
+    )
     
     __table_args__ = (
         CheckConstraint('quantity >= 0', name='check_quantity_non_negative'),
+        # Keyset pagination of the listing: one index per sort key, with
+        # and without a category filter (name is unique, so needs no id)
+        Index('ix_sweets_category_name', 'category', 'name'),
+        Index('ix_sweets_price_id', 'price', 'id'),
+        Index('ix_sweets_category_price_id', 'category', 'price', 'id'),
+        Index('ix_sweets_quantity_id', 'quantity', 'id'),
+        Index('ix_sweets_category_quantity_id', 'category', 'quantity', 'id'),
     )
     
     def __repr__(self) -> str:
         return f"<Sweet(id={self.id}, name={self.name}, quantity={self.quantity})>"
+
+
+class SweetStockShard(Base):
+    """One slice of a hot sweet's stock, decremented independently."""
+    
+    __tablename__ = "sweet_stock_shards"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    sweet_id: Mapped[str] = mapped_column(
+        CHAR(36),
+        ForeignKey("sweets.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    shard_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('sweet_id', 'shard_no', name='uq_stock_shard'),
+        CheckConstraint('quantity >= 0', name='check_shard_quantity_non_negative'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<SweetStockShard(sweet_id={self.sweet_id}, shard_no={self.shard_no}, quantity={self.quantity})>"
@@ -0,0 +1,58 @@
+"""
+Full-text search index of sweets (SQLite FTS5).
+
+``sweets_fts`` indexes each sweet's name and category, plus its id so a
+row can be found again through the index when the sweet is renamed or
+deleted (FTS5 tables have no secondary indexes, and the sweets rowid is
+not stable across VACUUM). Triggers keep it in step with ``sweets``.
+
+The index is created with the sweets table where FTS5 is compiled in;
+``rebuild_search_index.py`` creates or repopulates it for an existing
+database. Without it, searches fall back to a LIKE scan.
+"""
+from sqlalchemy import event
+
+from app.models.sweet import Sweet
+
+# Finds a sweet's index row by its (tokenized) id
+_INDEX_ROWS_OF = (
+    "SELECT rowid FROM sweets_fts "
+    "WHERE sweets_fts MATCH 'sweet_id : \"' || {sweet}.id || '\"' "
+    "AND sweet_id = {sweet}.id"
+)
+
+SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS sweets_fts USING fts5(name, category, sweet_id)",
+    "CREATE TRIGGER IF NOT EXISTS sweets_fts_insert AFTER INSERT ON sweets BEGIN "
+    "INSERT INTO sweets_fts (name, category, sweet_id) VALUES (new.name, new.category, new.id); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS sweets_fts_update AFTER UPDATE OF name, category ON sweets BEGIN "
+    f"DELETE FROM sweets_fts WHERE rowid IN ({_INDEX_ROWS_OF.format(sweet='old')}); "
+    "INSERT INTO sweets_fts (name, category, sweet_id) VALUES (new.name, new.category, new.id); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS sweets_fts_delete AFTER DELETE ON sweets BEGIN "
+    f"DELETE FROM sweets_fts WHERE rowid IN ({_INDEX_ROWS_OF.format(sweet='old')}); "
+    "END",
+]
+
+# Refill the index from scratch, then compact it
+SEARCH_INDEX_REBUILD = [
+    "DELETE FROM sweets_fts",
+    "INSERT INTO sweets_fts (name, category, sweet_id) SELECT name, category, id FROM sweets",
+    "INSERT INTO sweets_fts (sweets_fts) VALUES ('optimize')",
+]
+
+
+def fts5_available(connection) -> bool:
+    """Check whether a (sync) SQLAlchemy connection's SQLite has FTS5."""
+    if connection.dialect.name != "sqlite":
+        return False
+    options = connection.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+@event.listens_for(Sweet.__table__, "after_create")
+def _create_search_index(target, connection, **kw) -> None:
+    if fts5_available(connection):
+        for statement in SEARCH_INDEX_DDL:
+            connection.exec_driver_sql(statement)
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.sqlite import CHAR
+
+from app.database import Base
+
+
+class UserSession(Base):
+    """
+    A sign-in that can be kept alive with refresh tokens.
+
+    Each refresh swaps the session's token for a new one in the same
+    ``family_id``. The old row is kept, marked ``rotated_at``, until it
+    expires, so a token presented twice (a stolen copy) is recognised
+    and the whole family revoked.
+    """
+
+    __tablename__ = "sessions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    family_id: Mapped[str] = mapped_column(CHAR(36), nullable=False)
+    # HMAC of the refresh token; the token itself is never stored
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    rotated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=None)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=None)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sessions_family_id", "family_id"),
+        Index("ix_sessions_user_id", "user_id"),
+        Index("ix_sessions_expires_at", "expires_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<UserSession(id={self.id}, user_id={self.user_id}, family_id={self.family_id})>"
@@ -1,13 +1,33 @@
 from app.repositories.user_repository import UserRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.order_repository import OrderRepository
+from app.repositories.session_repository import (
+    SessionRepository,
+    InvalidRefreshTokenError,
+    RefreshTokenReuseError
+)
+from app.repositories.revoked_token_repository import RevokedTokenRepository
 from app.repositories.sweet_repository import (
     SweetRepository, 
     InsufficientStockError, 
-    SweetNotFoundError
+    SweetNotFoundError,
+    CheckoutError,
+    HoldNotFoundError,
+    HoldNotActiveError
 )
 
 __all__ = [
     "UserRepository", 
     "SweetRepository", 
+    "IdempotencyRepository",
+    "OrderRepository",
+    "SessionRepository",
+    "InvalidRefreshTokenError",
+    "RefreshTokenReuseError",
+    "RevokedTokenRepository",
     "InsufficientStockError", 
-    "SweetNotFoundError"
+    "SweetNotFoundError",
+    "CheckoutError",
+    "HoldNotFoundError",
+    "HoldNotActiveError"
 ]
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import Order
+from app.repositories.transactions import write_transaction
+
+
+class IdempotencyRepository:
+    """Data access layer for stored Idempotency-Key outcomes."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @write_transaction
+    async def claim(
+        self,
+        user_id: int,
+        key: str,
+        fingerprint: str,
+        ttl_seconds: float,
+        lease_seconds: float
+    ) -> Optional[IdempotencyKey]:
+        """
+        Claim a key for a new request.
+
+        A key still in progress ``lease_seconds`` after it was claimed is
+        taken over: the worker running it died before completing or
+        releasing it, and the client must be able to retry. Unless the
+        user has ordered since the claim - the purchase may have committed
+        before its response was stored, and must not run twice.
+
+        Returns:
+            None if the key is now claimed by the caller, otherwise the
+            live row of whoever used the key first
+        """
+        now = datetime.utcnow()
+        existing = await self._get(user_id, key)
+        if existing is not None:
+            abandoned = (
+                existing.response_body is None
+                and existing.createdAt <= now - timedelta(seconds=lease_seconds)
+                and not await self._has_ordered_since(user_id, existing.createdAt)
+            )
+            if existing.expires_at > now and not abandoned:
+                return existing
+            await self.session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.id == existing.id)
+            )
+
+        try:
+            await self.session.execute(
+                insert(IdempotencyKey.__table__).values(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=ttl_seconds),
+                    createdAt=now
+                )
+            )
+            await self.session.commit()
+        except IntegrityError:
+            # Another worker claimed it between our read and insert
+            await self.session.rollback()
+            return await self._get(user_id, key)
+        return None
+
+    async def _get(self, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        result = await self.session.execute(
+            select(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id)
+            .where(IdempotencyKey.key == key)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def _has_ordered_since(self, user_id: int, since: datetime) -> bool:
+        result = await self.session.execute(
+            select(Order.id)
+            .where(Order.user_id == user_id)
+            .where(Order.createdAt >= since)
+            .limit(1)
+        )
+        return result.first() is not None
+
+    @write_transaction
+    async def complete(self, user_id: int, key: str, response_body: str) -> None:
+        """Store the response of a claimed key, unless one was stored already."""
+        await self.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id)
+            .where(IdempotencyKey.key == key)
+            # A claim taken over after its lease ran out keeps the first response
+            .where(IdempotencyKey.response_body.is_(None))
+            .values(response_body=response_body)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
+    @write_transaction
+    async def release(self, user_id: int, key: str) -> None:
+        """Drop a claimed key whose request failed, so it can be retried."""
+        await self.session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id)
+            .where(IdempotencyKey.key == key)
+            .where(IdempotencyKey.response_body.is_(None))
+        )
+        await self.session.commit()
+
+    @write_transaction
+    async def prune_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete up to ``batch_size`` expired keys, oldest first.
+
+        Returns:
+            The number of keys deleted
+        """
+        expired = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= datetime.utcnow())
+            .order_by(IdempotencyKey.expires_at)
+            .limit(batch_size)
+        )
+        result = await self.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired))
+        )
+        await self.session.commit()
+        return result.rowcount
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.models.order import Order
+
+# Columns of an OrderResponse; history is read as plain dicts of them
+ORDER_COLUMNS = (
+    Order.id, Order.user_id, Order.sweet_id, Order.sweet_name, Order.quantity,
+    Order.unit_price, Order.total, Order.status, Order.createdAt
+)
+ORDER_FIELDS = tuple(column.key for column in ORDER_COLUMNS)
+OrderRow = Dict[str, Any]
+
+
+class OrderRepository:
+    """Read-only data access for orders (purchases write them)."""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def get_history(self, user_id: int) -> List[OrderRow]:
+        """Get a user's orders, newest first, without loading ORM objects."""
+        result = await self.session.execute(
+            select(*ORDER_COLUMNS)
+            .where(Order.user_id == user_id)
+            .order_by(Order.createdAt.desc())
+        )
+        return [dict(zip(ORDER_FIELDS, row)) for row in result]
+    
+    async def get_rows_after(
+        self,
+        after_id: int,
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Tuple]:
+        """
+        Get the columns (``ORDER_FIELDS``) of up to ``limit`` orders after ``after_id``.
+        
+        Orders come in id order, so passing the last id of one page gets
+        the next (keyset pagination, e.g. for exports). ``since`` and
+        ``until`` bound createdAt (inclusive, exclusive).
+        """
+        stmt = select(*ORDER_COLUMNS).where(Order.id > after_id).order_by(Order.id).limit(limit)
+        if since is not None:
+            stmt = stmt.where(Order.createdAt >= since)
+        if until is not None:
+            stmt = stmt.where(Order.createdAt < until)
+        result = await self.session.execute(stmt)
+        return [tuple(row) for row in result]
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func
+
+from app.models.revoked_token import RevokedToken
+from app.repositories.transactions import write_transaction
+
+
+class RevokedTokenRepository:
+    """Data access layer for revoked access tokens."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @write_transaction
+    async def revoke(self, key: str, expires_at: datetime, revoked_at: datetime) -> None:
+        """
+        Record a revocation, replacing an earlier one of the same key.
+
+        ``key`` is a token's ``jti``, or a subject key revoking every
+        token of that subject issued before ``revoked_at``. A replaced
+        revocation gets a new id, so other workers pick it up again.
+        """
+        await self.session.execute(delete(RevokedToken).where(RevokedToken.jti == key))
+        await self.session.execute(
+            insert(RevokedToken.__table__).values(
+                jti=key,
+                expires_at=expires_at,
+                revoked_at=revoked_at
+            )
+        )
+        await self.session.commit()
+
+    async def get_revoked_at(self, keys: Sequence[str]) -> Dict[str, datetime]:
+        """Get when each of ``keys`` was revoked; keys never revoked are left out."""
+        result = await self.session.execute(
+            select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.jti.in_(keys))
+        )
+        return dict(result.all())
+
+    async def get_active(self) -> Tuple[int, List[str]]:
+        """Get the newest revocation id and the keys of all unexpired revocations."""
+        last_id = await self.session.execute(
+            select(func.coalesce(func.max(RevokedToken.id), 0))
+        )
+        keys = await self.session.execute(
+            select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.utcnow())
+        )
+        return last_id.scalar_one(), list(keys.scalars())
+
+    async def get_since(self, after_id: int) -> List[Tuple[int, str]]:
+        """Get the (id, key) of revocations recorded after ``after_id``, oldest first."""
+        result = await self.session.execute(
+            select(RevokedToken.id, RevokedToken.jti)
+            .where(RevokedToken.id > after_id)
+            .order_by(RevokedToken.id)
+        )
+        return [tuple(row) for row in result]
+
+    @write_transaction
+    async def prune_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete up to ``batch_size`` revocations of tokens that have expired anyway.
+
+        Returns:
+            The number of revocations deleted
+        """
+        expired = (
+            select(RevokedToken.id)
+            .where(RevokedToken.expires_at <= datetime.utcnow())
+            .order_by(RevokedToken.expires_at)
+            .limit(batch_size)
+        )
+        result = await self.session.execute(
+            delete(RevokedToken).where(RevokedToken.id.in_(expired))
+        )
+        await self.session.commit()
+        return result.rowcount
@@ -0,0 +1,152 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete
+
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.repositories.transactions import write_transaction
+from app.security.jwt import create_refresh_token, hash_refresh_token
+from app.security.principal import Principal
+
+
+class InvalidRefreshTokenError(Exception):
+    """Raised when a refresh token is unknown, expired or revoked."""
+    pass
+
+
+class RefreshTokenReuseError(InvalidRefreshTokenError):
+    """Raised when a refresh token that was already exchanged is presented again."""
+    pass
+
+
+class SessionRepository:
+    """Data access layer for refresh-token sessions."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _insert(self, user_id: int, family_id: str, ttl_seconds: float, now: datetime) -> str:
+        token = create_refresh_token()
+        await self.session.execute(
+            insert(UserSession.__table__).values(
+                user_id=user_id,
+                family_id=family_id,
+                token_hash=hash_refresh_token(token),
+                expires_at=now + timedelta(seconds=ttl_seconds),
+                createdAt=now
+            )
+        )
+        return token
+
+    @write_transaction
+    async def create(self, user_id: int, ttl_seconds: float) -> str:
+        """
+        Start a session for a user who has just signed in.
+
+        Returns:
+            The session's first refresh token
+        """
+        token = await self._insert(user_id, str(uuid.uuid4()), ttl_seconds, datetime.utcnow())
+        await self.session.commit()
+        return token
+
+    @write_transaction
+    async def rotate(self, token: str, ttl_seconds: float) -> Tuple[Principal, str]:
+        """
+        Exchange a refresh token for a new one in the same session.
+
+        One indexed lookup finds the session and its user together; no
+        password is involved. Presenting a token that was already
+        exchanged revokes every token of its session, as one of the two
+        holders must have stolen it.
+
+        Returns:
+            The session's user and its new refresh token
+
+        Raises:
+            InvalidRefreshTokenError: Unknown, expired or revoked token
+            RefreshTokenReuseError: The token was already exchanged
+        """
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            select(
+                UserSession.id, UserSession.family_id, UserSession.expires_at,
+                UserSession.rotated_at, UserSession.revoked_at,
+                User.id, User.email, User.is_admin, User.two_factor_secret.is_not(None)
+            )
+            .join(User, User.id == UserSession.user_id)
+            .where(UserSession.token_hash == hash_refresh_token(token))
+        )
+        row = result.first()
+        if row is None or row.revoked_at is not None or row.expires_at <= now:
+            raise InvalidRefreshTokenError("Invalid or expired refresh token")
+        session_id, family_id = row[0], row[1]
+
+        claimed = await self.session.execute(
+            update(UserSession)
+            .where(UserSession.id == session_id)
+            .where(UserSession.rotated_at.is_(None))
+            .values(rotated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount != 1:
+            await self._revoke(UserSession.family_id == family_id, now)
+            # Keep the revocation: the error would otherwise roll it back
+            await self.session.commit()
+            raise RefreshTokenReuseError("Refresh token was already used; the session has been revoked")
+
+        principal = Principal(*row[5:])
+        new_token = await self._insert(principal.id, family_id, ttl_seconds, now)
+        await self.session.commit()
+        return principal, new_token
+
+    async def _revoke(self, condition, now: datetime) -> int:
+        result = await self.session.execute(
+            update(UserSession)
+            .where(condition)
+            .where(UserSession.revoked_at.is_(None))
+            .values(revoked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @write_transaction
+    async def revoke_family(self, token: str) -> int:
+        """Revoke the session a refresh token belongs to (e.g. on logout)."""
+        family = (
+            select(UserSession.family_id)
+            .where(UserSession.token_hash == hash_refresh_token(token))
+            .scalar_subquery()
+        )
+        revoked = await self._revoke(UserSession.family_id == family, datetime.utcnow())
+        await self.session.commit()
+        return revoked
+
+    @write_transaction
+    async def revoke_user(self, user_id: int) -> int:
+        """Revoke every session of a user (e.g. after a password change)."""
+        revoked = await self._revoke(UserSession.user_id == user_id, datetime.utcnow())
+        await self.session.commit()
+        return revoked
+
+    @write_transaction
+    async def prune_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete up to ``batch_size`` expired sessions, oldest first.
+
+        Returns:
+            The number of sessions deleted
+        """
+        expired = (
+            select(UserSession.id)
+            .where(UserSession.expires_at <= datetime.utcnow())
+            .order_by(UserSession.expires_at)
+            .limit(batch_size)
+        )
+        result = await self.session.execute(
+            delete(UserSession).where(UserSession.id.in_(expired))
+        )
+        await self.session.commit()
+        return result.rowcount
@@ -1,9 +1,118 @@
-from typing import Optional, List
+import random
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, List, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import (
+    String, select, update, insert, delete, case, cast, column, func,
+    literal_column, or_, table, text, tuple_
+)
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.sweet import Sweet, SweetCategory
+from app.models.sweet import Sweet, SweetCategory, SweetStockShard
+from app.models.order import Order, OrderStatus
+from app.models.stock_hold import StockHold, HoldStatus
+from app.models.catalog_version import CatalogVersion, TRIGGER_DIALECTS
+from app.models.stock_change import StockChange
+from app.repositories.transactions import write_transaction
+
+
+# Live stock of a sweet: its own quantity, or the sum of its shards
+SHARD_TOTAL = (
+    select(func.coalesce(func.sum(SweetStockShard.quantity), 0))
+    .where(SweetStockShard.sweet_id == Sweet.id)
+    .correlate(Sweet)
+    .scalar_subquery()
+)
+LIVE_QUANTITY = case((Sweet.stock_shards > 0, SHARD_TOTAL), else_=Sweet.quantity)
+
+# Columns needed to build a SweetResponse without loading an ORM object
+SWEET_COLUMNS = (
+    Sweet.id, Sweet.name, Sweet.category,
+    Sweet.price, Sweet.quantity, Sweet.image_url
+)
+LIVE_SWEET_COLUMNS = (
+    Sweet.id, Sweet.name, Sweet.category,
+    Sweet.price, LIVE_QUANTITY.label("quantity"), Sweet.image_url
+)
+
+# Read paths hand out plain dicts of those columns: no ORM objects to
+# hydrate and track, and response models validate them only once
+SweetRow = Dict[str, Any]
+SWEET_FIELDS = tuple(column.key for column in LIVE_SWEET_COLUMNS)
+
+
+def _as_sweet_rows(rows) -> List[SweetRow]:
+    # Extra trailing columns (keyset labels) are dropped by zip
+    return [dict(zip(SWEET_FIELDS, row)) for row in rows]
+
+# The full-text index (see app.models.sweet_search), and whether each
+# engine's database has one, as of a catalog version
+SWEETS_FTS = table("sweets_fts", column("sweet_id"))
+SEARCH_CANDIDATES = 1000
+_search_indexes: Dict[object, Tuple[int, bool]] = {}
+
+
+@dataclass
+class ShardStats:
+    """Counters describing how sharded purchases found their stock."""
+    first_choice_hits: int = 0
+    fallback_scans: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "first_choice_hits": self.first_choice_hits,
+            "fallback_scans": self.fallback_scans
+        }
+
+
+# Shared by every sharded sweet in the process
+shard_stats = ShardStats()
+
+
+# Awaited after every committed catalog write as (session, get_version,
+# changes): get_version() gives the catalog version read right after the
+# commit, read at most once however many listeners ask for it; changes
+# maps each sweet id touched to its new live quantity, or to None when
+# more than stock changed; changes is None when any sweet may have changed
+CatalogListener = Callable[
+    [AsyncSession, Callable[[], Awaitable[int]], Optional[Dict[str, Optional[int]]]],
+    Awaitable[None]
+]
+_catalog_listeners: List[CatalogListener] = []
+
+
+def on_catalog_change(listener: CatalogListener) -> None:
+    """Register a callback for committed writes to the catalog."""
+    _catalog_listeners.append(listener)
+
+
+# Called after committed writes that add, rename or delete sweets as
+# (engine, names): names maps each sweet id to its new name, or to None
+# when the sweet was deleted
+NameListener = Callable[[object, Dict[str, Optional[str]]], None]
+_name_listeners: List[NameListener] = []
+
+
+def on_name_change(listener: NameListener) -> None:
+    """Register a callback for committed changes to sweet names."""
+    _name_listeners.append(listener)
+
+
+def _order_values(user_id: int, sweet, quantity: int) -> dict:
+    """Build the column values of a completed order for a purchased sweet."""
+    return {
+        "user_id": user_id,
+        "sweet_id": sweet.id,
+        "sweet_name": sweet.name,
+        "quantity": quantity,
+        "unit_price": sweet.price,
+        "total": sweet.price * quantity,
+        "status": OrderStatus.COMPLETED
+    }
 
 
 class InsufficientStockError(Exception):
@@ -16,23 +125,341 @@ class SweetNotFoundError(Exception):
     pass
 
 
+class HoldNotFoundError(Exception):
+    """Raised when a stock hold is not found."""
+    pass
+
+
+class HoldNotActiveError(Exception):
+    """Raised when a stock hold was already confirmed, released or has expired."""
+    pass
+
+
+class CheckoutError(InsufficientStockError):
+    """Raised when one or more cart lines cannot be fulfilled."""
+    
+    def __init__(self, message: str, shortfalls: List[dict]):
+        super().__init__(message)
+        self.shortfalls = shortfalls
+
+
 class SweetRepository:
     """Data access layer for Sweet model with atomic operations."""
     
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def get_all(self) -> List[Sweet]:
-        """Get all sweets."""
-        result = await self.session.execute(select(Sweet).order_by(Sweet.name))
-        return list(result.scalars().all())
+    async def get_catalog_version(self) -> int:
+        """
+        Get the catalog's change counter.
+        
+        Triggers bump it on every write to sweets or their stock shards
+        (see ``app.models.catalog_version``), or ``_record_catalog_write``
+        where there are none.
+        """
+        result = await self.session.execute(
+            select(CatalogVersion.version).where(CatalogVersion.id == 1)
+        )
+        return result.scalar_one()
+    
+    def _has_catalog_triggers(self) -> bool:
+        """Check whether database triggers keep the catalog version and stock change log."""
+        return self.session.get_bind().dialect.name in TRIGGER_DIALECTS
+    
+    async def _record_catalog_write(self, stock_changed: Optional[Iterable[str]] = ()) -> None:
+        """
+        Do the triggers' work in the current transaction, where there are none.
+        
+        Bumps the catalog version and logs the sweets in ``stock_changed``
+        (every sweet if None) to the stock change log.
+        """
+        if self._has_catalog_triggers():
+            return
+        await self.session.execute(
+            update(CatalogVersion)
+            .where(CatalogVersion.id == 1)
+            .values(version=CatalogVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if stock_changed is None:
+            await self.session.execute(
+                insert(StockChange.__table__).from_select(["sweet_id"], select(Sweet.id))
+            )
+        elif stock_changed:
+            await self.session.execute(
+                insert(StockChange.__table__),
+                [{"sweet_id": sweet_id} for sweet_id in stock_changed]
+            )
+    
+    async def _commit(
+        self,
+        changes: Optional[Dict[str, Optional[int]]],
+        names: Optional[Dict[str, Optional[str]]] = None
+    ) -> None:
+        """Commit a catalog write, then tell catalog (and name) listeners about it."""
+        await self._record_catalog_write(None if changes is None else list(changes))
+        await self.session.commit()
+        
+        version: List[int] = []
+        
+        async def get_version() -> int:
+            # Only listeners with something to update need it, and they share one read
+            if not version:
+                version.append(await self.get_catalog_version())
+            return version[0]
+        
+        for listener in _catalog_listeners:
+            await listener(self.session, get_version, changes)
+        if names:
+            for listener in _name_listeners:
+                listener(self.session.bind, names)
+    
+    async def get_all(self) -> List[SweetRow]:
+        """Get all sweets (read-only rows), ordered by name."""
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS).order_by(Sweet.name)
+        )
+        return _as_sweet_rows(result)
+    
+    async def get_rows_after(self, after_id: Optional[str], limit: int) -> List[Tuple]:
+        """
+        Get the live columns (``SWEET_FIELDS``) of up to ``limit`` sweets after ``after_id``.
+        
+        Sweets come in id order, so passing the last id of one page gets
+        the next (keyset pagination, e.g. for exports).
+        """
+        stmt = select(*LIVE_SWEET_COLUMNS).order_by(Sweet.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Sweet.id > after_id)
+        result = await self.session.execute(stmt)
+        return [tuple(row) for row in result]
+    
+    async def get_names(self) -> List[Tuple[str, str]]:
+        """Get the (id, name) of every sweet."""
+        result = await self.session.execute(select(Sweet.id, Sweet.name))
+        return [tuple(row) for row in result]
+    
+    async def get_units_sold(self) -> Dict[str, int]:
+        """Get the units sold of every sweet with completed orders."""
+        result = await self.session.execute(
+            select(Order.sweet_id, func.sum(Order.quantity))
+            .where(Order.status == OrderStatus.COMPLETED)
+            .group_by(Order.sweet_id)
+        )
+        return dict(result.all())
+    
+    async def get_stock_columns(
+        self,
+        sweet_ids: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, SweetCategory, float, int]]:
+        """Get the (id, category, price, live stock) of every sweet, or of the listed ones."""
+        query = select(Sweet.id, Sweet.category, Sweet.price, LIVE_QUANTITY)
+        if sweet_ids is not None:
+            query = query.where(Sweet.id.in_(sweet_ids))
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result]
+    
+    async def get_live_quantities(self, sweet_ids: Sequence[str]) -> Dict[str, int]:
+        """Get the live stock of the listed sweets; deleted ones are left out."""
+        result = await self.session.execute(
+            select(Sweet.id, LIVE_QUANTITY).where(Sweet.id.in_(sweet_ids))
+        )
+        return dict(result.all())
+    
+    async def get_last_stock_change(self) -> int:
+        """Get the sequence number of the newest stock change (0 if none)."""
+        result = await self.session.execute(
+            select(func.coalesce(func.max(StockChange.seq), 0))
+        )
+        return result.scalar_one()
+    
+    async def get_stock_changes(self, after_seq: int, limit: int) -> List[Tuple[int, str]]:
+        """
+        Get up to ``limit`` (seq, sweet id) stock changes after ``after_seq``, oldest first.
+        
+        Triggers log every change to a sweet's stock (see
+        ``app.models.stock_change``), whichever worker made it.
+        """
+        result = await self.session.execute(
+            select(StockChange.seq, StockChange.sweet_id)
+            .where(StockChange.seq > after_seq)
+            .order_by(StockChange.seq)
+            .limit(limit)
+        )
+        return [tuple(row) for row in result]
+    
+    @write_transaction
+    async def prune_stock_changes(self, keep: int) -> int:
+        """
+        Delete all but the newest ``keep`` stock changes.
+        
+        Returns:
+            The number of changes deleted
+        """
+        newest = select(func.max(StockChange.seq)).scalar_subquery()
+        result = await self.session.execute(
+            delete(StockChange).where(StockChange.seq <= newest - keep)
+        )
+        await self.session.commit()
+        return result.rowcount
+    
+    async def get_page(
+        self,
+        category: Optional[SweetCategory] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        sort: str = "name",
+        descending: bool = False,
+        after: Optional[Tuple] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[SweetRow], Optional[Tuple]]:
+        """
+        Get a filtered, sorted page of sweets by keyset pagination.
+        
+        Rows are ordered by ``sort`` ("name", "price" or "quantity") with
+        the id breaking ties, and the page starts right after the keyset
+        position ``after``. Each page is one range scan of a
+        (category, sort key, id) index, however deep it is.
+        
+        Sorting and the in-stock filter use ``sweets.quantity``, which
+        for sharded sweets is the total as of the last reconcile; the
+        rows themselves carry the live stock.
+        
+        Returns:
+            The page's rows and the position to continue after, or None
+            if this is the last page
+        """
+        if sort == "name":
+            key = (Sweet.name,)
+        else:
+            key = ({"price": Sweet.price, "quantity": Sweet.quantity}[sort], Sweet.id)
+        
+        stmt = select(
+            *LIVE_SWEET_COLUMNS,
+            *[key_column.label(f"key_{i}") for i, key_column in enumerate(key)]
+        )
+        if category is not None:
+            stmt = stmt.where(Sweet.category == category)
+        if min_price is not None:
+            stmt = stmt.where(Sweet.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Sweet.price <= max_price)
+        if in_stock is not None:
+            stmt = stmt.where(Sweet.quantity > 0 if in_stock else Sweet.quantity == 0)
+        if after is not None:
+            position = tuple_(*key)
+            stmt = stmt.where(position < tuple_(*after) if descending else position > tuple_(*after))
+        
+        stmt = stmt.order_by(*[
+            key_column.desc() if descending else key_column for key_column in key
+        ])
+        if limit is not None:
+            # One extra row tells whether another page follows
+            stmt = stmt.limit(limit + 1)
+        
+        rows = (await self.session.execute(stmt)).all()
+        if limit is None or len(rows) <= limit:
+            return _as_sweet_rows(rows), None
+        rows = rows[:limit]
+        position = tuple(rows[-1]._mapping[f"key_{i}"] for i in range(len(key)))
+        return _as_sweet_rows(rows), position
+    
+    async def search(self, query: str, limit: int = 20) -> List:
+        """
+        Find sweets whose name or category has a word starting with each
+        word of ``query``, best matches first.
+        
+        Uses the sweets_fts full-text index with BM25 ranking, name hits
+        weighing more than category hits. Only the SEARCH_CANDIDATES best
+        matches are joined to the catalog, which keeps broad queries
+        cheap on large catalogs. Databases without the index fall back to
+        a LIKE scan ordered by name.
+        
+        Returns:
+            Read-only rows of the sweets' live columns
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        if not await self._has_search_index():
+            return await self._search_like(words, limit)
+        
+        match = "{name category} : (%s)" % " AND ".join(f'"{word}"*' for word in words)
+        score = func.bm25(literal_column("sweets_fts"), 10.0, 1.0, 0.0)
+        hits = (
+            select(SWEETS_FTS.c.sweet_id, score.label("score"))
+            .where(literal_column("sweets_fts").op("MATCH")(match))
+            # Rank before cutting, so the best matches are the ones kept
+            .order_by(score)
+            .limit(SEARCH_CANDIDATES)
+            .subquery("hits")
+        )
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS)
+            .join_from(hits, Sweet, Sweet.id == hits.c.sweet_id)
+            .order_by(hits.c.score)
+            .limit(limit)
+        )
+        return _as_sweet_rows(result)
+    
+    async def _search_like(self, words: List[str], limit: int) -> List[SweetRow]:
+        """Fallback search: every word must appear in the name or category."""
+        stmt = select(*LIVE_SWEET_COLUMNS)
+        for word in words:
+            pattern = f"%{word}%"
+            stmt = stmt.where(or_(
+                Sweet.name.ilike(pattern),
+                cast(Sweet.category, String).ilike(pattern)
+            ))
+        result = await self.session.execute(stmt.order_by(Sweet.name).limit(limit))
+        return _as_sweet_rows(result)
+    
+    async def _has_search_index(self) -> bool:
+        """
+        Check whether the database has sweets_fts.
+        
+        The index is never dropped, so once found it is taken as given.
+        Until then the answer is kept per engine only while the catalog
+        version stays put; ``rebuild_search_index.py`` moves it on, so an
+        index built while the application runs is used without a restart.
+        """
+        if self.session.get_bind().dialect.name != "sqlite":
+            return False
+        bind = self.session.bind
+        known = _search_indexes.get(bind)
+        if known is not None and known[1]:
+            return True
+        version = await self.get_catalog_version()
+        if known is None or known[0] != version:
+            result = await self.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sweets_fts'")
+            )
+            known = _search_indexes[bind] = (version, result.first() is not None)
+        return known[1]
     
     async def get_by_id(self, sweet_id: str) -> Optional[Sweet]:
         """Get sweet by ID."""
         result = await self.session.execute(
-            select(Sweet).where(Sweet.id == sweet_id)
+            select(Sweet, LIVE_QUANTITY).where(Sweet.id == sweet_id)
         )
-        return result.scalar_one_or_none()
+        row = result.one_or_none()
+        return self._with_live_quantity(*row) if row else None
+    
+    async def get_row(self, sweet_id: str) -> Optional[SweetRow]:
+        """Get a sweet by ID as a read-only row."""
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS).where(Sweet.id == sweet_id)
+        )
+        rows = _as_sweet_rows(result)
+        return rows[0] if rows else None
+    
+    @staticmethod
+    def _with_live_quantity(sweet: Sweet, quantity: int) -> Sweet:
+        """Report a sharded sweet's shard total without marking it dirty."""
+        if sweet.stock_shards:
+            set_committed_value(sweet, "quantity", quantity)
+        return sweet
     
     async def get_by_name(self, name: str) -> Optional[Sweet]:
         """Get sweet by name."""
@@ -41,6 +468,7 @@ class SweetRepository:
         )
         return result.scalar_one_or_none()
     
+    @write_transaction
     async def create(
         self,
         name: str,
@@ -58,10 +486,12 @@ class SweetRepository:
             image_url=image_url
         )
         self.session.add(sweet)
-        await self.session.commit()
+        await self.session.flush()
+        await self._commit({sweet.id: None}, {sweet.id: name})
         await self.session.refresh(sweet)
         return sweet
     
+    @write_transaction
     async def update(
         self,
         sweet_id: str,
@@ -84,34 +514,575 @@ class SweetRepository:
             sweet.price = price
         if quantity is not None:
             sweet.quantity = quantity
+            if sweet.stock_shards:
+                await self._write_shards(sweet.id, quantity, sweet.stock_shards)
         if image_url is not None:
             sweet.image_url = image_url
         
-        await self.session.commit()
+        await self._commit(
+            {sweet_id: None},
+            {sweet_id: name} if name is not None else None
+        )
         await self.session.refresh(sweet)
         return sweet
     
+    @write_transaction
     async def delete(self, sweet_id: str) -> bool:
         """Delete a sweet."""
         sweet = await self.get_by_id(sweet_id)
         if not sweet:
             return False
         
+        if sweet.stock_shards:
+            await self.session.execute(
+                delete(SweetStockShard).where(SweetStockShard.sweet_id == sweet_id)
+            )
+        await self.session.execute(
+            delete(StockHold).where(StockHold.sweet_id == sweet_id)
+        )
         await self.session.delete(sweet)
-        await self.session.commit()
+        await self._commit({sweet_id: None}, {sweet_id: None})
         return True
     
-    async def atomic_purchase(self, sweet_id: str, quantity: int = 1) -> Sweet:
+    @write_transaction
+    async def bulk_restock(self, sweet_ids: List[str], quantity: int) -> int:
+        """
+        Add ``quantity`` to the stock of every listed sweet.
+        
+        Plain sweets are restocked by one UPDATE; sharded ones get the
+        quantity on their first shard by a second. Unknown ids are ignored.
+        
+        Returns:
+            The number of sweets restocked
+        """
+        result = await self.session.execute(
+            update(Sweet)
+            .where(Sweet.id.in_(sweet_ids))
+            .where(Sweet.stock_shards == 0)
+            .values(quantity=Sweet.quantity + quantity)
+            .execution_options(synchronize_session=False)
+        )
+        affected = result.rowcount
+        
+        result = await self.session.execute(
+            update(SweetStockShard)
+            .where(SweetStockShard.shard_no == 0)
+            .where(SweetStockShard.sweet_id.in_(
+                select(Sweet.id)
+                .where(Sweet.id.in_(sweet_ids))
+                .where(Sweet.stock_shards > 0)
+            ))
+            .values(quantity=SweetStockShard.quantity + quantity)
+            .execution_options(synchronize_session=False)
+        )
+        affected += result.rowcount
+        
+        await self._commit(dict.fromkeys(sweet_ids))
+        return affected
+    
+    @write_transaction
+    async def bulk_reprice(self, category: SweetCategory, percent: float) -> int:
+        """
+        Change the price of every sweet in a category by ``percent``.
+        
+        Returns:
+            The number of sweets repriced
+        """
+        result = await self.session.execute(
+            update(Sweet)
+            .where(Sweet.category == category)
+            .values(price=func.round(Sweet.price * (1 + percent / 100), 2))
+            .execution_options(synchronize_session=False)
+        )
+        await self._commit(None)
+        return result.rowcount
+    
+    @write_transaction
+    async def bulk_delete(self, sweet_ids: List[str]) -> int:
+        """
+        Delete every listed sweet along with its shards and holds.
+        
+        Returns:
+            The number of sweets deleted
+        """
+        await self.session.execute(
+            delete(SweetStockShard).where(SweetStockShard.sweet_id.in_(sweet_ids))
+        )
+        await self.session.execute(
+            delete(StockHold).where(StockHold.sweet_id.in_(sweet_ids))
+        )
+        result = await self.session.execute(
+            delete(Sweet)
+            .where(Sweet.id.in_(sweet_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await self._commit(dict.fromkeys(sweet_ids), dict.fromkeys(sweet_ids))
+        return result.rowcount
+    
+    @write_transaction
+    async def set_stock_shards(self, sweet_id: str, shards: int):
+        """
+        Split a sweet's stock across ``shards`` rows of sweet_stock_shards.
+        
+        Purchases of a sharded sweet decrement one shard instead of the
+        single ``sweets.quantity`` value, so concurrent buyers stop
+        contending on one row. Passing 0 or 1 merges the stock back.
+        
+        Returns:
+            The sweet's row with its (unchanged) total stock, or None
+        """
+        shards = shards if shards > 1 else 0
+        
+        # Fold any existing shards into quantity first; this write also
+        # takes the lock so stock cannot move while it is redistributed.
+        result = await self.session.execute(
+            update(Sweet)
+            .where(Sweet.id == sweet_id)
+            .values(quantity=LIVE_QUANTITY, stock_shards=shards)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            return None
+        
+        result = await self.session.execute(
+            select(Sweet.quantity).where(Sweet.id == sweet_id)
+        )
+        await self._write_shards(sweet_id, result.scalar_one(), shards)
+        await self._record_catalog_write()
+        await self.session.commit()
+        
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS).where(Sweet.id == sweet_id)
+        )
+        return result.one()
+    
+    async def _write_shards(self, sweet_id: str, total: int, shards: int) -> None:
+        """Replace a sweet's shard rows with ``total`` spread evenly over ``shards``."""
+        await self.session.execute(
+            delete(SweetStockShard).where(SweetStockShard.sweet_id == sweet_id)
+        )
+        if shards:
+            share, extra = divmod(total, shards)
+            await self.session.execute(
+                insert(SweetStockShard.__table__),
+                [
+                    {
+                        "sweet_id": sweet_id,
+                        "shard_no": shard_no,
+                        "quantity": share + (1 if shard_no < extra else 0)
+                    }
+                    for shard_no in range(shards)
+                ]
+            )
+    
+    @write_transaction
+    async def reconcile_stock_shards(self) -> int:
+        """
+        Refresh ``sweets.quantity`` from the shard totals of sharded sweets.
+        
+        Reads through this repository already report live totals; this
+        keeps the stored column close for anything reading the table
+        directly. Returns the number of sweets reconciled.
+        """
+        result = await self.session.execute(
+            update(Sweet)
+            .where(Sweet.stock_shards > 0)
+            .where(Sweet.quantity != SHARD_TOTAL)
+            .values(quantity=SHARD_TOTAL)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            await self._record_catalog_write()
+        await self.session.commit()
+        return result.rowcount
+    
+    async def _take_from_shards(self, sweet_id: str, quantity: int, shards: int) -> None:
+        """
+        Decrement a sharded sweet's stock inside the current transaction.
+        
+        A randomly chosen shard is tried first; if it is short, the shards
+        are locked and read back and the quantity is taken from the
+        fullest ones.
+        
+        Raises:
+            InsufficientStockError: If all shards together are short
+        """
+        result = await self.session.execute(
+            update(SweetStockShard)
+            .where(SweetStockShard.sweet_id == sweet_id)
+            .where(SweetStockShard.shard_no == random.randrange(shards))
+            .where(SweetStockShard.quantity >= quantity)
+            .values(quantity=SweetStockShard.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            shard_stats.first_choice_hits += 1
+            return
+        
+        shard_stats.fallback_scans += 1
+        result = await self.session.execute(
+            select(SweetStockShard.shard_no, SweetStockShard.quantity)
+            .where(SweetStockShard.sweet_id == sweet_id)
+            .order_by(SweetStockShard.quantity.desc())
+            .with_for_update()
+        )
+        shard_rows = result.all()
+        available = sum(shard_quantity for _, shard_quantity in shard_rows)
+        if available < quantity:
+            raise InsufficientStockError(
+                f"Insufficient stock. Available: {available}, Requested: {quantity}"
+            )
+        
+        remaining = quantity
+        for shard_no, shard_quantity in shard_rows:
+            take = min(remaining, shard_quantity)
+            await self.session.execute(
+                update(SweetStockShard)
+                .where(SweetStockShard.sweet_id == sweet_id)
+                .where(SweetStockShard.shard_no == shard_no)
+                .values(quantity=SweetStockShard.quantity - take)
+                .execution_options(synchronize_session=False)
+            )
+            remaining -= take
+            if remaining == 0:
+                break
+    
+    async def _take(self, sweet_id: str, quantity: int) -> None:
+        """
+        Take stock from a plain or sharded sweet inside the current transaction.
+        
+        Raises:
+            SweetNotFoundError: If the sweet doesn't exist
+            InsufficientStockError: If there's not enough stock
+        """
+        result = await self.session.execute(
+            update(Sweet)
+            .where(Sweet.id == sweet_id)
+            .where(Sweet.stock_shards == 0)
+            .where(Sweet.quantity >= quantity)
+            .values(quantity=Sweet.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+        
+        result = await self.session.execute(
+            select(Sweet.quantity, Sweet.stock_shards).where(Sweet.id == sweet_id)
+        )
+        probe = result.one_or_none()
+        if probe is None:
+            raise SweetNotFoundError(f"Sweet with id {sweet_id} not found")
+        if probe.stock_shards:
+            await self._take_from_shards(sweet_id, quantity, probe.stock_shards)
+            return
+        raise InsufficientStockError(
+            f"Insufficient stock. Available: {probe.quantity}, Requested: {quantity}"
+        )
+    
+    async def _restock(self, quantities: Dict[str, int]) -> None:
+        """Give stock back to sweets inside the current transaction."""
+        sweet_ids = list(quantities)
+        delta = case(quantities, value=Sweet.id)
+        await self.session.execute(
+            update(Sweet)
+            .where(Sweet.id.in_(sweet_ids))
+            .where(Sweet.stock_shards == 0)
+            .values(quantity=Sweet.quantity + delta)
+            .execution_options(synchronize_session=False)
+        )
+        
+        result = await self.session.execute(
+            select(Sweet.id, Sweet.stock_shards)
+            .where(Sweet.id.in_(sweet_ids))
+            .where(Sweet.stock_shards > 0)
+        )
+        for sweet_id, shards in result.all():
+            await self.session.execute(
+                update(SweetStockShard)
+                .where(SweetStockShard.sweet_id == sweet_id)
+                .where(SweetStockShard.shard_no == random.randrange(shards))
+                .values(quantity=SweetStockShard.quantity + quantities[sweet_id])
+                .execution_options(synchronize_session=False)
+            )
+    
+    @write_transaction
+    async def reserve(
+        self,
+        sweet_id: str,
+        quantity: int,
+        user_id: int,
+        ttl_seconds: float
+    ) -> Tuple[dict, object]:
+        """
+        Move stock out of a sweet into a hold that expires after ``ttl_seconds``.
+        
+        The stock is taken now, so confirming the hold later cannot fail
+        for lack of stock. Holds that are never confirmed are returned to
+        stock by ``expire_holds``.
+        
+        Returns:
+            The hold's column values and the sweet's post-reservation row
+        
+        Raises:
+            SweetNotFoundError: If the sweet doesn't exist
+            InsufficientStockError: If there's not enough stock
+        """
+        await self._take(sweet_id, quantity)
+        
+        hold = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "sweet_id": sweet_id,
+            "quantity": quantity,
+            "status": HoldStatus.ACTIVE,
+            "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        }
+        await self.session.execute(insert(StockHold.__table__).values(**hold))
+        
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS).where(Sweet.id == sweet_id)
+        )
+        sweet = result.one()
+        
+        await self._commit({sweet_id: sweet.quantity})
+        return hold, sweet
+    
+    @write_transaction
+    async def confirm_hold(self, hold_id: str, user_id: int) -> Tuple[object, int]:
+        """
+        Turn an active hold into a completed order.
+        
+        Stock was already taken when the hold was placed, so this only
+        flips the hold's status and records the order, in one commit.
+        
+        Returns:
+            The sweet's row and the quantity purchased
+        
+        Raises:
+            HoldNotFoundError: If the user has no hold with this id
+            HoldNotActiveError: If the hold was confirmed, released or expired
+        """
+        result = await self.session.execute(
+            update(StockHold)
+            .where(StockHold.id == hold_id)
+            .where(StockHold.user_id == user_id)
+            .where(StockHold.status == HoldStatus.ACTIVE)
+            .where(StockHold.expires_at > datetime.utcnow())
+            .values(status=HoldStatus.CONFIRMED)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await self._raise_hold_failure(hold_id, user_id)
+        
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS, StockHold.quantity.label("held"))
+            .join(StockHold, StockHold.sweet_id == Sweet.id)
+            .where(StockHold.id == hold_id)
+        )
+        sweet = result.one()
+        
+        await self.session.execute(
+            insert(Order.__table__).values(**_order_values(user_id, sweet, sweet.held))
+        )
+        
+        await self.session.commit()
+        return sweet, sweet.held
+    
+    @write_transaction
+    async def release_hold(self, hold_id: str, user_id: int) -> None:
+        """
+        Cancel an active hold and return its stock.
+        
+        Raises:
+            HoldNotFoundError: If the user has no hold with this id
+            HoldNotActiveError: If the hold was already confirmed or released
+        """
+        result = await self.session.execute(
+            update(StockHold)
+            .where(StockHold.id == hold_id)
+            .where(StockHold.user_id == user_id)
+            .where(StockHold.status == HoldStatus.ACTIVE)
+            .values(status=HoldStatus.RELEASED)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await self._raise_hold_failure(hold_id, user_id)
+        
+        result = await self.session.execute(
+            select(StockHold.sweet_id, StockHold.quantity).where(StockHold.id == hold_id)
+        )
+        sweet_id, quantity = result.one()
+        await self._restock({sweet_id: quantity})
+        await self._commit({sweet_id: None})
+    
+    @write_transaction
+    async def expire_holds(self, batch_size: int = 500) -> int:
+        """
+        Expire up to ``batch_size`` stale holds and return their stock.
+        
+        The oldest active holds past their expiry are found through the
+        (status, expires_at) index, flipped with one set-based UPDATE and
+        restocked with one UPDATE per sharded sweet plus one for the rest.
+        
+        Returns:
+            The number of holds expired
+        """
+        result = await self.session.execute(
+            select(StockHold.id, StockHold.sweet_id, StockHold.quantity)
+            .where(StockHold.status == HoldStatus.ACTIVE)
+            .where(StockHold.expires_at <= datetime.utcnow())
+            .order_by(StockHold.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        holds = result.all()
+        if not holds:
+            return 0
+        
+        result = await self.session.execute(
+            update(StockHold)
+            .where(StockHold.id.in_([hold.id for hold in holds]))
+            .where(StockHold.status == HoldStatus.ACTIVE)
+            .values(status=HoldStatus.EXPIRED)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(holds):
+            # Some were confirmed or released since they were read; leave
+            # the whole batch for the next sweep
+            await self.session.rollback()
+            return 0
+        
+        quantities: Dict[str, int] = {}
+        for hold in holds:
+            quantities[hold.sweet_id] = quantities.get(hold.sweet_id, 0) + hold.quantity
+        await self._restock(quantities)
+        
+        await self._commit(dict.fromkeys(quantities))
+        return len(holds)
+    
+    async def _raise_hold_failure(self, hold_id: str, user_id: int) -> None:
+        """Work out why a hold UPDATE matched nothing and raise accordingly."""
+        result = await self.session.execute(
+            select(StockHold.status)
+            .where(StockHold.id == hold_id)
+            .where(StockHold.user_id == user_id)
+        )
+        hold_status = result.scalar_one_or_none()
+        if hold_status is None:
+            raise HoldNotFoundError(f"Hold with id {hold_id} not found")
+        if hold_status == HoldStatus.ACTIVE:
+            # Past its expiry but not swept yet
+            hold_status = HoldStatus.EXPIRED
+        raise HoldNotActiveError(f"Hold is {hold_status.value}")
+    
+    async def _purchase_sharded(
+        self,
+        sweet_id: str,
+        quantity: int,
+        shards: int,
+        user_id: Optional[int]
+    ):
+        """Purchase from a sharded sweet and read back its live total."""
+        await self._take_from_shards(sweet_id, quantity, shards)
+        
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS).where(Sweet.id == sweet_id)
+        )
+        sweet = result.one()
+        
+        if user_id:
+            await self.session.execute(
+                insert(Order.__table__).values(**_order_values(user_id, sweet, quantity))
+            )
+        
+        await self._commit({sweet_id: sweet.quantity})
+        return sweet
+    
+    def _supports_returning(self) -> bool:
+        """Check whether the bound dialect can return rows from an UPDATE."""
+        return self.session.get_bind().dialect.update_returning
+    
+    @write_transaction
+    async def atomic_purchase(
+        self,
+        sweet_id: str,
+        quantity: int = 1,
+        user_id: Optional[int] = None
+    ):
         """
         Atomically purchase a sweet, decrementing its quantity.
         
-        This method ensures concurrency safety by using SQLAlchemy's
-        session-level transactions with optimistic locking pattern.
+        On engines with UPDATE ... RETURNING (SQLite 3.35+, PostgreSQL) the
+        decrement and the read-back happen in a single guarded statement.
+        Other engines fall back to a SELECT followed by a guarded UPDATE.
+        
+        When a user is given, the order row is inserted in the same
+        transaction, so stock and order history are committed together.
+        
+        Returns:
+            The post-purchase sweet, as a row on the fast path or as a
+            refreshed ``Sweet`` on the fallback path
         
         Raises:
             SweetNotFoundError: If the sweet doesn't exist
             InsufficientStockError: If there's not enough stock
         """
+        if self._supports_returning():
+            return await self._purchase_returning(sweet_id, quantity, user_id)
+        return await self._purchase_select_update(sweet_id, quantity, user_id)
+    
+    async def _purchase_returning(
+        self,
+        sweet_id: str,
+        quantity: int,
+        user_id: Optional[int]
+    ):
+        """Decrement stock and read it back in one round trip."""
+        stmt = (
+            update(Sweet)
+            .where(Sweet.id == sweet_id)
+            .where(Sweet.stock_shards == 0)
+            .where(Sweet.quantity >= quantity)
+            .values(quantity=Sweet.quantity - quantity)
+            .returning(*SWEET_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        sweet = result.one_or_none()
+        
+        if sweet is None:
+            # No row matched: probe cheaply to tell "missing", "sharded"
+            # and "short" apart
+            result = await self.session.execute(
+                select(Sweet.quantity, Sweet.stock_shards).where(Sweet.id == sweet_id)
+            )
+            probe = result.one_or_none()
+            if probe is None:
+                raise SweetNotFoundError(f"Sweet with id {sweet_id} not found")
+            if probe.stock_shards:
+                return await self._purchase_sharded(
+                    sweet_id, quantity, probe.stock_shards, user_id
+                )
+            available = probe.quantity
+            raise InsufficientStockError(
+                f"Insufficient stock. Available: {available}, Requested: {quantity}"
+            )
+        
+        if user_id:
+            await self.session.execute(
+                insert(Order.__table__).values(**_order_values(user_id, sweet, quantity))
+            )
+        
+        await self._commit({sweet_id: sweet.quantity})
+        return sweet
+    
+    async def _purchase_select_update(
+        self,
+        sweet_id: str,
+        quantity: int,
+        user_id: Optional[int]
+    ) -> Sweet:
+        """Fallback purchase for engines without UPDATE ... RETURNING."""
         # Fetch the sweet
         result = await self.session.execute(
             select(Sweet).where(Sweet.id == sweet_id)
@@ -121,6 +1092,11 @@ class SweetRepository:
         if not sweet:
             raise SweetNotFoundError(f"Sweet with id {sweet_id} not found")
         
+        if sweet.stock_shards:
+            return await self._purchase_sharded(
+                sweet_id, quantity, sweet.stock_shards, user_id
+            )
+        
         # Check if we have enough stock
         if sweet.quantity < quantity:
             raise InsufficientStockError(
@@ -132,8 +1108,11 @@ class SweetRepository:
         stmt = (
             update(Sweet)
             .where(Sweet.id == sweet_id)
+            .where(Sweet.stock_shards == 0)
             .where(Sweet.quantity >= quantity)
             .values(quantity=Sweet.quantity - quantity)
+            # ``sweet`` keeps the quantity read above until the refresh
+            .execution_options(synchronize_session=False)
         )
         result = await self.session.execute(stmt)
         
@@ -143,8 +1122,238 @@ class SweetRepository:
                 f"Insufficient stock. The item may have been purchased by another user."
             )
         
-        await self.session.commit()
+        if user_id:
+            await self.session.execute(
+                insert(Order.__table__).values(**_order_values(user_id, sweet, quantity))
+            )
+        
+        await self._commit({sweet_id: sweet.quantity - quantity})
         
         # Refresh to get updated value
         await self.session.refresh(sweet)
         return sweet
+    
+    @write_transaction
+    async def atomic_checkout(
+        self,
+        lines: Dict[str, int],
+        user_id: Optional[int] = None
+    ) -> List:
+        """
+        Atomically purchase several sweets in a single transaction.
+        
+        All lines are decremented by one guarded set-based UPDATE, the
+        matching order rows go out as one bulk INSERT and the whole cart
+        is committed once. Either every line succeeds or nothing changes.
+        
+        Args:
+            lines: Mapping of sweet id to quantity requested
+            user_id: Purchasing user, used to record orders
+        
+        Returns:
+            Rows with the post-purchase state of each sweet, in line order
+        
+        Raises:
+            SweetNotFoundError: If any sweet doesn't exist
+            CheckoutError: If any line has insufficient stock
+        """
+        sweet_ids = list(lines)
+        delta = case(lines, value=Sweet.id)
+        
+        stmt = (
+            update(Sweet)
+            .where(Sweet.id.in_(sweet_ids))
+            .where(Sweet.stock_shards == 0)
+            .where(Sweet.quantity >= delta)
+            .values(quantity=Sweet.quantity - delta)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        updated = result.rowcount
+        
+        result = await self.session.execute(
+            select(Sweet.id, Sweet.stock_shards).where(Sweet.id.in_(sweet_ids))
+        )
+        shards = dict(result.all())
+        sharded = [sweet_id for sweet_id in sweet_ids if shards.get(sweet_id)]
+        
+        if len(shards) != len(sweet_ids) or updated != len(sweet_ids) - len(sharded):
+            await self.session.rollback()
+            await self._raise_checkout_failure(lines)
+        
+        # Sharded sweets were skipped by the set-based UPDATE
+        for sweet_id in sharded:
+            try:
+                await self._take_from_shards(sweet_id, lines[sweet_id], shards[sweet_id])
+            except InsufficientStockError:
+                await self.session.rollback()
+                await self._raise_checkout_failure(lines)
+        
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS).where(Sweet.id.in_(sweet_ids))
+        )
+        rows = {row.id: row for row in result}
+        
+        if user_id:
+            await self.session.execute(
+                insert(Order.__table__),
+                [
+                    _order_values(user_id, rows[sweet_id], quantity)
+                    for sweet_id, quantity in lines.items()
+                ]
+            )
+        
+        await self._commit({row.id: row.quantity for row in rows.values()})
+        return [rows[sweet_id] for sweet_id in sweet_ids]
+    
+    @write_transaction
+    async def apply_purchase_batch(
+        self,
+        purchases: Sequence[Tuple[str, int, Optional[int]]],
+        max_attempts: int = 3
+    ) -> List:
+        """
+        Apply a batch of independent purchases in one transaction.
+        
+        Stock is allocated to the purchases in arrival order, then each
+        sweet gets a single guarded UPDATE for its allocated total and all
+        order rows go out as one bulk INSERT before a single commit. A
+        purchase that cannot be covered fails on its own without affecting
+        the rest of the batch.
+        
+        Args:
+            purchases: (sweet_id, quantity, user_id) tuples in arrival order
+            max_attempts: Allocation attempts when stock moves under us
+        
+        Returns:
+            One outcome per purchase, in order: a dict with the sweet's
+            columns as seen right after that purchase, or the exception
+            describing why it failed
+        """
+        sweet_ids = list(dict.fromkeys(sweet_id for sweet_id, _, _ in purchases))
+        result = await self.session.execute(
+            select(*LIVE_SWEET_COLUMNS, Sweet.stock_shards).where(Sweet.id.in_(sweet_ids))
+        )
+        rows = {row.id: row for row in result}
+        outcomes: List = [None] * len(purchases)
+        changes: Dict[str, Optional[int]] = {}
+        
+        for sweet_id in sweet_ids:
+            indexes = [i for i, purchase in enumerate(purchases) if purchase[0] == sweet_id]
+            quantities = [purchases[i][1] for i in indexes]
+            row = rows.get(sweet_id)
+            
+            if row is None:
+                for i in indexes:
+                    outcomes[i] = SweetNotFoundError(f"Sweet with id {sweet_id} not found")
+                continue
+            
+            for attempt in range(max_attempts):
+                available, taken = self._allocate(row.quantity, quantities)
+                if taken == 0 or await self._take_stock(row, taken):
+                    break
+                # Stock moved since it was read; re-read and re-allocate
+                result = await self.session.execute(
+                    select(*LIVE_SWEET_COLUMNS, Sweet.stock_shards).where(Sweet.id == sweet_id)
+                )
+                row = result.one()
+            else:
+                available = [None] * len(indexes)
+            
+            if taken and available[0] is not None:
+                changes[sweet_id] = row.quantity - taken
+            rows[sweet_id] = row
+            for i, quantity, before in zip(indexes, quantities, available):
+                if before is None:
+                    outcomes[i] = InsufficientStockError(
+                        "Insufficient stock. The item may have been purchased by another user."
+                    )
+                elif before < quantity:
+                    outcomes[i] = InsufficientStockError(
+                        f"Insufficient stock. Available: {before}, Requested: {quantity}"
+                    )
+                else:
+                    outcomes[i] = {
+                        column: row._mapping[column]
+                        for column in ("id", "name", "category", "price", "image_url")
+                    }
+                    outcomes[i]["quantity"] = before - quantity
+        
+        orders = [
+            _order_values(user_id, rows[sweet_id], quantity)
+            for (sweet_id, quantity, user_id), outcome in zip(purchases, outcomes)
+            if user_id and isinstance(outcome, dict)
+        ]
+        if orders:
+            await self.session.execute(insert(Order.__table__), orders)
+        
+        if changes:
+            await self._commit(changes)
+        else:
+            await self.session.commit()
+        return outcomes
+    
+    async def _take_stock(self, row, quantity: int) -> bool:
+        """Take quantity from a sweet read with its shard count; False if short."""
+        if row.stock_shards:
+            try:
+                await self._take_from_shards(row.id, quantity, row.stock_shards)
+            except InsufficientStockError:
+                return False
+            return True
+        
+        result = await self.session.execute(
+            update(Sweet)
+            .where(Sweet.id == row.id)
+            .where(Sweet.stock_shards == 0)
+            .where(Sweet.quantity >= quantity)
+            .values(quantity=Sweet.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+    
+    @staticmethod
+    def _allocate(stock: int, quantities: List[int]) -> Tuple[List[int], int]:
+        """
+        Hand out stock to requested quantities in arrival order.
+        
+        Returns the stock available when each request was considered and
+        the total quantity granted.
+        """
+        available = []
+        for quantity in quantities:
+            available.append(stock)
+            if quantity <= stock:
+                stock -= quantity
+        return available, available[0] - stock
+    
+    async def _raise_checkout_failure(self, lines: Dict[str, int]) -> None:
+        """Work out why a checkout UPDATE missed rows and raise accordingly."""
+        result = await self.session.execute(
+            select(Sweet.id, LIVE_QUANTITY).where(Sweet.id.in_(list(lines)))
+        )
+        available = dict(result.all())
+        
+        missing = [sweet_id for sweet_id in lines if sweet_id not in available]
+        if missing:
+            raise SweetNotFoundError(f"Sweet with id {missing[0]} not found")
+        
+        shortfalls = [
+            {
+                "sweet_id": sweet_id,
+                "requested": quantity,
+                "available": available[sweet_id]
+            }
+            for sweet_id, quantity in lines.items()
+            if available[sweet_id] < quantity
+        ]
+        if not shortfalls:
+            # Stock changed between the UPDATE and this probe
+            raise CheckoutError(
+                "Insufficient stock. Items may have been purchased by another user.",
+                shortfalls
+            )
+        raise CheckoutError(
+            f"Insufficient stock for {len(shortfalls)} item(s)",
+            shortfalls
+        )
@@ -0,0 +1,117 @@
+import asyncio
+import functools
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+# session.info flags: a write transaction is being managed, and it has
+# already committed (so running the method again would repeat the write)
+_IN_WRITE = "write_transaction"
+_COMMITTED = "write_transaction_committed"
+
+
+@dataclass
+class LockStats:
+    """Counters describing how often writers hit a lock."""
+    retries: int = 0
+    gave_up: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "retries": self.retries,
+            "gave_up": self.gave_up
+        }
+
+
+# Shared by every write transaction in the process
+lock_stats = LockStats()
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session: Session) -> None:
+    if session.info.get(_IN_WRITE):
+        session.info[_COMMITTED] = True
+
+
+def is_lock_error(error: OperationalError) -> bool:
+    """Check whether a database error means "locked, try again later"."""
+    message = str(error.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+def write_transaction(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Run a repository write method as one retryable write transaction.
+
+    The transaction is opened with ``BEGIN IMMEDIATE`` on SQLite engines
+    set up by ``app.database.build_engine``, so the write lock is taken
+    before the first read instead of mid-transaction. If the lock still
+    cannot be had within the busy timeout, the whole method is rolled
+    back and run again with jittered exponential backoff, until
+    DB_WRITE_RETRY_DEADLINE_SECONDS have passed.
+
+    Any read transaction the session already has open (for example the
+    request's user lookup) is committed first. A decorated method called
+    from another one joins the outer transaction. Lock errors raised after
+    the method has committed are not retried. The transaction is always
+    over when the wrapper returns: left open it is committed, and any
+    exception rolls it back.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs) -> T:
+        session = self.session
+        if session.info.get(_IN_WRITE):
+            return await method(self, *args, **kwargs)
+
+        deadline = time.monotonic() + settings.DB_WRITE_RETRY_DEADLINE_SECONDS
+        attempt = 0
+        session.info[_IN_WRITE] = True
+        try:
+            while True:
+                if session.in_transaction():
+                    await session.commit()
+                session.info[_COMMITTED] = False
+                try:
+                    await session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+                    result = await method(self, *args, **kwargs)
+                    # Never leave the write lock held after returning
+                    if session.in_transaction():
+                        await session.commit()
+                    return result
+                except OperationalError as e:
+                    await session.rollback()
+                    if not is_lock_error(e) or session.info[_COMMITTED]:
+                        raise
+
+                    cap = min(
+                        settings.DB_WRITE_RETRY_MAX_MS,
+                        settings.DB_WRITE_RETRY_BASE_MS * 2 ** attempt
+                    )
+                    delay = random.uniform(0, cap) / 1000
+                    if time.monotonic() + delay >= deadline:
+                        lock_stats.gave_up += 1
+                        raise
+                    lock_stats.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+        except BaseException:
+            # e.g. InsufficientStockError: release the lock, keep nothing
+            if session.in_transaction():
+                await session.rollback()
+            raise
+        finally:
+            session.info.pop(_IN_WRITE, None)
+            session.info.pop(_COMMITTED, None)
+
+    return wrapper
@@ -3,7 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.user import User
-from app.security.password import hash_password
+from app.security.password import hash_password_async
+from app.security.principal import invalidate_principal
+from app.repositories.transactions import write_transaction
 
 
 class UserRepository:
@@ -33,23 +35,29 @@ class UserRepository:
         is_admin: bool = False
     ) -> User:
         """Create a new user."""
-        hashed_password = hash_password(password)
-        user = User(
+        # Hash before the write transaction so it doesn't hold the lock
+        hashed_password = await hash_password_async(password)
+        return await self._insert(User(
             email=email,
             hashed_password=hashed_password,
             is_admin=is_admin
-        )
+        ))
+    
+    @write_transaction
+    async def _insert(self, user: User) -> User:
         self.session.add(user)
         await self.session.commit()
         await self.session.refresh(user)
         return user
     
+    @write_transaction
     async def update_2fa_secret(self, user_id: int, secret: str) -> Optional[User]:
         """Update user's 2FA secret."""
         user = await self.get_by_id(user_id)
         if user:
             user.two_factor_secret = secret
             await self.session.commit()
+            invalidate_principal(self.session.bind, user.email)
             await self.session.refresh(user)
         return user
     
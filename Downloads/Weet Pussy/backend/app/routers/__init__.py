@@ -1,4 +1,4 @@
 from app.routers.auth import router as auth_router
-from app.routers.sweets import router as sweets_router
+from app.routers.sweets import router as sweets_router, checkout_router, holds_router
 
-__all__ = ["auth_router", "sweets_router"]
+__all__ = ["auth_router", "sweets_router", "checkout_router", "holds_router"]
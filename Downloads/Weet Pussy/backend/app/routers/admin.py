@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.security.principal import Principal
+from app.security.dependencies import get_admin_user
+from app.services.export import MEDIA_TYPES, stream_export
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/export/{table}")
+async def export_table(
+    table: Literal["sweets", "orders"],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin: Annotated[Principal, Depends(get_admin_user)],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """
+    Download the whole catalog or order history as NDJSON or CSV.
+    
+    Rows are streamed from the database as they are sent, so exports of
+    any size use the same memory. Orders can be limited to those created
+    from ``since`` up to (not including) ``until``.
+    
+    Admin only endpoint.
+    """
+    if table == "sweets" and (since or until):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date filters only apply to orders"
+        )
+    
+    return StreamingResponse(
+        stream_export(db.bind, table, format, since, until),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
@@ -1,14 +1,28 @@
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas.user import UserCreate, UserLogin, TokenResponse
+from app.schemas.user import UserCreate, UserLogin, TokenResponse, RefreshRequest, LogoutRequest
 from app.services.auth_service import AuthService, AuthenticationError, UserExistsError
+from app.repositories.session_repository import InvalidRefreshTokenError
+from app.security.password import PasswordHasherBusyError
+from app.security.principal import Principal
+from app.security.dependencies import get_current_user, security
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _busy(error: PasswordHasherBusyError) -> HTTPException:
+    """429 for a request refused by the password hashing pool."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
@@ -17,7 +31,7 @@ async def register(
     """
     Register a new user.
     
-    Returns a JWT token on successful registration.
+    Returns a JWT token and a refresh token on successful registration.
     """
     auth_service = AuthService(db)
     
@@ -28,6 +42,8 @@ async def register(
             status_code=status.HTTP_409_CONFLICT,
             detail=str(e)
         )
+    except PasswordHasherBusyError as e:
+        raise _busy(e)
 
 
 @router.post("/login", response_model=TokenResponse)
@@ -38,7 +54,7 @@ async def login(
     """
     Login with email and password.
     
-    Returns a JWT token on successful authentication.
+    Returns a JWT token and a refresh token on successful authentication.
     """
     auth_service = AuthService(db)
     
@@ -49,3 +65,47 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except PasswordHasherBusyError as e:
+        raise _busy(e)
+
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(
+    refresh_data: RefreshRequest,
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    
+    Each refresh token works once. Presenting one that was already
+    exchanged signs the session out on every device.
+    """
+    auth_service = AuthService(db)
+    
+    try:
+        return await auth_service.refresh(refresh_data.refresh_token)
+    except InvalidRefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e)
+        )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    logout_data: Optional[LogoutRequest] = None
+):
+    """
+    Logout: revoke the access token used for this request.
+    
+    Pass the refresh token too to end its session, so it cannot be
+    exchanged for new access tokens either.
+    """
+    auth_service = AuthService(db)
+    await auth_service.logout(
+        credentials.credentials,
+        logout_data.refresh_token if logout_data else None
+    )
@@ -0,0 +1,47 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends
+
+from app.repositories.sweet_repository import shard_stats
+from app.repositories.transactions import lock_stats
+from app.security.jwt import token_cache_stats
+from app.security.password import hash_stats
+from app.security.principal import Principal, principal_cache_stats
+from app.security.revocation import revocation_stats
+from app.security.dependencies import get_admin_user
+from app.services.catalog_cache import catalog_cache_stats
+from app.services.catalog_facets import facet_stats
+from app.services.idempotency import idempotency_stats
+from app.services.purchase_coalescer import coalescer_stats
+from app.services.purchase_queue import queue_stats
+from app.services.response_cache import response_cache_stats
+from app.services.stock_events import stock_event_stats
+from app.services.suggest_index import suggest_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("")
+async def get_metrics(
+    admin: Annotated[Principal, Depends(get_admin_user)]
+):
+    """
+    Get in-process performance counters for this worker.
+    
+    Admin only endpoint.
+    """
+    return {
+        "catalog_cache": catalog_cache_stats.snapshot(),
+        "catalog_facets": facet_stats.snapshot(),
+        "response_cache": response_cache_stats.snapshot(),
+        "suggest_index": suggest_stats.snapshot(),
+        "stock_events": stock_event_stats.snapshot(),
+        "purchase_coalescer": coalescer_stats.snapshot(),
+        "purchase_queue": queue_stats.snapshot(),
+        "stock_shards": shard_stats.snapshot(),
+        "idempotency": idempotency_stats.snapshot(),
+        "principal_cache": principal_cache_stats.snapshot(),
+        "token_cache": token_cache_stats.snapshot(),
+        "token_revocation": revocation_stats.snapshot(),
+        "db_locks": lock_stats.snapshot(),
+        "password_hashing": hash_stats.snapshot()
+    }
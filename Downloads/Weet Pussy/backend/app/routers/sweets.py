@@ -1,61 +1,278 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Awaitable, Callable, List, Literal, Optional, Type
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.models.user import User
+from app.models.sweet import SweetCategory
+from app.security.principal import Principal
 from app.schemas.sweet import (
-    SweetCreate, SweetUpdate, SweetResponse, 
-    PurchaseRequest, PurchaseResponse
+    SweetCreate, SweetUpdate, SweetResponse, SweetSuggestion, CatalogFacets, StockShardRequest,
+    PurchaseRequest, PurchaseResponse,
+    CheckoutRequest, CheckoutResponse,
+    ReserveRequest, HoldResponse,
+    BulkOperation, BulkResponse
 )
 from app.services.sweet_service import SweetService
-from app.repositories.sweet_repository import InsufficientStockError, SweetNotFoundError
+from app.services.suggest_index import MAX_SUGGESTIONS
+from app.services.stock_events import get_stock_broadcaster, stock_event_stream
+from app.services.purchase_queue import PurchaseQueueFullError
+from app.services.idempotency import (
+    IdempotencyService, IdempotencyKeyReuseError, IdempotencyKeyInProgressError
+)
+from app.repositories.sweet_repository import (
+    InsufficientStockError, SweetNotFoundError, CheckoutError,
+    HoldNotFoundError, HoldNotActiveError
+)
 from app.security.dependencies import get_current_user, get_admin_user
+from app.utils.cursor import InvalidCursorError
 
 router = APIRouter(prefix="/sweets", tags=["Sweets"])
+checkout_router = APIRouter(prefix="/checkout", tags=["Sweets"])
+holds_router = APIRouter(prefix="/holds", tags=["Sweets"])
+
+
+async def _run_idempotent(
+    db: AsyncSession,
+    response: Response,
+    user_id: int,
+    idempotency_key: Optional[str],
+    request: str,
+    response_model: Type[BaseModel],
+    operation: Callable[[], Awaitable[BaseModel]]
+):
+    """Run a write once per Idempotency-Key, replaying the stored response."""
+    if not idempotency_key:
+        return await operation()
+    
+    try:
+        result, replayed = await IdempotencyService(db).execute(
+            user_id, idempotency_key, request, response_model, operation
+        )
+    except IdempotencyKeyReuseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except IdempotencyKeyInProgressError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+def _catalog_etag(version: int) -> str:
+    """Strong ETag of any catalog read made at ``version``."""
+    return f'"catalog-{version}"'
+
+
+def _not_modified(response: Response, etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Tag a catalog response, and tell whether the client's copy is current.
+    
+    If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    """
+    response.headers["ETag"] = etag
+    # Let browsers keep the body but revalidate it on every use
+    response.headers["Cache-Control"] = "no-cache"
+    if not if_none_match:
+        return False
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def _json_body(response: Response, body: bytes) -> Response:
+    """
+    Send a pre-encoded JSON body with the headers set on ``response``.
+    
+    Bodies come from the response cache already validated against the
+    route's response_model, so FastAPI is not asked to do it again.
+    """
+    return Response(content=body, media_type="application/json", headers=response.headers)
 
 
 @router.get("", response_model=List[SweetResponse])
 async def list_sweets(
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    response: Response,
+    category: Optional[SweetCategory] = None,
+    min_price: Annotated[Optional[float], Query(ge=0)] = None,
+    max_price: Annotated[Optional[float], Query(ge=0)] = None,
+    in_stock: Optional[bool] = None,
+    sort: Literal["name", "price", "quantity"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=500)] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    """
+    Get available sweets, optionally filtered, sorted and paged.
+    
+    Pages are fetched by keyset: when more sweets follow, the response
+    carries an X-Next-Cursor header to pass back as ``cursor``. Without
+    ``limit`` every matching sweet is returned.
+    
+    The response carries an ETag of the catalog version; sending it back
+    in If-None-Match gets a 304 without any sweets being read.
+    
+    This endpoint is public - no authentication required.
+    """
+    sweet_service = SweetService(db)
+    version = await sweet_service.get_catalog_version()
+    if _not_modified(response, _catalog_etag(version), if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response.headers)
+    
+    try:
+        body, next_cursor = await sweet_service.list_sweets(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit,
+            version=version
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return _json_body(response, body)
+
+
+@router.get("/search", response_model=List[SweetResponse])
+async def search_sweets(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20
+):
+    """
+    Search sweets by name and category, best matches first.
+    
+    Every word of ``q`` must match the start of a word in the sweet's
+    name or category, so partial words work while typing.
+    
+    This endpoint is public - no authentication required.
+    """
+    sweet_service = SweetService(db)
+    return await sweet_service.search_sweets(q, limit)
+
+
+@router.get("/facets", response_model=CatalogFacets)
+async def get_facets(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    response: Response,
+    category: Optional[SweetCategory] = None,
+    buckets: Annotated[int, Query(ge=1, le=50)] = 10,
+    if_none_match: Annotated[Optional[str], Header()] = None
 ):
     """
-    Get all available sweets.
+    Get sweet counts per category, a price histogram and stock bands.
+    
+    Category counts cover the whole catalog; with ``category`` the price
+    histogram and stock bands cover that category only. Conditional
+    requests work as for the listing.
     
     This endpoint is public - no authentication required.
     """
     sweet_service = SweetService(db)
-    sweets = await sweet_service.get_all_sweets()
-    return [SweetResponse.model_validate(s) for s in sweets]
+    version = await sweet_service.get_catalog_version()
+    if _not_modified(response, _catalog_etag(version), if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response.headers)
+    
+    body, facets_version = await sweet_service.get_facets_json(category, buckets, version)
+    if facets_version != version:
+        # Counted from a snapshot behind ``version``: tag what was counted
+        response.headers["ETag"] = _catalog_etag(facets_version)
+    return _json_body(response, body)
+
+
+@router.get("/suggest", response_model=List[SweetSuggestion])
+async def suggest_sweets(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    prefix: Annotated[str, Query(min_length=1, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=MAX_SUGGESTIONS)] = 10
+):
+    """
+    Suggest sweet names starting with ``prefix`` (any case), best sellers first.
+    
+    Served from memory without touching the database, for use on every
+    keystroke of a search box.
+    
+    This endpoint is public - no authentication required.
+    """
+    sweet_service = SweetService(db)
+    return await sweet_service.suggest_sweets(prefix, limit)
+
+
+@router.get("/stream")
+async def stream_stock(
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """
+    Follow stock changes as server-sent events.
+    
+    Each ``stock`` event is a JSON list of ``{"id", "quantity"}`` for
+    sweets whose stock changed, by a purchase or an admin, in any worker.
+    A slow client only ever gets the latest stock of each sweet; if it
+    falls too far behind it gets a ``resync`` event and should fetch the
+    catalog again.
+    
+    This endpoint is public - no authentication required.
+    """
+    return StreamingResponse(
+        stock_event_stream(get_stock_broadcaster(db.bind)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{sweet_id}", response_model=SweetResponse)
 async def get_sweet(
     sweet_id: str,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None
 ):
     """
     Get a single sweet by ID.
     
+    Conditional requests work as for the listing.
+    
     This endpoint is public - no authentication required.
     """
     sweet_service = SweetService(db)
-    sweet = await sweet_service.get_sweet(sweet_id)
+    version = await sweet_service.get_catalog_version()
+    if _not_modified(response, _catalog_etag(version), if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response.headers)
+    body = await sweet_service.get_sweet_json(sweet_id, version)
     
-    if not sweet:
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sweet not found"
         )
     
-    return SweetResponse.model_validate(sweet)
+    return _json_body(response, body)
 
 
 @router.post("", response_model=SweetResponse, status_code=status.HTTP_201_CREATED)
 async def create_sweet(
     sweet_data: SweetCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin: Annotated[User, Depends(get_admin_user)]
+    admin: Annotated[Principal, Depends(get_admin_user)]
 ):
     """
     Create a new sweet.
@@ -67,12 +284,35 @@ async def create_sweet(
     return SweetResponse.model_validate(sweet)
 
 
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_update_sweets(
+    operation: BulkOperation,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin: Annotated[Principal, Depends(get_admin_user)]
+):
+    """
+    Apply one operation to many sweets at once.
+    
+    The ``op`` field selects the operation:
+    - ``restock``: add ``quantity`` to each of ``sweet_ids``
+    - ``reprice``: change every price in ``category`` by ``percent``
+    - ``delete``: delete each of ``sweet_ids``
+    
+    Each runs as a single set-based statement; the response gives the
+    number of sweets affected.
+    
+    Admin only endpoint.
+    """
+    sweet_service = SweetService(db)
+    return await sweet_service.bulk_update(operation)
+
+
 @router.put("/{sweet_id}", response_model=SweetResponse)
 async def update_sweet(
     sweet_id: str,
     sweet_data: SweetUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin: Annotated[User, Depends(get_admin_user)]
+    admin: Annotated[Principal, Depends(get_admin_user)]
 ):
     """
     Update a sweet.
@@ -95,7 +335,7 @@ async def update_sweet(
 async def delete_sweet(
     sweet_id: str,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin: Annotated[User, Depends(get_admin_user)]
+    admin: Annotated[Principal, Depends(get_admin_user)]
 ):
     """
     Delete a sweet.
@@ -112,12 +352,41 @@ async def delete_sweet(
         )
 
 
+@router.put("/{sweet_id}/shards", response_model=SweetResponse)
+async def set_stock_shards(
+    sweet_id: str,
+    shard_data: StockShardRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    admin: Annotated[Principal, Depends(get_admin_user)]
+):
+    """
+    Split a sweet's stock across several shard rows.
+    
+    Purchases of a sharded sweet decrement one shard at a time, which
+    spreads flash-sale contention. Use 0 or 1 shards to merge back.
+    
+    Admin only endpoint.
+    """
+    sweet_service = SweetService(db)
+    sweet = await sweet_service.set_stock_shards(sweet_id, shard_data.shards)
+    
+    if not sweet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sweet not found"
+        )
+    
+    return sweet
+
+
 @router.post("/{sweet_id}/purchase", response_model=PurchaseResponse)
 async def purchase_sweet(
     sweet_id: str,
     purchase_data: PurchaseRequest,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    idempotency_key: Annotated[Optional[str], Header(max_length=255)] = None
 ):
     """
     Purchase a sweet.
@@ -125,17 +394,74 @@ async def purchase_sweet(
     This endpoint handles atomic purchases to prevent race conditions
     when multiple users try to purchase the last item simultaneously.
     
-    Requires authentication.
+    Requires authentication. Send an ``Idempotency-Key`` header to make
+    retries safe: a repeated key returns the first successful response
+    (marked ``Idempotent-Replayed: true``) without buying again.
     
     Returns:
         - 200: Purchase successful
         - 404: Sweet not found
+        - 409: A request with the same Idempotency-Key is still running,
+          or was interrupted after it may have gone through
+        - 422: Insufficient stock, or Idempotency-Key reused for another request
+        - 429: Purchase queue full; retry after the Retry-After seconds
+    """
+    sweet_service = SweetService(db)
+    
+    try:
+        return await _run_idempotent(
+            db, response, current_user.id, idempotency_key,
+            f"purchase:{sweet_id}:{purchase_data.quantity}",
+            PurchaseResponse,
+            lambda: sweet_service.purchase_sweet(sweet_id, purchase_data.quantity, current_user.id)
+        )
+    except SweetNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sweet not found"
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except PurchaseQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+@router.post(
+    "/{sweet_id}/reserve",
+    response_model=HoldResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def reserve_sweet(
+    sweet_id: str,
+    reserve_data: ReserveRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
+):
+    """
+    Hold stock for the current user's cart.
+    
+    The quantity is taken from stock straight away and kept for a limited
+    time; confirming the hold before it expires completes the purchase
+    without another stock check. Unconfirmed holds return to stock.
+    
+    Requires authentication.
+    
+    Returns:
+        - 201: Stock held
+        - 404: Sweet not found
         - 422: Insufficient stock
     """
     sweet_service = SweetService(db)
     
     try:
-        return await sweet_service.purchase_sweet(sweet_id, purchase_data.quantity, current_user.id)
+        return await sweet_service.reserve_sweet(sweet_id, reserve_data.quantity, current_user.id)
     except SweetNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,3 +472,107 @@ async def purchase_sweet(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=str(e)
         )
+
+
+@holds_router.post("/{hold_id}/confirm", response_model=PurchaseResponse)
+async def confirm_hold(
+    hold_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
+):
+    """
+    Complete the purchase of a held quantity.
+    
+    Requires authentication; users can only confirm their own holds.
+    
+    Returns:
+        - 200: Purchase successful
+        - 404: Hold not found
+        - 409: Hold already confirmed, released or expired
+    """
+    sweet_service = SweetService(db)
+    
+    try:
+        return await sweet_service.confirm_hold(hold_id, current_user.id)
+    except HoldNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hold not found"
+        )
+    except HoldNotActiveError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@holds_router.delete("/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_hold(
+    hold_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
+):
+    """
+    Cancel a hold and return its stock.
+    
+    Requires authentication; users can only release their own holds.
+    """
+    sweet_service = SweetService(db)
+    
+    try:
+        await sweet_service.release_hold(hold_id, current_user.id)
+    except HoldNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hold not found"
+        )
+    except HoldNotActiveError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@checkout_router.post("", response_model=CheckoutResponse)
+async def checkout(
+    checkout_data: CheckoutRequest,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    idempotency_key: Annotated[Optional[str], Header(max_length=255)] = None
+):
+    """
+    Purchase every line of a cart in a single transaction.
+    
+    The cart is all-or-nothing: if any line cannot be fulfilled no stock
+    is taken and the response lists the shortfall for each failing line.
+    
+    Requires authentication. Honours ``Idempotency-Key`` like the single
+    purchase endpoint.
+    
+    Returns:
+        - 200: Checkout successful
+        - 404: A sweet in the cart was not found
+        - 409: A request with the same Idempotency-Key is still running,
+          or was interrupted after it may have gone through
+        - 422: Insufficient stock for one or more lines
+    """
+    sweet_service = SweetService(db)
+    
+    try:
+        return await _run_idempotent(
+            db, response, current_user.id, idempotency_key,
+            f"checkout:{checkout_data.model_dump_json()}",
+            CheckoutResponse,
+            lambda: sweet_service.checkout(checkout_data.items, current_user.id)
+        )
+    except SweetNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except CheckoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "shortfalls": e.shortfalls}
+        )
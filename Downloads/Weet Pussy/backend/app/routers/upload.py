@@ -5,7 +5,7 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import JSONResponse
 
 from app.security.dependencies import get_admin_user, get_current_user
-from app.models.user import User
+from app.security.principal import Principal
 
 router = APIRouter(prefix="/api/upload", tags=["Upload"])
 
@@ -28,7 +28,7 @@ def get_file_extension(filename: str) -> str:
 @router.post("/image")
 async def upload_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Upload an image file. Returns the URL to access the uploaded image.
@@ -78,7 +78,7 @@ async def upload_image(
 @router.delete("/image/{filename}")
 async def delete_image(
     filename: str,
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Delete an uploaded image. Admin only."""
     file_path = os.path.join(UPLOAD_DIR, filename)
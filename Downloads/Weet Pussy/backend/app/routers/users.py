@@ -3,18 +3,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.models.user import User
+from app.security.principal import Principal
 from app.schemas.user import UserProfileUpdate, UserProfileResponse, PasswordChange
 from app.schemas.order import OrderResponse
 from app.services.user_service import UserService
 from app.security.dependencies import get_current_user
+from app.security.password import PasswordHasherBusyError
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_profile(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """
@@ -30,7 +31,7 @@ async def get_profile(
 @router.put("/profile", response_model=UserProfileResponse)
 async def update_profile(
     profile_data: UserProfileUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """
@@ -52,7 +53,7 @@ async def update_profile(
 
 @router.get("/orders", response_model=List[OrderResponse])
 async def get_order_history(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """
@@ -61,14 +62,13 @@ async def get_order_history(
     Requires authentication.
     """
     user_service = UserService(db)
-    orders = await user_service.get_user_orders(current_user.id)
-    return [OrderResponse.model_validate(order) for order in orders]
+    return await user_service.get_user_orders(current_user.id)
 
 
 @router.put("/password")
 async def change_password(
     password_data: PasswordChange,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """
@@ -77,11 +77,18 @@ async def change_password(
     Requires authentication and current password verification.
     """
     user_service = UserService(db)
-    success = await user_service.change_password(
-        current_user.id, 
-        password_data.current_password, 
-        password_data.new_password
-    )
+    try:
+        success = await user_service.change_password(
+            current_user.id, 
+            password_data.current_password, 
+            password_data.new_password
+        )
+    except PasswordHasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     if not success:
         raise HTTPException(
@@ -94,7 +101,7 @@ async def change_password(
 
 @router.delete("/profile", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """
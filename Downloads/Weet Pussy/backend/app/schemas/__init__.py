@@ -1,15 +1,23 @@
 from app.schemas.user import (
     UserBase, UserCreate, UserLogin, UserResponse, 
-    TokenResponse, TokenPayload
+    TokenResponse, TokenPayload, RefreshRequest, LogoutRequest
 )
 from app.schemas.sweet import (
-    SweetBase, SweetCreate, SweetUpdate, SweetResponse,
-    PurchaseRequest, PurchaseResponse
+    SweetBase, SweetCreate, SweetUpdate, SweetResponse, SweetSuggestion,
+    CategoryFacet, PriceBucket, StockBucket, CatalogFacets, StockShardRequest,
+    PurchaseRequest, PurchaseResponse,
+    CheckoutItem, CheckoutRequest, CheckoutLine, CheckoutResponse,
+    ReserveRequest, HoldResponse,
+    BulkRestock, BulkReprice, BulkDelete, BulkOperation, BulkResponse
 )
 
 __all__ = [
     "UserBase", "UserCreate", "UserLogin", "UserResponse",
-    "TokenResponse", "TokenPayload",
-    "SweetBase", "SweetCreate", "SweetUpdate", "SweetResponse",
-    "PurchaseRequest", "PurchaseResponse"
+    "TokenResponse", "TokenPayload", "RefreshRequest", "LogoutRequest",
+    "SweetBase", "SweetCreate", "SweetUpdate", "SweetResponse", "SweetSuggestion",
+    "CategoryFacet", "PriceBucket", "StockBucket", "CatalogFacets", "StockShardRequest",
+    "PurchaseRequest", "PurchaseResponse",
+    "CheckoutItem", "CheckoutRequest", "CheckoutLine", "CheckoutResponse",
+    "ReserveRequest", "HoldResponse",
+    "BulkRestock", "BulkReprice", "BulkDelete", "BulkOperation", "BulkResponse"
 ]
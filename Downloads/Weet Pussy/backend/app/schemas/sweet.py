@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Union
 from app.models.sweet import SweetCategory
+from app.models.stock_hold import HoldStatus
 
 
 class SweetBase(BaseModel):
@@ -34,6 +36,47 @@ class SweetResponse(SweetBase):
         from_attributes = True
 
 
+class SweetSuggestion(BaseModel):
+    """Schema for a name suggestion while typing."""
+    id: str
+    name: str
+
+
+class CategoryFacet(BaseModel):
+    """Schema for the sweets of one category in catalog facets."""
+    category: SweetCategory
+    count: int
+    in_stock: int
+
+
+class PriceBucket(BaseModel):
+    """Schema for one bar of a price histogram."""
+    min: float
+    max: float
+    count: int
+
+
+class StockBucket(BaseModel):
+    """Schema for one band of the stock distribution (max is exclusive)."""
+    min: int
+    max: Optional[int] = None
+    count: int
+
+
+class CatalogFacets(BaseModel):
+    """Schema for catalog facet counts."""
+    total: int
+    in_stock: int
+    categories: List[CategoryFacet]
+    price_histogram: List[PriceBucket]
+    stock: List[StockBucket]
+
+
+class StockShardRequest(BaseModel):
+    """Schema for splitting a sweet's stock across shards."""
+    shards: int = Field(..., ge=0, le=64, description="Number of stock shards (0 or 1 to merge)")
+
+
 class PurchaseRequest(BaseModel):
     """Schema for purchase request."""
     quantity: int = Field(default=1, ge=1, description="Quantity to purchase")
@@ -45,3 +88,79 @@ class PurchaseResponse(BaseModel):
     message: str
     sweet: SweetResponse
     quantity_purchased: int
+
+
+class CheckoutItem(BaseModel):
+    """Schema for a single cart line in a checkout request."""
+    sweet_id: str
+    quantity: int = Field(default=1, ge=1, description="Quantity to purchase")
+
+
+class CheckoutRequest(BaseModel):
+    """Schema for a multi-item checkout request."""
+    items: List[CheckoutItem] = Field(..., min_length=1, description="Cart lines to purchase")
+
+
+class CheckoutLine(BaseModel):
+    """Schema for a purchased cart line."""
+    sweet: SweetResponse
+    quantity_purchased: int
+    total: float
+
+
+class CheckoutResponse(BaseModel):
+    """Schema for checkout response."""
+    success: bool
+    message: str
+    items: List[CheckoutLine]
+    total: float
+
+
+
+class ReserveRequest(BaseModel):
+    """Schema for reserving stock ahead of a purchase."""
+    quantity: int = Field(default=1, ge=1, description="Quantity to hold")
+
+
+class HoldResponse(BaseModel):
+    """Schema for a stock hold."""
+    id: str
+    sweet: SweetResponse
+    quantity: int
+    status: HoldStatus
+    expires_at: datetime
+
+
+class BulkRestock(BaseModel):
+    """Add the same quantity to the stock of every listed sweet."""
+    op: Literal["restock"]
+    sweet_ids: List[str] = Field(..., min_length=1, max_length=5000)
+    quantity: int = Field(..., ge=1, description="Quantity added to each sweet")
+
+
+class BulkReprice(BaseModel):
+    """Change the price of every sweet in a category by a percentage."""
+    op: Literal["reprice"]
+    category: SweetCategory
+    percent: float = Field(
+        ..., gt=-100, le=1000,
+        description="Percentage change, e.g. -20 for a 20% discount"
+    )
+
+
+class BulkDelete(BaseModel):
+    """Delete every listed sweet."""
+    op: Literal["delete"]
+    sweet_ids: List[str] = Field(..., min_length=1, max_length=5000)
+
+
+BulkOperation = Annotated[
+    Union[BulkRestock, BulkReprice, BulkDelete],
+    Field(discriminator="op")
+]
+
+
+class BulkResponse(BaseModel):
+    """Schema for bulk operation response."""
+    op: str
+    affected: int
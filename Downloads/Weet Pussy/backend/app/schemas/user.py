@@ -31,9 +31,21 @@ class TokenResponse(BaseModel):
     """Schema for JWT token response."""
     access_token: str
     token_type: str = "bearer"
+    # Exchange at POST /api/auth/refresh for new tokens, once
+    refresh_token: Optional[str] = None
     user: UserResponse
 
 
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token."""
+    refresh_token: str = Field(..., min_length=1, max_length=255)
+
+
+class LogoutRequest(BaseModel):
+    """Schema for signing out; the refresh token's session is ended too."""
+    refresh_token: Optional[str] = Field(None, min_length=1, max_length=255)
+
+
 class TokenPayload(BaseModel):
     """Schema for JWT token payload."""
     sub: str  # user email
@@ -1,9 +1,14 @@
-from app.security.password import hash_password, verify_password
-from app.security.jwt import create_access_token, decode_token
+from app.security.password import (
+    hash_password, verify_password, hash_password_async, verify_password_async,
+    PasswordHasherBusyError
+)
+from app.security.jwt import create_access_token, decode_token, verify_token
+from app.security.principal import Principal, invalidate_principal
 from app.security.dependencies import get_current_user, get_admin_user, get_current_user_optional
 
 __all__ = [
-    "hash_password", "verify_password",
-    "create_access_token", "decode_token",
+    "hash_password", "verify_password", "hash_password_async", "verify_password_async",
+    "PasswordHasherBusyError",
+    "create_access_token", "decode_token", "verify_token", "Principal", "invalidate_principal",
     "get_current_user", "get_admin_user", "get_current_user_optional"
 ]
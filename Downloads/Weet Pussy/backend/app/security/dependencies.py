@@ -2,11 +2,11 @@ from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.database import get_db
-from app.models.user import User
-from app.security.jwt import decode_token
+from app.security.jwt import verify_token
+from app.security.principal import Principal, load_principal
+from app.security.revocation import is_token_revoked
 from app.config import get_settings
 
 settings = get_settings()
@@ -16,8 +16,14 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: Annotated[AsyncSession, Depends(get_db)]
-) -> User:
-    """Get the current authenticated user from JWT token."""
+) -> Principal:
+    """
+    Get the current authenticated user from JWT token.
+    
+    Resolved through the principal cache, so most requests do not query
+    the users table. Revoked tokens (logout, password change) are
+    refused; see ``app.security.revocation``.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,7 +31,7 @@ async def get_current_user(
     )
     
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = verify_token(token)
     
     if payload is None:
         raise credentials_exception
@@ -34,19 +40,21 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    if await is_token_revoked(db, payload):
+        raise credentials_exception
+    
+    principal = await load_principal(db, email)
     
-    if user is None:
+    if principal is None:
         raise credentials_exception
     
-    return user
+    return principal
 
 
 async def get_current_user_optional(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)]
-) -> Optional[User]:
+) -> Optional[Principal]:
     """Get current user if authenticated, otherwise None."""
     auth_header = request.headers.get("Authorization")
     
@@ -54,7 +62,7 @@ async def get_current_user_optional(
         return None
     
     token = auth_header.split(" ")[1]
-    payload = decode_token(token)
+    payload = verify_token(token)
     
     if payload is None:
         return None
@@ -63,14 +71,16 @@ async def get_current_user_optional(
     if email is None:
         return None
     
-    result = await db.execute(select(User).where(User.email == email))
-    return result.scalar_one_or_none()
+    if await is_token_revoked(db, payload):
+        return None
+    
+    return await load_principal(db, email)
 
 
 async def get_admin_user(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     request: Request
-) -> User:
+) -> Principal:
     """Verify the current user is an admin."""
     if not current_user.is_admin:
         raise HTTPException(
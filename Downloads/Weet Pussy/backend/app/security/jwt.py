@@ -1,5 +1,12 @@
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import NamedTuple, Optional
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
 import jwt
 
 from app.config import get_settings
@@ -7,21 +14,113 @@ from app.config import get_settings
 settings = get_settings()
 
 
+@dataclass
+class TokenCacheStats:
+    """Counters describing how bearer tokens were verified."""
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    revocations: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "revocations": self.revocations
+        }
+
+
+token_cache_stats = TokenCacheStats()
+
+
+class _Verified(NamedTuple):
+    claims: dict
+    expires_at: float
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified tokens, keyed by a digest of the token.
+
+    Holds each token's decoded claims until its ``exp``, so repeat
+    requests with the same token skip the signature check and JSON
+    parsing. Tokens without an ``exp`` are not kept. Revoking a token
+    must call ``forget`` so it cannot be served from here afterwards.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, _Verified]" = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            token_cache_stats.misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            token_cache_stats.expirations += 1
+            token_cache_stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        token_cache_stats.hits += 1
+        return entry.claims
+
+    def put(self, token: str, claims: dict) -> None:
+        expires_at = claims.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = self.key(token)
+        self._entries[key] = _Verified(claims, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            token_cache_stats.evictions += 1
+
+    def forget(self, token: str) -> None:
+        if self._entries.pop(self.key(token), None) is not None:
+            token_cache_stats.revocations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Verified tokens of this process (tokens do not depend on the database)
+token_cache = TokenCache(settings.JWT_CACHE_SIZE)
+
+
 def create_access_token(
     data: dict, 
     expires_delta: Optional[timedelta] = None
 ) -> str:
-    """Create a JWT access token."""
+    """
+    Create a JWT access token.
+    
+    Each token gets a unique ``jti`` it can be revoked by, and a
+    fractional ``iat`` for revoking everything issued before a moment.
+    """
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "jti": uuid.uuid4().hex})
     
     encoded_jwt = jwt.encode(
         to_encode, 
@@ -45,3 +144,31 @@ def decode_token(token: str) -> Optional[dict]:
         return None
     except jwt.InvalidTokenError:
         return None
+
+
+def verify_token(token: str) -> Optional[dict]:
+    """
+    Decode and validate a JWT token, remembering tokens already verified.
+    
+    Claims are shared between requests and must not be modified.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        if claims is not None:
+            token_cache.put(token, claims)
+    return claims
+
+
+def create_refresh_token() -> str:
+    """Create an opaque, random refresh token."""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Keyed hash of a refresh token, as it is stored and looked up."""
+    return hmac.new(
+        settings.JWT_SECRET_KEY.encode(),
+        token.encode(),
+        hashlib.sha256
+    ).hexdigest()
@@ -1,9 +1,48 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
 from passlib.context import CryptContext
 
+from app.config import get_settings
+
+settings = get_settings()
+
 # Password hashing context using bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@dataclass
+class HashStats:
+    """Counters describing the password hashing pool."""
+    completed: int = 0
+    rejected: int = 0
+    in_flight: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "completed": self.completed,
+            "rejected": self.rejected,
+            # Calls running or waiting for a worker right now
+            "in_flight": self.in_flight
+        }
+
+
+# Hashes and checks run off the event loop, in this pool (per process)
+_executor: Optional[Executor] = None
+_in_flight = 0
+hash_stats = HashStats()
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing pool already has a full backlog."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     # Encode as UTF-8 to handle bcrypt's 72-byte limit
@@ -15,3 +54,57 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     password_bytes = plain_password.encode('utf-8')[:72]
     return pwd_context.verify(password_bytes.decode('utf-8'), hashed_password)
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+    return _executor
+
+
+async def _run_in_pool(function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a bcrypt call in the hashing pool without blocking the event loop.
+
+    At most PASSWORD_HASH_WORKERS calls run at once and PASSWORD_HASH_MAX_PENDING
+    more may wait for a worker; beyond that callers are refused straight
+    away rather than queueing for seconds.
+    """
+    global _in_flight
+    if _in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING:
+        hash_stats.rejected += 1
+        raise PasswordHasherBusyError("Too many sign-ins in progress, please retry")
+    _in_flight += 1
+    hash_stats.in_flight = _in_flight
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_get_executor(), function, *args)
+        hash_stats.completed += 1
+        return result
+    finally:
+        _in_flight -= 1
+        hash_stats.in_flight = _in_flight
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password using bcrypt, in the hashing pool."""
+    return await _run_in_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash, in the hashing pool."""
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+
+def shutdown_password_pool() -> None:
+    """Stop the hashing pool's workers (application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.models.user import User
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user, as endpoints see it.
+
+    Small and immutable so one instance can be shared by every request
+    carrying the same token subject. Endpoints that need the full user
+    row load it by ``id``.
+    """
+    id: int
+    email: str
+    is_admin: bool
+    has_2fa: bool
+
+
+@dataclass
+class PrincipalCacheStats:
+    """Counters describing how authenticated principals were resolved."""
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            # Every hit is a users lookup that did not run
+            "saved_queries": self.hits,
+            "invalidations": self.invalidations
+        }
+
+
+# Shared by every principal cache in the process
+principal_cache_stats = PrincipalCacheStats()
+
+
+class _Entry(NamedTuple):
+    principal: Principal
+    expires_at: float
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of principals by token subject (email), with a time-to-live.
+
+    Writes to a user made through this worker invalidate its entry
+    (see ``invalidate_principal``); changes made by other workers are
+    picked up when the entry expires, so the TTL is kept short.
+    ``generation`` moves on with every invalidation, and a lookup only
+    stores what it read if none happened meanwhile.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, subject: str) -> Optional[Principal]:
+        entry = self._entries.get(subject)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[subject]
+            principal_cache_stats.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        principal_cache_stats.hits += 1
+        return entry.principal
+
+    def put(self, principal: Principal, generation: int) -> None:
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[principal.email] = _Entry(principal, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(principal.email)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str) -> None:
+        self.generation += 1
+        if self._entries.pop(subject, None) is not None:
+            principal_cache_stats.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# One cache per database engine
+_caches: Dict[AsyncEngine, PrincipalCache] = {}
+
+
+def get_principal_cache(engine: AsyncEngine) -> PrincipalCache:
+    """Get the principal cache for an engine, creating it on first use."""
+    cache = _caches.get(engine)
+    if cache is None:
+        cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+        _caches[engine] = cache
+    return cache
+
+
+def invalidate_principal(engine: AsyncEngine, email: str) -> None:
+    """Drop a user's cached principal after a write to that user."""
+    cache = _caches.get(engine)
+    if cache is not None:
+        cache.invalidate(email)
+
+
+async def load_principal(db: AsyncSession, subject: str) -> Optional[Principal]:
+    """Get the principal of a token subject, from the cache or the users table."""
+    cache = get_principal_cache(db.bind)
+    principal = cache.get(subject) if cache.enabled else None
+    if principal is not None:
+        return principal
+
+    generation = cache.generation
+    result = await db.execute(
+        select(User.id, User.email, User.is_admin, User.two_factor_secret.is_not(None))
+        .where(User.email == subject)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    principal = Principal(*row)
+    cache.put(principal, generation)
+    return principal
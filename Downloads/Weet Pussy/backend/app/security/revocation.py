@@ -0,0 +1,194 @@
+"""
+Access-token revocation.
+
+Revoked tokens are recorded in the revoked_tokens table, by ``jti`` for
+a single token (logout) or by subject for every token of a user issued
+before a point in time (password change). Each worker keeps a Bloom
+filter of the recorded keys, so a token that was never revoked - nearly
+all of them - is accepted without a query; only a Bloom hit is checked
+against the table.
+
+A worker's own revocations enter its filter at once. Other workers'
+are read past the last id seen at most every
+``TOKEN_REVOCATION_SYNC_SECONDS``, which bounds how long a revoked
+token stays usable elsewhere. Bloom filters cannot forget, so the
+filter is rebuilt from the unexpired revocations at startup and after
+compaction.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+from app.security.jwt import token_cache, verify_token
+from app.utils.bloom import BloomFilter
+
+settings = get_settings()
+
+
+@dataclass
+class RevocationStats:
+    """Counters describing how tokens were checked for revocation."""
+    checks: int = 0
+    bloom_negatives: int = 0
+    db_checks: int = 0
+    false_positives: int = 0
+    revoked: int = 0
+    revocations: int = 0
+    syncs: int = 0
+    rebuilds: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "checks": self.checks,
+            "bloom_negatives": self.bloom_negatives,
+            # Checks that needed a revoked_tokens query
+            "db_checks": self.db_checks,
+            "false_positives": self.false_positives,
+            "revoked": self.revoked,
+            "revocations": self.revocations,
+            "syncs": self.syncs,
+            "rebuilds": self.rebuilds
+        }
+
+
+revocation_stats = RevocationStats()
+
+
+def subject_key(subject: str) -> str:
+    """Revocation key covering every token of ``subject`` issued before it."""
+    return f"sub:{subject}"
+
+
+class RevocationFilter:
+    """Bloom filter of one database's revocation keys, and how far it has read them."""
+
+    def __init__(self, keys: Iterable[str], last_id: int):
+        keys = list(keys)
+        # Room to grow before the false-positive rate degrades
+        self.bloom = BloomFilter(
+            max(settings.TOKEN_REVOCATION_CAPACITY, 2 * len(keys)),
+            settings.TOKEN_REVOCATION_FP_RATE
+        )
+        for key in keys:
+            self.bloom.add(key)
+        self.last_id = last_id
+        self.synced_at = time.monotonic()
+
+    @property
+    def full(self) -> bool:
+        return len(self.bloom) > self.bloom.capacity
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.bloom
+
+    def add(self, key: str) -> None:
+        self.bloom.add(key)
+
+
+_filters: Dict[AsyncEngine, RevocationFilter] = {}
+
+
+async def load_revocations(db: AsyncSession) -> RevocationFilter:
+    """(Re)build the revocation filter of ``db``'s database from the table."""
+    last_id, keys = await RevokedTokenRepository(db).get_active()
+    revocations = RevocationFilter(keys, last_id)
+    _filters[db.bind] = revocations
+    revocation_stats.rebuilds += 1
+    return revocations
+
+
+async def _get_filter(db: AsyncSession) -> RevocationFilter:
+    revocations = _filters.get(db.bind)
+    if revocations is None:
+        return await load_revocations(db)
+    if time.monotonic() - revocations.synced_at < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+        return revocations
+
+    # Claimed before awaiting, so concurrent requests do not all sync
+    revocations.synced_at = time.monotonic()
+    for revocation_id, key in await RevokedTokenRepository(db).get_since(revocations.last_id):
+        revocations.add(key)
+        revocations.last_id = revocation_id
+    revocation_stats.syncs += 1
+    if revocations.full:
+        return await load_revocations(db)
+    return revocations
+
+
+async def is_token_revoked(db: AsyncSession, claims: dict) -> bool:
+    """
+    Check verified claims against the revocations.
+
+    Costs a few hashes for a token that was never revoked, and one
+    indexed query when the Bloom filter reports a possible revocation.
+    """
+    revocation_stats.checks += 1
+    revocations = await _get_filter(db)
+
+    jti = claims.get("jti")
+    subject = subject_key(claims.get("sub", ""))
+    keys = [key for key in (jti, subject) if key and key in revocations]
+    if not keys:
+        revocation_stats.bloom_negatives += 1
+        return False
+
+    revocation_stats.db_checks += 1
+    revoked_at = await RevokedTokenRepository(db).get_revoked_at(keys)
+    revoked = jti in revoked_at
+    cutoff = revoked_at.get(subject)
+    if not revoked and cutoff is not None:
+        # Tokens from before iat was issued predate any cutoff
+        issued_at = claims.get("iat")
+        revoked = issued_at is None or datetime.utcfromtimestamp(issued_at) < cutoff
+
+    if revoked:
+        revocation_stats.revoked += 1
+    elif not revoked_at:
+        revocation_stats.false_positives += 1
+    return revoked
+
+
+async def _revoke(db: AsyncSession, key: str, expires_at: datetime, revoked_at: datetime) -> None:
+    await RevokedTokenRepository(db).revoke(key, expires_at, revoked_at)
+    revocations = _filters.get(db.bind)
+    if revocations is not None:
+        revocations.add(key)
+    revocation_stats.revocations += 1
+
+
+async def revoke_access_token(db: AsyncSession, token: str) -> bool:
+    """
+    Revoke one access token (e.g. on logout) until it expires.
+
+    Returns:
+        False if the token is invalid or carries no ``jti``
+    """
+    claims = verify_token(token)
+    if claims is None or claims.get("jti") is None:
+        return False
+    await _revoke(
+        db, claims["jti"],
+        expires_at=datetime.utcfromtimestamp(claims["exp"]),
+        revoked_at=datetime.utcnow()
+    )
+    token_cache.forget(token)
+    return True
+
+
+async def revoke_subject_tokens(db: AsyncSession, subject: str, now: Optional[datetime] = None) -> None:
+    """
+    Revoke every access token of ``subject`` issued so far (e.g. on password change).
+
+    Kept until the last of those tokens has expired.
+    """
+    now = now or datetime.utcnow()
+    await _revoke(
+        db, subject_key(subject),
+        expires_at=now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        revoked_at=now
+    )
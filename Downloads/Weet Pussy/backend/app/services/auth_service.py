@@ -1,10 +1,17 @@
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.repositories.user_repository import UserRepository
+from app.repositories.session_repository import SessionRepository
 from app.models.user import User
 from app.schemas.user import UserCreate, TokenResponse, UserResponse
-from app.security.password import verify_password
+from app.security.password import verify_password_async
 from app.security.jwt import create_access_token
+from app.security.principal import Principal
+from app.security.revocation import revoke_access_token
+
+settings = get_settings()
 
 
 class AuthenticationError(Exception):
@@ -23,20 +30,11 @@ class AuthService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.user_repo = UserRepository(session)
+        self.session_repo = SessionRepository(session)
     
-    async def register(self, user_data: UserCreate) -> TokenResponse:
-        """Register a new user and return a token."""
-        # Check if user already exists
-        if await self.user_repo.exists(user_data.email):
-            raise UserExistsError("User with this email already exists")
-        
-        # Create the user
-        user = await self.user_repo.create(
-            email=user_data.email,
-            password=user_data.password
-        )
-        
-        # Generate token
+    @staticmethod
+    def _token_response(user: Principal, refresh_token: str) -> TokenResponse:
+        """Issue an access token for a user, alongside its refresh token."""
         token = create_access_token({
             "sub": user.email,
             "is_admin": user.is_admin
@@ -44,39 +42,85 @@ class AuthService:
         
         return TokenResponse(
             access_token=token,
+            refresh_token=refresh_token,
             user=UserResponse(
                 id=user.id,
                 email=user.email,
                 is_admin=user.is_admin,
-                has_2fa=user.two_factor_secret is not None
+                has_2fa=user.has_2fa
             )
         )
     
+    async def _start_session(self, user: User) -> TokenResponse:
+        """Open a refresh-token session for a signed-in user and issue its tokens."""
+        refresh_token = await self.session_repo.create(
+            user.id, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        )
+        principal = Principal(
+            id=user.id,
+            email=user.email,
+            is_admin=user.is_admin,
+            has_2fa=user.two_factor_secret is not None
+        )
+        return self._token_response(principal, refresh_token)
+    
+    async def register(self, user_data: UserCreate) -> TokenResponse:
+        """Register a new user and return tokens."""
+        # Check if user already exists
+        if await self.user_repo.exists(user_data.email):
+            raise UserExistsError("User with this email already exists")
+        
+        # Hand the connection back while the password is hashed
+        await self.session.close()
+        
+        # Create the user
+        user = await self.user_repo.create(
+            email=user_data.email,
+            password=user_data.password
+        )
+        
+        # Generate tokens
+        return await self._start_session(user)
+    
     async def login(self, email: str, password: str) -> TokenResponse:
-        """Authenticate user and return a token."""
+        """Authenticate user and return tokens."""
         user = await self.user_repo.get_by_email(email)
         
         if not user:
             raise AuthenticationError("Invalid email or password")
         
-        if not verify_password(password, user.hashed_password):
+        # Hand the connection back (``user`` stays loaded, detached) rather
+        # than hold it while waiting for a hashing worker
+        await self.session.close()
+        
+        if not await verify_password_async(password, user.hashed_password):
             raise AuthenticationError("Invalid email or password")
         
-        # Generate token
-        token = create_access_token({
-            "sub": user.email,
-            "is_admin": user.is_admin
-        })
+        # Generate tokens
+        return await self._start_session(user)
+    
+    async def refresh(self, refresh_token: str) -> TokenResponse:
+        """
+        Exchange a refresh token for a new access token and refresh token.
         
-        return TokenResponse(
-            access_token=token,
-            user=UserResponse(
-                id=user.id,
-                email=user.email,
-                is_admin=user.is_admin,
-                has_2fa=user.two_factor_secret is not None
-            )
+        Costs one session lookup and no password hashing. Raises
+        InvalidRefreshTokenError (or RefreshTokenReuseError).
+        """
+        user, new_refresh_token = await self.session_repo.rotate(
+            refresh_token, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
         )
+        return self._token_response(user, new_refresh_token)
+    
+    async def logout(self, access_token: str, refresh_token: Optional[str] = None) -> None:
+        """
+        Sign out: revoke the access token and, if given, the refresh token's session.
+        
+        The access token is refused from then on by this worker, and by
+        the others within TOKEN_REVOCATION_SYNC_SECONDS.
+        """
+        await revoke_access_token(self.session, access_token)
+        if refresh_token:
+            await self.session_repo.revoke_family(refresh_token)
     
     async def create_admin(self, email: str, password: str) -> User:
         """Create an admin user (for initial setup)."""
@@ -0,0 +1,192 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.repositories.sweet_repository import SweetRow, on_catalog_change
+
+settings = get_settings()
+
+# Cache key of the full listing; single sweets are cached under their id
+LIST_KEY = ("list",)
+
+
+@dataclass
+class CatalogCacheStats:
+    """Counters describing how catalog reads were answered."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    patches: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "patches": self.patches
+        }
+
+
+# Shared by every catalog cache in the process
+catalog_cache_stats = CatalogCacheStats()
+
+
+class _Listing(NamedTuple):
+    sweets: List[SweetRow]
+    positions: Dict[str, int]
+
+
+class _Entry(NamedTuple):
+    value: Union[SweetRow, _Listing]
+    expires_at: float
+
+
+class CatalogCache:
+    """
+    Bounded LRU of catalog reads with a time-to-live.
+
+    Holds the full listing and single sweets as read-only rows, as of
+    catalog ``version``. Committed writes from this worker patch the
+    stock of cached entries or drop them (see ``on_catalog_change``).
+    Readers pass the catalog version they read to ``observe``; if another
+    worker has written since, the whole cache is dropped.
+
+    A read that misses stores its result under the version it read
+    first, and only if that is still the cache's version, so a slow read
+    cannot put back data a write has just replaced.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[Tuple[str, ...], _Entry]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def _get(self, cache_key: Tuple[str, ...]):
+        entry = self._entries.get(cache_key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[cache_key]
+            catalog_cache_stats.misses += 1
+            return None
+        self._entries.move_to_end(cache_key)
+        catalog_cache_stats.hits += 1
+        return entry.value
+
+    def _put(self, cache_key: Tuple[str, ...], value, version: int) -> None:
+        if version != self.version or not self.enabled:
+            return
+        self._entries[cache_key] = _Entry(value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            catalog_cache_stats.evictions += 1
+
+    def get_listing(self) -> Optional[List[SweetRow]]:
+        listing = self._get(LIST_KEY)
+        return listing.sweets if listing else None
+
+    def put_listing(self, sweets: List[SweetRow], version: int) -> None:
+        positions = {sweet["id"]: i for i, sweet in enumerate(sweets)}
+        self._put(LIST_KEY, _Listing(sweets, positions), version)
+
+    def get_sweet(self, sweet_id: str) -> Optional[SweetRow]:
+        return self._get(("sweet", sweet_id))
+
+    def put_sweet(self, sweet: SweetRow, version: int) -> None:
+        self._put(("sweet", sweet["id"]), sweet, version)
+
+    def observe(self, version: int) -> None:
+        """Drop everything if the catalog has moved past the cached version."""
+        if self.version is None or version > self.version:
+            self._reset(version)
+
+    def apply(self, version: int, changes: Optional[Dict[str, Optional[int]]]) -> None:
+        """
+        Bring cached entries in line with a write, ``version`` being the
+        catalog version read right after it committed.
+
+        Sweets whose new stock is known are patched in place, in the
+        listing too; anything else drops the sweet and the listing.
+        ``None``, or a write that skipped versions we never saw, drops
+        everything.
+        """
+        if self.version is not None and version <= self.version:
+            # Already overtaken by a later write
+            return
+        if changes is None or self.version is None or version != self.version + 1:
+            self._reset(version)
+            return
+        self.version = version
+
+        for sweet_id, quantity in changes.items():
+            cache_key = ("sweet", sweet_id)
+            entry = self._entries.get(cache_key)
+            listing = self._entries.get(LIST_KEY)
+
+            if quantity is None:
+                for stale in (cache_key, LIST_KEY):
+                    if self._entries.pop(stale, None) is not None:
+                        catalog_cache_stats.invalidations += 1
+                continue
+
+            if entry is not None:
+                self._entries[cache_key] = entry._replace(
+                    value={**entry.value, "quantity": quantity}
+                )
+                catalog_cache_stats.patches += 1
+            if listing is not None and sweet_id in listing.value.positions:
+                # Copy the list: responses already handed out keep theirs
+                sweets = list(listing.value.sweets)
+                i = listing.value.positions[sweet_id]
+                sweets[i] = {**sweets[i], "quantity": quantity}
+                self._entries[LIST_KEY] = listing._replace(
+                    value=listing.value._replace(sweets=sweets)
+                )
+                catalog_cache_stats.patches += 1
+
+    def _reset(self, version: int) -> None:
+        catalog_cache_stats.invalidations += len(self._entries)
+        self._entries.clear()
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# One cache per database engine
+_caches: Dict[AsyncEngine, CatalogCache] = {}
+
+
+def get_catalog_cache(engine: AsyncEngine) -> CatalogCache:
+    """Get the catalog cache for an engine, creating it on first use."""
+    cache = _caches.get(engine)
+    if cache is None:
+        cache = CatalogCache(settings.CATALOG_CACHE_SIZE, settings.CATALOG_CACHE_TTL_SECONDS)
+        _caches[engine] = cache
+    return cache
+
+
+async def _apply_catalog_change(
+    session: AsyncSession,
+    get_version: Callable[[], Awaitable[int]],
+    changes: Optional[Dict[str, Optional[int]]]
+) -> None:
+    cache = _caches.get(session.bind)
+    if cache is not None:
+        # Read after the commit: if it is exactly one past the cached
+        # version, no other write came in between and the patch is safe
+        cache.apply(await get_version(), changes)
+
+
+on_catalog_change(_apply_catalog_change)
@@ -0,0 +1,223 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.models.sweet import SweetCategory
+from app.repositories.sweet_repository import SweetRepository, on_catalog_change
+from app.schemas.sweet import CatalogFacets, CategoryFacet, PriceBucket, StockBucket
+
+settings = get_settings()
+
+CATEGORIES = list(SweetCategory)
+_CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+# Lower bounds of the stock bands: sold out, low, some, plenty
+STOCK_EDGES = np.array([0, 1, 10, 50])
+
+
+@dataclass
+class FacetStats:
+    """Counters describing how facet queries were answered."""
+    builds: int = 0
+    patches: int = 0
+    queries: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "builds": self.builds,
+            "patches": self.patches,
+            "queries": self.queries
+        }
+
+
+# Shared by every facet index in the process
+facet_stats = FacetStats()
+
+
+class CatalogColumns:
+    """
+    Columnar snapshot of the catalog as of ``version``.
+
+    Row i of the id, category code, price and stock arrays is one sweet.
+    Deleted sweets are masked out of ``present`` rather than removed,
+    and new ones appended, so positions stay valid until the next build.
+    """
+
+    def __init__(self, rows: Sequence[Tuple[str, SweetCategory, float, int]], version: int):
+        count = len(rows)
+        self.ids = np.array([row[0] for row in rows], dtype=object)
+        self.category = np.fromiter((_CATEGORY_CODES[row[1]] for row in rows), np.int8, count)
+        self.price = np.fromiter((row[2] for row in rows), np.float64, count)
+        self.quantity = np.fromiter((row[3] for row in rows), np.int64, count)
+        self.present = np.ones(count, dtype=bool)
+        self.positions: Dict[str, int] = {sweet_id: i for i, sweet_id in enumerate(self.ids)}
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def patch(
+        self,
+        quantities: Dict[str, int],
+        rows: Sequence[Tuple[str, SweetCategory, float, int]],
+        removed: Sequence[str]
+    ) -> None:
+        """Set new stock levels, replace or add re-read rows and mask out removed sweets."""
+        for sweet_id, quantity in quantities.items():
+            i = self.positions.get(sweet_id)
+            if i is not None:
+                self.quantity[i] = quantity
+
+        added = []
+        for row in rows:
+            i = self.positions.get(row[0])
+            if i is None:
+                added.append(row)
+            else:
+                self.category[i] = _CATEGORY_CODES[row[1]]
+                self.price[i] = row[2]
+                self.quantity[i] = row[3]
+                self.present[i] = True
+        if added:
+            start = len(self.ids)
+            new = CatalogColumns(added, self.version)
+            for name in ("ids", "category", "price", "quantity", "present"):
+                setattr(self, name, np.concatenate((getattr(self, name), getattr(new, name))))
+            self.positions.update((sweet_id, start + i) for sweet_id, i in new.positions.items())
+
+        for sweet_id in removed:
+            i = self.positions.get(sweet_id)
+            if i is not None:
+                self.present[i] = False
+        facet_stats.patches += 1
+
+    def facets(self, category: Optional[SweetCategory] = None, buckets: int = 10) -> CatalogFacets:
+        """
+        Count sweets by category, price band and stock band.
+
+        Category counts always cover the whole catalog; the rest covers
+        ``category`` only, when given. Price bands split the range of
+        matching prices into ``buckets`` equal widths. Every count is a
+        ``bincount`` over small integer keys, one pass per facet.
+        """
+        codes, prices, quantities = self.category, self.price, self.quantity
+        if not self.present.all():
+            codes, prices, quantities = (column[self.present] for column in (codes, prices, quantities))
+
+        # Column 0 counts sold-out sweets, column 1 those in stock
+        by_category = np.bincount(
+            codes * 2 + (quantities > 0), minlength=2 * len(CATEGORIES)
+        ).reshape(-1, 2)
+
+        if category is not None:
+            selected = codes == _CATEGORY_CODES[category]
+            prices, quantities = prices[selected], quantities[selected]
+
+        price_histogram: List[PriceBucket] = []
+        if prices.size:
+            low, high = float(prices.min()), float(prices.max())
+            if low == high:
+                low, high = low - 0.5, high + 0.5
+            edges = np.linspace(low, high, buckets + 1).tolist()
+            bands = ((prices - low) * (buckets / (high - low))).astype(np.intp)
+            np.minimum(bands, buckets - 1, out=bands)
+            heights = np.bincount(bands, minlength=buckets).tolist()
+            price_histogram = [
+                PriceBucket(min=round(edges[i], 2), max=round(edges[i + 1], 2), count=heights[i])
+                for i in range(buckets)
+            ]
+
+        # Sweets per stock level up to the top band's floor, summed into bands
+        levels = np.bincount(np.minimum(quantities, STOCK_EDGES[-1]), minlength=STOCK_EDGES[-1] + 1)
+        stock = np.add.reduceat(levels, STOCK_EDGES).tolist()
+        highs = STOCK_EDGES[1:].tolist() + [None]
+        facet_stats.queries += 1
+        return CatalogFacets(
+            total=int(prices.size),
+            in_stock=int(prices.size - stock[0]),
+            categories=[
+                CategoryFacet(category=each, count=out + stocked, in_stock=stocked)
+                for each, (out, stocked) in zip(CATEGORIES, by_category.tolist())
+            ],
+            price_histogram=price_histogram,
+            stock=[
+                StockBucket(min=low, max=high, count=count)
+                for low, high, count in zip(STOCK_EDGES.tolist(), highs, stock)
+            ]
+        )
+
+
+class FacetIndex:
+    """
+    The columnar snapshot of one engine's catalog, built on first use.
+
+    Committed writes from this worker patch it in place. Once it falls
+    behind the catalog version (another worker wrote, or a write could
+    not be patched) it is rebuilt, at most every
+    ``CATALOG_FACETS_REFRESH_SECONDS``.
+    """
+
+    def __init__(self):
+        self.columns: Optional[CatalogColumns] = None
+        self._lock = asyncio.Lock()
+
+    async def current(self, session: AsyncSession, version: int) -> CatalogColumns:
+        """Get a snapshot for catalog ``version``, rebuilding it if due."""
+        columns = self.columns
+        if columns is not None and (
+            columns.version >= version
+            or time.monotonic() - columns.built_at < settings.CATALOG_FACETS_REFRESH_SECONDS
+        ):
+            return columns
+
+        async with self._lock:
+            if self.columns is not columns:
+                # Rebuilt while we waited
+                return self.columns
+            rows = await SweetRepository(session).get_stock_columns()
+            self.columns = await asyncio.to_thread(CatalogColumns, rows, version)
+            facet_stats.builds += 1
+            return self.columns
+
+
+# One facet index per database engine
+_indexes: Dict[AsyncEngine, FacetIndex] = {}
+
+
+def get_facet_index(engine: AsyncEngine) -> FacetIndex:
+    """Get the facet index for an engine, creating it on first use."""
+    index = _indexes.get(engine)
+    if index is None:
+        index = FacetIndex()
+        _indexes[engine] = index
+    return index
+
+
+async def _apply_catalog_change(
+    session: AsyncSession,
+    get_version: Callable[[], Awaitable[int]],
+    changes: Optional[Dict[str, Optional[int]]]
+) -> None:
+    index = _indexes.get(session.bind)
+    columns = index.columns if index is not None else None
+    if columns is None or changes is None:
+        return
+    version = await get_version()
+    if version != columns.version + 1:
+        # Another write came in between; leave it to a rebuild
+        return
+
+    stale = [sweet_id for sweet_id, quantity in changes.items() if quantity is None]
+    rows = await SweetRepository(session).get_stock_columns(stale) if stale else []
+    found = {row[0] for row in rows}
+    columns.patch(
+        {sweet_id: quantity for sweet_id, quantity in changes.items() if quantity is not None},
+        rows,
+        [sweet_id for sweet_id in stale if sweet_id not in found]
+    )
+    columns.version = version
+
+
+on_catalog_change(_apply_catalog_change)
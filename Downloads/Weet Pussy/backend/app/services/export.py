@@ -0,0 +1,78 @@
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.repositories.order_repository import ORDER_FIELDS, OrderRepository
+from app.repositories.sweet_repository import SWEET_FIELDS, SweetRepository
+from app.utils.fast_json import dumps
+
+# Rows fetched from the database (and written out) per chunk
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+
+def _plain(value: Any) -> Any:
+    # The same text whichever JSON encoder, or CSV, writes it
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _ndjson(fields: Tuple[str, ...], rows: Sequence[Tuple]) -> bytes:
+    return b"".join(
+        dumps(dict(zip(fields, map(_plain, row)))) + b"\n" for row in rows
+    )
+
+
+def _csv(rows: Sequence[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([map(_plain, row) for row in rows])
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+    engine: AsyncEngine,
+    table: str,
+    export_format: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> AsyncIterator[bytes]:
+    """
+    Stream all sweets or orders as NDJSON or CSV (with a header row).
+
+    Each chunk holds at most EXPORT_BATCH_SIZE rows, so memory use is
+    the same for any table size. Chunks are read by id (keyset) in a
+    short session of their own that is closed before the chunk is sent:
+    on SQLite an open read transaction would block every writer for as
+    long as the slowest client takes to download.
+    """
+    fields = SWEET_FIELDS if table == "sweets" else ORDER_FIELDS
+    if export_format == "csv":
+        yield _csv([fields])
+
+    last_id = None if table == "sweets" else 0
+    while True:
+        async with AsyncSession(engine) as session:
+            if table == "sweets":
+                rows = await SweetRepository(session).get_rows_after(last_id, EXPORT_BATCH_SIZE)
+            else:
+                rows = await OrderRepository(session).get_rows_after(
+                    last_id, EXPORT_BATCH_SIZE, since, until
+                )
+        if not rows:
+            break
+        # id is the first column of both tables
+        last_id = rows[-1][0]
+        yield _ndjson(fields, rows) if export_format == "ndjson" else _csv(rows)
+        if len(rows) < EXPORT_BATCH_SIZE:
+            break
@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+settings = get_settings()
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+class IdempotencyKeyReuseError(Exception):
+    """Raised when an Idempotency-Key is sent again with a different request."""
+    pass
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """Raised when another worker is still processing a request with this key."""
+    pass
+
+
+class IdempotencyKeyOutcomeUnknownError(IdempotencyKeyInProgressError):
+    """Raised when a key's request was abandoned after it may have committed."""
+    pass
+
+
+@dataclass
+class IdempotencyStats:
+    """Counters describing how keyed requests were answered."""
+    executions: int = 0
+    cache_hits: int = 0
+    stored_hits: int = 0
+    inflight_waits: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "executions": self.executions,
+            "cache_hits": self.cache_hits,
+            "stored_hits": self.stored_hits,
+            "inflight_waits": self.inflight_waits
+        }
+
+
+# Shared by every idempotency cache in the process
+idempotency_stats = IdempotencyStats()
+
+
+class _CachedResponse(NamedTuple):
+    fingerprint: str
+    body: str
+    expires_at: float
+
+
+class IdempotencyCache:
+    """
+    Bounded LRU of completed keyed responses, plus the keyed requests
+    currently being processed by this worker.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, str], _CachedResponse]" = OrderedDict()
+        self.inflight: Dict[Tuple[int, str], Tuple[str, asyncio.Future]] = {}
+
+    def get(self, cache_key: Tuple[int, str]) -> Optional[_CachedResponse]:
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[cache_key]
+            return None
+        self._entries.move_to_end(cache_key)
+        return entry
+
+    def put(self, cache_key: Tuple[int, str], entry: _CachedResponse) -> None:
+        self._entries[cache_key] = entry
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# One cache per database engine
+_caches: Dict[AsyncEngine, IdempotencyCache] = {}
+
+
+def get_idempotency_cache(engine: AsyncEngine) -> IdempotencyCache:
+    """Get the idempotency cache for an engine, creating it on first use."""
+    cache = _caches.get(engine)
+    if cache is None:
+        cache = IdempotencyCache(settings.IDEMPOTENCY_CACHE_SIZE)
+        _caches[engine] = cache
+    return cache
+
+
+class IdempotencyService:
+    """
+    Run a request at most once per (user, Idempotency-Key).
+
+    The first successful response is stored in the idempotency_keys table
+    and kept in an in-process LRU; retries with the same key get that
+    response back without running the request again. A duplicate that
+    arrives while the first is still running waits for its result.
+    Failed requests release their key so the client can retry them, and
+    keys left in progress by a worker that died are claimable again
+    after IDEMPOTENCY_CLAIM_LEASE_SECONDS - unless the user has ordered
+    since, in which case the request may have gone through and is
+    refused rather than run twice.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.repo = IdempotencyRepository(session)
+        self.cache = get_idempotency_cache(session.bind)
+
+    async def execute(
+        self,
+        user_id: int,
+        key: str,
+        request: str,
+        response_model: Type[ResponseT],
+        operation: Callable[[], Awaitable[ResponseT]]
+    ) -> Tuple[ResponseT, bool]:
+        """
+        Run ``operation`` unless this key already has a response.
+
+        Args:
+            user_id: User sending the request; keys are scoped per user
+            key: Value of the Idempotency-Key header
+            request: Canonical description of the request (endpoint and
+                body), used to reject a key reused for something else
+            response_model: Model the stored response is parsed into
+            operation: Performs the request and returns its response
+
+        Returns:
+            The response and whether it was replayed
+
+        Raises:
+            IdempotencyKeyReuseError: If the key was used for another request
+            IdempotencyKeyInProgressError: If another worker holds the key
+            IdempotencyKeyOutcomeUnknownError: If the key was abandoned
+                and the request may already have gone through
+        """
+        fingerprint = hashlib.sha256(request.encode()).hexdigest()
+        cache_key = (user_id, key)
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self._check_fingerprint(cached.fingerprint, fingerprint)
+            idempotency_stats.cache_hits += 1
+            return response_model.model_validate_json(cached.body), True
+
+        inflight = self.cache.inflight.get(cache_key)
+        if inflight is not None:
+            self._check_fingerprint(inflight[0], fingerprint)
+            idempotency_stats.inflight_waits += 1
+            body = await asyncio.shield(inflight[1])
+            return response_model.model_validate_json(body), True
+
+        future = asyncio.get_running_loop().create_future()
+        self.cache.inflight[cache_key] = (fingerprint, future)
+        try:
+            result, body, replayed = await self._claim_and_run(
+                user_id, key, fingerprint, response_model, operation
+            )
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved; nobody may be waiting on it
+            future.exception()
+            raise
+        finally:
+            del self.cache.inflight[cache_key]
+
+        future.set_result(body)
+        return result, replayed
+
+    async def _claim_and_run(
+        self,
+        user_id: int,
+        key: str,
+        fingerprint: str,
+        response_model: Type[ResponseT],
+        operation: Callable[[], Awaitable[ResponseT]]
+    ) -> Tuple[ResponseT, str, bool]:
+        ttl = settings.IDEMPOTENCY_KEY_TTL_SECONDS
+        lease = settings.IDEMPOTENCY_CLAIM_LEASE_SECONDS
+        existing = await self.repo.claim(user_id, key, fingerprint, ttl, lease)
+
+        if existing is not None:
+            self._check_fingerprint(existing.fingerprint, fingerprint)
+            if existing.response_body is None:
+                if existing.createdAt <= datetime.utcnow() - timedelta(seconds=lease):
+                    raise IdempotencyKeyOutcomeUnknownError(
+                        "The request with this Idempotency-Key was interrupted and may "
+                        "have completed; check your orders before retrying with a new key"
+                    )
+                raise IdempotencyKeyInProgressError(
+                    "A request with this Idempotency-Key is still being processed"
+                )
+            idempotency_stats.stored_hits += 1
+            body = existing.response_body
+            ttl = (existing.expires_at - datetime.utcnow()).total_seconds()
+            result, replayed = response_model.model_validate_json(body), True
+        else:
+            try:
+                result = await operation()
+            except BaseException:
+                # Discard whatever the failed request left behind first
+                await self.session.rollback()
+                await self.repo.release(user_id, key)
+                raise
+            idempotency_stats.executions += 1
+            body = result.model_dump_json()
+            await self.repo.complete(user_id, key, body)
+            replayed = False
+
+        self.cache.put(
+            (user_id, key),
+            _CachedResponse(fingerprint, body, time.monotonic() + ttl)
+        )
+        return result, body, replayed
+
+    @staticmethod
+    def _check_fingerprint(stored: str, fingerprint: str) -> None:
+        if stored != fingerprint:
+            raise IdempotencyKeyReuseError(
+                "Idempotency-Key was already used for a different request"
+            )
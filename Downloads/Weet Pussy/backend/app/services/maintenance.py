@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+from app.config import get_settings
+from app.database import async_session
+from app.repositories.sweet_repository import SweetRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.session_repository import SessionRepository
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+from app.security.revocation import load_revocations
+from app.services.suggest_index import load_suggest_index
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_tasks: List[asyncio.Task] = []
+
+
+async def _run_periodically(
+    name: str,
+    interval_seconds: float,
+    job: Callable[[], Awaitable[None]]
+) -> None:
+    """Run a maintenance job forever, logging (not raising) its failures."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background job %s failed", name)
+
+
+async def reconcile_stock_shards() -> None:
+    """Refresh cached sweets.quantity values from their stock shards."""
+    async with async_session() as session:
+        await SweetRepository(session).reconcile_stock_shards()
+
+
+async def expire_stock_holds() -> None:
+    """Return the stock of expired cart holds, one batch at a time."""
+    batch_size = settings.STOCK_HOLD_SWEEP_BATCH
+    while True:
+        async with async_session() as session:
+            expired = await SweetRepository(session).expire_holds(batch_size)
+        if expired < batch_size:
+            break
+
+
+async def prune_idempotency_keys() -> None:
+    """Delete expired Idempotency-Key records, one batch at a time."""
+    batch_size = settings.IDEMPOTENCY_PRUNE_BATCH
+    while True:
+        async with async_session() as session:
+            pruned = await IdempotencyRepository(session).prune_expired(batch_size)
+        if pruned < batch_size:
+            break
+
+
+async def prune_sessions() -> None:
+    """Delete expired refresh-token sessions, one batch at a time."""
+    batch_size = settings.SESSION_PRUNE_BATCH
+    while True:
+        async with async_session() as session:
+            pruned = await SessionRepository(session).prune_expired(batch_size)
+        if pruned < batch_size:
+            break
+
+
+async def compact_revoked_tokens() -> None:
+    """Delete revocations of tokens that have expired anyway, then rebuild the Bloom filter."""
+    batch_size = settings.TOKEN_REVOCATION_COMPACT_BATCH
+    while True:
+        async with async_session() as session:
+            pruned = await RevokedTokenRepository(session).prune_expired(batch_size)
+        if pruned < batch_size:
+            break
+    async with async_session() as session:
+        await load_revocations(session)
+
+
+async def refresh_suggest_index() -> None:
+    """Rebuild the name suggestion index with current popularity."""
+    async with async_session() as session:
+        await load_suggest_index(session)
+
+
+async def prune_stock_changes() -> None:
+    """Trim the stock change log followed by the stock event stream."""
+    async with async_session() as session:
+        await SweetRepository(session).prune_stock_changes(settings.STOCK_CHANGES_KEEP)
+
+
+def start_background_jobs() -> None:
+    """Start the periodic maintenance jobs (application startup)."""
+    jobs = [
+        ("reconcile_stock_shards", settings.STOCK_SHARD_RECONCILE_INTERVAL_SECONDS, reconcile_stock_shards),
+        ("expire_stock_holds", settings.STOCK_HOLD_SWEEP_INTERVAL_SECONDS, expire_stock_holds),
+        ("prune_idempotency_keys", settings.IDEMPOTENCY_PRUNE_INTERVAL_SECONDS, prune_idempotency_keys),
+        ("prune_sessions", settings.SESSION_PRUNE_INTERVAL_SECONDS, prune_sessions),
+        ("compact_revoked_tokens", settings.TOKEN_REVOCATION_COMPACT_INTERVAL_SECONDS, compact_revoked_tokens),
+        ("refresh_suggest_index", settings.SUGGEST_INDEX_REFRESH_INTERVAL_SECONDS, refresh_suggest_index),
+        ("prune_stock_changes", settings.STOCK_CHANGES_PRUNE_INTERVAL_SECONDS, prune_stock_changes),
+    ]
+    for name, interval, job in jobs:
+        _tasks.append(asyncio.create_task(_run_periodically(name, interval, job), name=name))
+
+
+async def stop_background_jobs() -> None:
+    """Cancel the periodic maintenance jobs (application shutdown)."""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.repositories.sweet_repository import SweetRepository
+from app.schemas.sweet import SweetResponse, PurchaseResponse
+
+settings = get_settings()
+
+
+@dataclass
+class CoalescerStats:
+    """Counters describing how purchases are being grouped."""
+    batches: int = 0
+    purchases: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+    def record(self, batch_size: int, waits_ms: List[float]) -> None:
+        self.batches += 1
+        self.purchases += batch_size
+        self.last_batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_wait_ms += sum(waits_ms)
+        self.max_wait_ms = max(self.max_wait_ms, max(waits_ms))
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "purchases": self.purchases,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": self.purchases / self.batches if self.batches else 0.0,
+            "avg_wait_ms": self.total_wait_ms / self.purchases if self.purchases else 0.0,
+            "max_wait_ms": self.max_wait_ms
+        }
+
+
+# Shared by every coalescer in the process
+coalescer_stats = CoalescerStats()
+
+
+@dataclass
+class _PendingPurchase:
+    sweet_id: str
+    quantity: int
+    user_id: Optional[int]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class PurchaseCoalescer:
+    """
+    Group concurrent purchases into a single write transaction.
+
+    Purchases are collected for a short window (or until the batch is
+    full) and applied together, so a flash sale pays one write lock and
+    one commit per batch instead of one per request. Each caller still
+    gets its own success or insufficient-stock outcome, decided in
+    arrival order.
+    """
+
+    def __init__(self, engine: AsyncEngine, window_ms: float, max_batch: int):
+        self.session_factory = async_sessionmaker(
+            engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[_PendingPurchase] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._flushes: set = set()
+
+    async def submit(
+        self,
+        sweet_id: str,
+        quantity: int = 1,
+        user_id: Optional[int] = None
+    ) -> PurchaseResponse:
+        """
+        Queue a purchase for the next batch and wait for its outcome.
+
+        Raises:
+            SweetNotFoundError: If the sweet doesn't exist
+            InsufficientStockError: If there's not enough stock left for
+                this purchase once earlier arrivals are served
+        """
+        loop = asyncio.get_running_loop()
+        pending = _PendingPurchase(sweet_id, quantity, user_id, loop.create_future())
+        self._pending.append(pending)
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+
+        return await pending.future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[_PendingPurchase]) -> None:
+        # Batches are applied one at a time so they never contend with
+        # each other for the write lock, and earlier arrivals go first.
+        async with self._flush_lock:
+            try:
+                async with self.session_factory() as session:
+                    outcomes = await SweetRepository(session).apply_purchase_batch(
+                        [(p.sweet_id, p.quantity, p.user_id) for p in batch]
+                    )
+            except Exception as e:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                return
+
+        now = time.perf_counter()
+        coalescer_stats.record(
+            len(batch),
+            [(now - pending.enqueued_at) * 1000 for pending in batch]
+        )
+
+        for pending, outcome in zip(batch, outcomes):
+            if pending.future.done():
+                continue
+            if isinstance(outcome, Exception):
+                pending.future.set_exception(outcome)
+            else:
+                pending.future.set_result(PurchaseResponse(
+                    success=True,
+                    message=f"Successfully purchased {pending.quantity} x {outcome['name']}",
+                    sweet=SweetResponse.model_validate(outcome),
+                    quantity_purchased=pending.quantity
+                ))
+
+    async def close(self) -> None:
+        """Flush anything still waiting and wait for in-flight batches."""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+# One coalescer per database engine
+_coalescers: Dict[AsyncEngine, PurchaseCoalescer] = {}
+
+
+def get_purchase_coalescer(engine: AsyncEngine) -> PurchaseCoalescer:
+    """Get the purchase coalescer for an engine, creating it on first use."""
+    coalescer = _coalescers.get(engine)
+    if coalescer is None:
+        coalescer = PurchaseCoalescer(
+            engine,
+            window_ms=settings.PURCHASE_COALESCE_WINDOW_MS,
+            max_batch=settings.PURCHASE_COALESCE_MAX_BATCH
+        )
+        _coalescers[engine] = coalescer
+    return coalescer
+
+
+async def close_purchase_coalescers() -> None:
+    """Drain and forget every coalescer (application shutdown)."""
+    coalescers = list(_coalescers.values())
+    _coalescers.clear()
+    for coalescer in coalescers:
+        await coalescer.close()
@@ -0,0 +1,189 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class PurchaseQueueFullError(Exception):
+    """Raised when the purchase queue is at its maximum depth."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class QueueStats:
+    """Counters describing purchase queue admission and waiting."""
+    accepted: int = 0
+    shed: int = 0
+    completed: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+    total_service_ms: float = 0.0
+
+    def record(self, wait_ms: float, service_ms: float) -> None:
+        self.completed += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.total_service_ms += service_ms
+
+    @property
+    def avg_service_ms(self) -> float:
+        return self.total_service_ms / self.completed if self.completed else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "shed": self.shed,
+            "completed": self.completed,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "avg_wait_ms": self.total_wait_ms / self.completed if self.completed else 0.0,
+            "max_wait_ms": self.max_wait_ms,
+            "avg_service_ms": self.avg_service_ms
+        }
+
+
+# Shared by every purchase queue in the process
+queue_stats = QueueStats()
+
+
+@dataclass
+class _QueuedPurchase:
+    operation: Callable[[AsyncSession], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class PurchaseQueue:
+    """
+    Bounded work queue in front of the purchase path.
+
+    A fixed number of writer tasks take purchases off the queue, each in
+    its own session, so no more than ``workers`` purchases wait on the
+    database write lock at once. When ``max_depth`` purchases are already
+    waiting, new ones are refused straight away instead of queueing
+    behind a backlog they would time out in.
+    """
+
+    def __init__(self, engine: AsyncEngine, workers: int, max_depth: int):
+        self.session_factory = async_sessionmaker(
+            engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_depth))
+        self._tasks: List[asyncio.Task] = []
+
+    async def submit(self, operation: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        """
+        Queue a purchase and wait for its result.
+
+        Args:
+            operation: Performs the purchase with the session it is given
+
+        Raises:
+            PurchaseQueueFullError: If the queue is full; carries a
+                Retry-After estimate in seconds
+        """
+        if not self._tasks:
+            self._start_workers()
+
+        job = _QueuedPurchase(operation, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            queue_stats.shed += 1
+            raise PurchaseQueueFullError(
+                "Too many purchases in progress, please retry shortly",
+                self.retry_after()
+            )
+
+        queue_stats.accepted += 1
+        queue_stats.depth = self._queue.qsize()
+        queue_stats.max_depth = max(queue_stats.max_depth, queue_stats.depth)
+        return await job.future
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog_ms = self._queue.qsize() * queue_stats.avg_service_ms / self.workers
+        return max(1, math.ceil(backlog_ms / 1000))
+
+    def _start_workers(self) -> None:
+        self._tasks = [
+            asyncio.ensure_future(self._work())
+            for _ in range(self.workers)
+        ]
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            queue_stats.depth = self._queue.qsize()
+            try:
+                # The caller gave up (e.g. the client disconnected)
+                if job.future.cancelled():
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    async with self.session_factory() as session:
+                        result = await job.operation(session)
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+                finished = time.perf_counter()
+
+                queue_stats.record(
+                    (started - job.enqueued_at) * 1000,
+                    (finished - started) * 1000
+                )
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        """Finish the queued purchases and stop the writer tasks."""
+        if self._tasks:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# One purchase queue per database engine
+_queues: Dict[AsyncEngine, PurchaseQueue] = {}
+
+
+def get_purchase_queue(engine: AsyncEngine) -> PurchaseQueue:
+    """Get the purchase queue for an engine, creating it on first use."""
+    queue = _queues.get(engine)
+    if queue is None:
+        queue = PurchaseQueue(
+            engine,
+            workers=settings.PURCHASE_QUEUE_WORKERS,
+            max_depth=settings.PURCHASE_QUEUE_MAX_DEPTH
+        )
+        _queues[engine] = queue
+    return queue
+
+
+async def close_purchase_queues() -> None:
+    """Drain and forget every purchase queue (application shutdown)."""
+    queues = list(_queues.values())
+    _queues.clear()
+    for queue in queues:
+        await queue.close()
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.utils.fast_json import ENCODER, dumps
+
+settings = get_settings()
+
+
+@dataclass
+class ResponseCacheStats:
+    """Counters describing how encoded catalog responses were served."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    resets: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "encoder": ENCODER,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resets": self.resets
+        }
+
+
+# Shared by every response cache in the process
+response_cache_stats = ResponseCacheStats()
+
+
+class ResponseCache:
+    """
+    Ready-to-send JSON bodies of catalog reads, for one catalog version.
+
+    Bodies are stored under the catalog version they were rendered at.
+    Every write to sweets or their stock bumps that version (by trigger),
+    so the first lookup at a newer version drops everything; there is
+    nothing to patch and no TTL. Bodies for an older version than the
+    cache's are never stored.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.version: Optional[int] = None
+        self._bodies: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def _at(self, version: int) -> bool:
+        # Move to a newer version; False if ``version`` is an old one
+        if self.version is None or version > self.version:
+            if self._bodies:
+                response_cache_stats.resets += 1
+            self._bodies.clear()
+            self.version = version
+        return version == self.version
+
+    def get(self, version: int, key: Hashable) -> Optional[bytes]:
+        body = self._bodies.get(key) if self._at(version) else None
+        if body is None:
+            response_cache_stats.misses += 1
+            return None
+        self._bodies.move_to_end(key)
+        response_cache_stats.hits += 1
+        return body
+
+    def put(self, version: int, key: Hashable, body: bytes) -> None:
+        if self.max_size <= 0 or not self._at(version):
+            return
+        self._bodies[key] = body
+        self._bodies.move_to_end(key)
+        while len(self._bodies) > self.max_size:
+            self._bodies.popitem(last=False)
+            response_cache_stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+
+def render(adapter: TypeAdapter, value: Any) -> bytes:
+    """Validate ``value`` as ``adapter``'s type once and encode it, as a response_model would."""
+    return dumps(adapter.dump_python(adapter.validate_python(value), mode="json"))
+
+
+# One cache per database engine
+_caches: Dict[AsyncEngine, ResponseCache] = {}
+
+
+def get_response_cache(engine: AsyncEngine) -> ResponseCache:
+    """Get the response cache for an engine, creating it on first use."""
+    cache = _caches.get(engine)
+    if cache is None:
+        cache = ResponseCache(settings.CATALOG_CACHE_SIZE)
+        _caches[engine] = cache
+    return cache
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.repositories.sweet_repository import SweetRepository, on_catalog_change
+from app.utils.fast_json import dumps
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Logged changes read per poll (more are read straight away)
+POLL_BATCH = 1000
+
+# Stock of a sweet, or None once it has been deleted
+StockDeltas = Dict[str, Optional[int]]
+
+
+@dataclass
+class StockEventStats:
+    """Counters describing the stock event stream."""
+    subscribers: int = 0
+    published: int = 0
+    superseded: int = 0
+    resyncs: int = 0
+    polls: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "superseded": self.superseded,
+            "resyncs": self.resyncs,
+            "polls": self.polls
+        }
+
+
+# Shared by every broadcaster in the process
+stock_event_stats = StockEventStats()
+
+
+class StockSubscription:
+    """
+    One client's unsent stock deltas: the latest stock of each sweet.
+
+    A newer delta for a sweet replaces one not yet sent, so a slow client
+    gets current stock rather than a backlog. If more than ``max_pending``
+    sweets are waiting, they are dropped and the client is told to resync
+    (fetch the catalog again) instead.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.resync = False
+        self.closed = False
+        self._pending: StockDeltas = {}
+        self._ready = asyncio.Event()
+
+    def push(self, deltas: StockDeltas) -> None:
+        if self.resync:
+            # A resync covers anything that happens before it is sent
+            return
+        waiting = len(self._pending)
+        self._pending.update(deltas)
+        stock_event_stats.superseded += waiting + len(deltas) - len(self._pending)
+        if len(self._pending) > self.max_pending:
+            self.push_resync()
+        self._ready.set()
+
+    def push_resync(self) -> None:
+        self._pending.clear()
+        self.resync = True
+        stock_event_stats.resyncs += 1
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def next(self) -> Tuple[bool, StockDeltas]:
+        """Wait for news; return whether to resync, and the deltas to send."""
+        await self._ready.wait()
+        self._ready.clear()
+        resync, self.resync = self.resync, False
+        deltas, self._pending = self._pending, {}
+        return resync, deltas
+
+
+class StockBroadcaster:
+    """
+    Fans stock deltas out to this worker's stream subscribers.
+
+    Writes made by this worker are published as soon as they commit (see
+    ``on_catalog_change``). Writes made by any worker are also read back
+    from the stock change log every ``poll_interval`` seconds, for as
+    long as anyone is subscribed; this worker's own writes come round a
+    second time that way, which is harmless as deltas carry the current
+    stock rather than a difference.
+    """
+
+    def __init__(self, engine: AsyncEngine, poll_interval: float, max_pending: int):
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.last_seq: Optional[int] = None
+        self._subscribers: Set[StockSubscription] = set()
+        self._poller: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> StockSubscription:
+        subscription = StockSubscription(self.max_pending)
+        self._subscribers.add(subscription)
+        stock_event_stats.subscribers += 1
+        if self.poll_interval > 0 and (self._poller is None or self._poller.done()):
+            self._poller = asyncio.create_task(self._poll_while_subscribed())
+        return subscription
+
+    def unsubscribe(self, subscription: StockSubscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+            stock_event_stats.subscribers -= 1
+
+    def publish(self, deltas: StockDeltas) -> None:
+        if not deltas or not self._subscribers:
+            return
+        for subscription in self._subscribers:
+            subscription.push(deltas)
+        stock_event_stats.published += len(deltas)
+
+    async def poll(self) -> int:
+        """
+        Publish the stock of sweets logged as changed since the last poll.
+
+        The first poll only notes where the log ends. Returns the number of
+        logged changes read.
+        """
+        stock_event_stats.polls += 1
+        async with AsyncSession(self.engine) as session:
+            repository = SweetRepository(session)
+            if self.last_seq is None:
+                self.last_seq = await repository.get_last_stock_change()
+                return 0
+            changes = await repository.get_stock_changes(self.last_seq, POLL_BATCH)
+            if not changes:
+                return 0
+            sweet_ids = list(dict.fromkeys(sweet_id for _, sweet_id in changes))
+            quantities = await repository.get_live_quantities(sweet_ids)
+
+        if changes[0][0] > self.last_seq + 1:
+            # Pruned before this worker read them: the changes are unknown
+            for subscription in self._subscribers:
+                subscription.push_resync()
+        self.last_seq = changes[-1][0]
+        self.publish({sweet_id: quantities.get(sweet_id) for sweet_id in sweet_ids})
+        return len(changes)
+
+    async def _poll_while_subscribed(self) -> None:
+        # Changes from before anyone subscribed are of no interest
+        self.last_seq = None
+        while self._subscribers:
+            try:
+                caught_up = await self.poll() < POLL_BATCH
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Polling stock changes failed")
+                caught_up = True
+            if caught_up:
+                await asyncio.sleep(self.poll_interval)
+
+    async def close(self) -> None:
+        """Stop polling and end every subscriber's stream."""
+        for subscription in list(self._subscribers):
+            subscription.close()
+            self.unsubscribe(subscription)
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+
+
+async def stock_event_stream(broadcaster: StockBroadcaster) -> AsyncIterator[bytes]:
+    """
+    Server-sent events of one subscriber, until it disconnects.
+
+    ``stock`` events carry a JSON list of ``{"id", "quantity"}`` deltas
+    (quantity null for a deleted sweet); a ``resync`` event means deltas
+    were lost and the catalog should be fetched again. Comments keep idle
+    connections open through proxies.
+    """
+    subscription = broadcaster.subscribe()
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                resync, deltas = await asyncio.wait_for(
+                    subscription.next(), settings.STOCK_EVENTS_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if subscription.closed:
+                return
+            if resync:
+                yield b"event: resync\ndata: {}\n\n"
+            if deltas:
+                payload = [{"id": sweet_id, "quantity": quantity} for sweet_id, quantity in deltas.items()]
+                yield b"event: stock\ndata: " + dumps(payload) + b"\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+# One broadcaster per database engine
+_broadcasters: Dict[AsyncEngine, StockBroadcaster] = {}
+
+
+def get_stock_broadcaster(engine: AsyncEngine) -> StockBroadcaster:
+    """Get the stock broadcaster for an engine, creating it on first use."""
+    broadcaster = _broadcasters.get(engine)
+    if broadcaster is None:
+        broadcaster = StockBroadcaster(
+            engine,
+            settings.STOCK_EVENTS_POLL_INTERVAL_SECONDS,
+            settings.STOCK_EVENTS_MAX_PENDING
+        )
+        _broadcasters[engine] = broadcaster
+    return broadcaster
+
+
+async def close_stock_broadcasters() -> None:
+    """Stop every broadcaster and end open streams (application shutdown)."""
+    broadcasters = list(_broadcasters.values())
+    _broadcasters.clear()
+    for broadcaster in broadcasters:
+        await broadcaster.close()
+
+
+async def _publish_catalog_change(
+    session: AsyncSession,
+    get_version: Callable[[], Awaitable[int]],
+    changes: Optional[Dict[str, Optional[int]]]
+) -> None:
+    broadcaster = _broadcasters.get(session.bind)
+    if broadcaster is None or not len(broadcaster) or not changes:
+        # Writes to any number of sweets are left to the poller
+        return
+    deltas = dict(changes)
+    unknown = [sweet_id for sweet_id, quantity in changes.items() if quantity is None]
+    if unknown:
+        # More than stock changed (or the sweet is new or deleted)
+        deltas.update(await SweetRepository(session).get_live_quantities(unknown))
+    broadcaster.publish(deltas)
+
+
+on_catalog_change(_publish_catalog_change)
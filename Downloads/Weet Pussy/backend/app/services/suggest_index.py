@@ -0,0 +1,181 @@
+import asyncio
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.repositories.sweet_repository import SweetRepository, on_name_change
+
+# Most suggestions a request can ask for
+MAX_SUGGESTIONS = 20
+# Prefixes matching more names than this have their ranking memoized
+SCAN_LIMIT = 256
+# Sorts after any character a name can contain
+_PREFIX_END = "\U0010ffff"
+
+
+@dataclass
+class SuggestStats:
+    """Counters describing how name suggestions were answered."""
+    lookups: int = 0
+    memo_hits: int = 0
+    memo_builds: int = 0
+    updates: int = 0
+    rebuilds: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "memo_hits": self.memo_hits,
+            "memo_builds": self.memo_builds,
+            "updates": self.updates,
+            "rebuilds": self.rebuilds
+        }
+
+
+# Shared by every suggest index in the process
+suggest_stats = SuggestStats()
+
+
+class SuggestIndex:
+    """
+    Sweet names sorted by their casefolded form, for prefix lookups.
+
+    A prefix's matches are the slice between two bisections of ``_keys``
+    (with ``_ids`` and ``_names`` kept parallel). They are ranked by
+    units sold, then alphabetically. Scoring a long slice costs time in
+    proportion to its length, so the top of any slice longer than
+    ``SCAN_LIMIT`` is kept in ``_top`` until a name under that prefix
+    changes or popularity is reloaded.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[Tuple[str, str]] = (),
+        popularity: Optional[Dict[str, int]] = None
+    ):
+        entries = sorted((name.casefold(), sweet_id, name) for sweet_id, name in names)
+        self._keys: List[str] = [key for key, _, _ in entries]
+        self._ids: List[str] = [sweet_id for _, sweet_id, _ in entries]
+        self._names: List[str] = [name for _, _, name in entries]
+        # The key each id is filed under, to find it again on change
+        self._key_of: Dict[str, str] = dict(zip(self._ids, self._keys))
+        self.popularity: Dict[str, int] = popularity or {}
+        self._top: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _range(self, key: str) -> Tuple[int, int]:
+        start = bisect_left(self._keys, key)
+        return start, bisect_left(self._keys, key + _PREFIX_END, start)
+
+    def _rank(self, start: int, end: int, limit: int) -> List[int]:
+        popularity = self.popularity
+        ids = self._ids
+        # Positions break ties, which keeps equally popular names in order
+        return heapq.nsmallest(
+            limit, range(start, end),
+            key=lambda i: (-popularity.get(ids[i], 0), i)
+        )
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Get up to ``limit`` (id, name) pairs starting with ``prefix``, most popular first."""
+        suggest_stats.lookups += 1
+        key = prefix.casefold()
+        start, end = self._range(key)
+        if end - start <= SCAN_LIMIT:
+            positions = self._rank(start, end, limit)
+            return [(self._ids[i], self._names[i]) for i in positions]
+
+        top = self._top.get(key)
+        if top is None:
+            suggest_stats.memo_builds += 1
+            top = [self._ids[i] for i in self._rank(start, end, MAX_SUGGESTIONS)]
+            self._top[key] = top
+        else:
+            suggest_stats.memo_hits += 1
+        return [(sweet_id, self._name_of(sweet_id)) for sweet_id in top[:limit]]
+
+    def _name_of(self, sweet_id: str) -> str:
+        key = self._key_of[sweet_id]
+        i = bisect_left(self._keys, key)
+        while self._ids[i] != sweet_id:
+            i += 1
+        return self._names[i]
+
+    def apply(self, names: Dict[str, Optional[str]]) -> None:
+        """Add, rename or remove sweets (a ``None`` name removes one)."""
+        for sweet_id, name in names.items():
+            old_key = self._key_of.pop(sweet_id, None)
+            if old_key is not None:
+                i = bisect_left(self._keys, old_key)
+                while self._ids[i] != sweet_id:
+                    i += 1
+                del self._keys[i], self._ids[i], self._names[i]
+                self._forget(old_key)
+            if name is not None:
+                key = name.casefold()
+                i = bisect_left(self._keys, key)
+                while i < len(self._keys) and self._keys[i] == key and self._ids[i] < sweet_id:
+                    i += 1
+                self._keys.insert(i, key)
+                self._ids.insert(i, sweet_id)
+                self._names.insert(i, name)
+                self._key_of[sweet_id] = key
+                self._forget(key)
+            suggest_stats.updates += 1
+
+    def _forget(self, key: str) -> None:
+        # Drop the memoized rankings of every prefix of a changed name
+        if self._top:
+            for length in range(1, len(key) + 1):
+                self._top.pop(key[:length], None)
+
+
+# One index per database engine, built by load_suggest_index
+_indexes: Dict[AsyncEngine, SuggestIndex] = {}
+# Name changes committed while an engine's index is being rebuilt
+_pending: Dict[AsyncEngine, List[Dict[str, Optional[str]]]] = {}
+
+
+def get_suggest_index(engine: AsyncEngine) -> Optional[SuggestIndex]:
+    """Get the suggest index of an engine, if it has been built."""
+    return _indexes.get(engine)
+
+
+async def load_suggest_index(session: AsyncSession) -> SuggestIndex:
+    """
+    (Re)build the suggest index of the session's engine from the database.
+
+    Sorting is done in a worker thread so a large catalog does not stall
+    the event loop. Names changed meanwhile are replayed onto the new
+    index before it replaces the old one.
+    """
+    engine = session.bind
+    pending = _pending.setdefault(engine, [])
+    try:
+        repo = SweetRepository(session)
+        names = await repo.get_names()
+        popularity = await repo.get_units_sold()
+        index = await asyncio.to_thread(SuggestIndex, names, popularity)
+        for changed in pending:
+            index.apply(changed)
+    finally:
+        _pending.pop(engine, None)
+    _indexes[engine] = index
+    suggest_stats.rebuilds += 1
+    return index
+
+
+def _apply_name_change(engine, names: Dict[str, Optional[str]]) -> None:
+    index = _indexes.get(engine)
+    if index is not None:
+        index.apply(names)
+    if engine in _pending:
+        _pending[engine].append(names)
+
+
+on_name_change(_apply_name_change)
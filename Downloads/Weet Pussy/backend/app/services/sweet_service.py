@@ -1,14 +1,33 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.repositories.sweet_repository import (
     SweetRepository, 
+    SweetRow,
     InsufficientStockError, 
     SweetNotFoundError
 )
 from app.models.sweet import Sweet, SweetCategory
-from app.models.order import Order, OrderStatus
-from app.schemas.sweet import SweetCreate, SweetUpdate, SweetResponse, PurchaseResponse
+from app.schemas.sweet import (
+    SweetCreate, SweetUpdate, SweetResponse, SweetSuggestion, CatalogFacets, PurchaseResponse,
+    CheckoutItem, CheckoutLine, CheckoutResponse, HoldResponse,
+    BulkRestock, BulkReprice, BulkOperation, BulkResponse
+)
+from app.services.catalog_cache import get_catalog_cache
+from app.services.catalog_facets import get_facet_index
+from app.services.suggest_index import get_suggest_index, load_suggest_index
+from app.services.purchase_coalescer import get_purchase_coalescer
+from app.services.purchase_queue import get_purchase_queue
+from app.services.response_cache import get_response_cache, render
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.fast_json import dumps
+
+settings = get_settings()
+
+SWEET_LIST = TypeAdapter(List[SweetResponse])
+SWEET = TypeAdapter(SweetResponse)
 
 
 class SweetService:
@@ -17,14 +36,178 @@ class SweetService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.sweet_repo = SweetRepository(session)
+        self.catalog_cache = get_catalog_cache(session.bind)
+        self.response_cache = get_response_cache(session.bind)
+    
+    async def get_catalog_version(self) -> int:
+        """Get the catalog's change counter, which versions every catalog read."""
+        version = await self.sweet_repo.get_catalog_version()
+        self.catalog_cache.observe(version)
+        return version
+    
+    async def get_all_sweets(self, version: Optional[int] = None) -> List[SweetRow]:
+        """
+        Get all available sweets, from the catalog cache when fresh.
+        
+        Sweets are read-only rows, validated (once) by the route's
+        response model. ``version`` is the catalog version already read
+        by the caller.
+        """
+        if version is None:
+            version = await self.get_catalog_version()
+        sweets = self.catalog_cache.get_listing()
+        if sweets is None:
+            sweets = await self.sweet_repo.get_all()
+            self.catalog_cache.put_listing(sweets, version)
+        return sweets
+    
+    async def get_all_sweets_json(self, version: int) -> bytes:
+        """Get the full listing as a JSON body, encoded once per catalog version."""
+        body = self.response_cache.get(version, ("list",))
+        if body is None:
+            body = render(SWEET_LIST, await self.get_all_sweets(version))
+            self.response_cache.put(version, ("list",), body)
+        return body
+    
+    async def list_sweets(
+        self,
+        category: Optional[SweetCategory] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        sort: str = "name",
+        order: str = "asc",
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        version: Optional[int] = None
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Get a filtered, sorted page of sweets and the cursor of the next.
+        
+        Without filters, cursor or limit this is the (cached) full listing.
+        
+        Returns:
+            The page as a JSON body, and the next page's cursor or None
+        
+        Raises:
+            InvalidCursorError: If the cursor is malformed or was made for
+                a different sort order
+        """
+        if (
+            (category, min_price, max_price, in_stock, cursor, limit) == (None,) * 6
+            and (sort, order) == ("name", "asc")
+        ):
+            if version is None:
+                version = await self.get_catalog_version()
+            return await self.get_all_sweets_json(version), None
+        
+        ordering = f"{sort}:{order}"
+        rows, position = await self.sweet_repo.get_page(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort=sort,
+            descending=order == "desc",
+            after=decode_cursor(cursor, ordering) if cursor else None,
+            limit=limit
+        )
+        next_cursor = encode_cursor(ordering, position) if position else None
+        return render(SWEET_LIST, rows), next_cursor
     
-    async def get_all_sweets(self) -> List[Sweet]:
-        """Get all available sweets."""
-        return await self.sweet_repo.get_all()
+    async def search_sweets(self, query: str, limit: int = 20) -> List[SweetRow]:
+        """Full-text search over sweet names and categories, best matches first."""
+        return await self.sweet_repo.search(query, limit)
+    
+    async def get_facets(
+        self,
+        category: Optional[SweetCategory] = None,
+        buckets: int = 10,
+        version: Optional[int] = None
+    ) -> Tuple[CatalogFacets, int]:
+        """
+        Count sweets by category, price and stock from the columnar snapshot.
+        
+        ``version`` is the catalog version already read by the caller.
+        
+        Returns:
+            The facets and the catalog version they were counted at
+        """
+        if version is None:
+            version = await self.get_catalog_version()
+        columns = await get_facet_index(self.session.bind).current(self.session, version)
+        return columns.facets(category, buckets), columns.version
     
-    async def get_sweet(self, sweet_id: str) -> Optional[Sweet]:
-        """Get a single sweet by ID."""
-        return await self.sweet_repo.get_by_id(sweet_id)
+    async def get_facets_json(
+        self,
+        category: Optional[SweetCategory],
+        buckets: int,
+        version: int
+    ) -> Tuple[bytes, int]:
+        """
+        Get catalog facets as a JSON body, encoded once per catalog version.
+        
+        Facets counted from a snapshot behind ``version`` are not kept.
+        
+        Returns:
+            The body and the catalog version it was counted at
+        """
+        key = ("facets", category, buckets)
+        body = self.response_cache.get(version, key)
+        if body is not None:
+            return body, version
+        facets, facets_version = await self.get_facets(category, buckets, version)
+        body = dumps(facets.model_dump(mode="json"))
+        if facets_version == version:
+            self.response_cache.put(version, key, body)
+        return body, facets_version
+    
+    async def suggest_sweets(self, prefix: str, limit: int = 10) -> List[SweetSuggestion]:
+        """
+        Suggest sweets whose names start with ``prefix``, best sellers first.
+        
+        Answered from the in-memory suggest index, which is built on
+        first use if application startup has not already done so.
+        """
+        index = get_suggest_index(self.session.bind)
+        if index is None:
+            index = await load_suggest_index(self.session)
+        return [
+            SweetSuggestion(id=sweet_id, name=name)
+            for sweet_id, name in index.suggest(prefix, limit)
+        ]
+    
+    async def get_sweet(
+        self,
+        sweet_id: str,
+        version: Optional[int] = None
+    ) -> Optional[SweetRow]:
+        """
+        Get a single sweet by ID, from the catalog cache when fresh.
+        
+        ``version`` is the catalog version already read by the caller.
+        """
+        if version is None:
+            version = await self.get_catalog_version()
+        sweet = self.catalog_cache.get_sweet(sweet_id)
+        if sweet is None:
+            sweet = await self.sweet_repo.get_row(sweet_id)
+            if sweet is None:
+                return None
+            self.catalog_cache.put_sweet(sweet, version)
+        return sweet
+    
+    async def get_sweet_json(self, sweet_id: str, version: int) -> Optional[bytes]:
+        """Get a single sweet as a JSON body, encoded once per catalog version."""
+        key = ("sweet", sweet_id)
+        body = self.response_cache.get(version, key)
+        if body is None:
+            sweet = await self.get_sweet(sweet_id, version)
+            if sweet is None:
+                return None
+            body = render(SWEET, sweet)
+            self.response_cache.put(version, key, body)
+        return body
     
     async def create_sweet(self, sweet_data: SweetCreate) -> Sweet:
         """Create a new sweet (admin only)."""
@@ -55,6 +238,21 @@ class SweetService:
         """Delete a sweet (admin only)."""
         return await self.sweet_repo.delete(sweet_id)
     
+    async def bulk_update(self, operation: BulkOperation) -> BulkResponse:
+        """Apply one catalog-wide admin operation as a set-based statement (admin only)."""
+        if isinstance(operation, BulkRestock):
+            affected = await self.sweet_repo.bulk_restock(operation.sweet_ids, operation.quantity)
+        elif isinstance(operation, BulkReprice):
+            affected = await self.sweet_repo.bulk_reprice(operation.category, operation.percent)
+        else:
+            affected = await self.sweet_repo.bulk_delete(operation.sweet_ids)
+        return BulkResponse(op=operation.op, affected=affected)
+    
+    async def set_stock_shards(self, sweet_id: str, shards: int) -> Optional[SweetResponse]:
+        """Split a hot sweet's stock across shard rows (admin only)."""
+        sweet = await self.sweet_repo.set_stock_shards(sweet_id, shards)
+        return SweetResponse.model_validate(sweet) if sweet else None
+    
     async def purchase_sweet(
         self, 
         sweet_id: str, 
@@ -64,26 +262,38 @@ class SweetService:
         """
         Purchase a sweet atomically.
         
-        This handles the critical section for concurrent purchases.
+        This handles the critical section for concurrent purchases. The
+        stock decrement and the order record share a single commit.
+        
+        With PURCHASE_QUEUE_ENABLED the purchase waits its turn in the
+        bounded purchase queue and is refused with PurchaseQueueFullError
+        when the queue is full. With PURCHASE_COALESCING_ENABLED the
+        purchase is handed to the purchase coalescer and committed
+        together with its neighbours.
         """
+        if settings.PURCHASE_QUEUE_ENABLED:
+            queue = get_purchase_queue(self.session.bind)
+            # Hand this request's connection back to the pool while it
+            # waits; the queue's writers need connections to drain it
+            await self.session.close()
+            return await queue.submit(
+                lambda session: SweetService(session)._purchase(sweet_id, quantity, user_id)
+            )
+        return await self._purchase(sweet_id, quantity, user_id)
+    
+    async def _purchase(
+        self,
+        sweet_id: str,
+        quantity: int,
+        user_id: Optional[int]
+    ) -> PurchaseResponse:
+        """Purchase straight away, directly or through the coalescer."""
+        if settings.PURCHASE_COALESCING_ENABLED:
+            coalescer = get_purchase_coalescer(self.session.bind)
+            return await coalescer.submit(sweet_id, quantity, user_id)
+        
         try:
-            sweet = await self.sweet_repo.atomic_purchase(sweet_id, quantity)
-            
-            # Create order record if user is provided
-            if user_id:
-                total = sweet.price * quantity
-                order = Order(
-                    user_id=user_id,
-                    sweet_id=sweet_id,
-                    sweet_name=sweet.name,
-                    quantity=quantity,
-                    unit_price=sweet.price,
-                    total=total,
-                    status=OrderStatus.COMPLETED
-                )
-                self.session.add(order)
-                await self.session.commit()
-            
+            sweet = await self.sweet_repo.atomic_purchase(sweet_id, quantity, user_id)
             return PurchaseResponse(
                 success=True,
                 message=f"Successfully purchased {quantity} x {sweet.name}",
@@ -94,3 +304,68 @@ class SweetService:
             raise e
         except InsufficientStockError as e:
             raise e
+    
+    async def reserve_sweet(
+        self,
+        sweet_id: str,
+        quantity: int,
+        user_id: int
+    ) -> HoldResponse:
+        """Hold stock for a user's cart for STOCK_HOLD_TTL_SECONDS."""
+        hold, sweet = await self.sweet_repo.reserve(
+            sweet_id, quantity, user_id, settings.STOCK_HOLD_TTL_SECONDS
+        )
+        return HoldResponse(
+            id=hold["id"],
+            sweet=SweetResponse.model_validate(sweet),
+            quantity=quantity,
+            status=hold["status"],
+            expires_at=hold["expires_at"]
+        )
+    
+    async def confirm_hold(self, hold_id: str, user_id: int) -> PurchaseResponse:
+        """Complete the purchase of a held quantity."""
+        sweet, quantity = await self.sweet_repo.confirm_hold(hold_id, user_id)
+        return PurchaseResponse(
+            success=True,
+            message=f"Successfully purchased {quantity} x {sweet.name}",
+            sweet=SweetResponse.model_validate(sweet),
+            quantity_purchased=quantity
+        )
+    
+    async def release_hold(self, hold_id: str, user_id: int) -> None:
+        """Cancel a hold and return its stock."""
+        await self.sweet_repo.release_hold(hold_id, user_id)
+    
+    async def checkout(
+        self,
+        items: List[CheckoutItem],
+        user_id: Optional[int] = None
+    ) -> CheckoutResponse:
+        """
+        Purchase a whole cart in one transaction.
+        
+        Repeated lines for the same sweet are merged before the stock
+        check, so the cart either succeeds in full or changes nothing.
+        """
+        lines: Dict[str, int] = {}
+        for item in items:
+            lines[item.sweet_id] = lines.get(item.sweet_id, 0) + item.quantity
+        
+        sweets = await self.sweet_repo.atomic_checkout(lines, user_id)
+        
+        purchased = [
+            CheckoutLine(
+                sweet=SweetResponse.model_validate(sweet),
+                quantity_purchased=lines[sweet.id],
+                total=sweet.price * lines[sweet.id]
+            )
+            for sweet in sweets
+        ]
+        
+        return CheckoutResponse(
+            success=True,
+            message=f"Successfully purchased {sum(lines.values())} item(s)",
+            items=purchased,
+            total=sum(line.total for line in purchased)
+        )
@@ -1,13 +1,15 @@
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from passlib.context import CryptContext
 
 from app.models.user import User
 from app.models.order import Order
+from app.repositories.order_repository import OrderRepository, OrderRow
+from app.repositories.session_repository import SessionRepository
 from app.schemas.user import UserProfileUpdate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.security.password import hash_password_async, verify_password_async
+from app.security.principal import invalidate_principal
+from app.security.revocation import revoke_subject_tokens
 
 
 class UserService:
@@ -39,17 +41,13 @@ class UserService:
             setattr(user, field, value)
         
         await self.db.commit()
+        invalidate_principal(self.db.bind, user.email)
         await self.db.refresh(user)
         return user
     
-    async def get_user_orders(self, user_id: int) -> List[Order]:
-        """Get user's order history."""
-        result = await self.db.execute(
-            select(Order)
-            .where(Order.user_id == user_id)
-            .order_by(Order.createdAt.desc())
-        )
-        return result.scalars().all()
+    async def get_user_orders(self, user_id: int) -> List[OrderRow]:
+        """Get user's order history as read-only rows."""
+        return await OrderRepository(self.db).get_history(user_id)
     
     async def change_password(self, user_id: int, current_password: str, new_password: str) -> bool:
         """Change user password."""
@@ -62,12 +60,17 @@ class UserService:
             return False
         
         # Verify current password
-        if not pwd_context.verify(current_password, user.hashed_password):
+        if not await verify_password_async(current_password, user.hashed_password):
             return False
         
         # Update password
-        user.hashed_password = pwd_context.hash(new_password)
+        user.hashed_password = await hash_password_async(new_password)
         await self.db.commit()
+        invalidate_principal(self.db.bind, user.email)
+        
+        # Sign out everywhere: existing refresh and access tokens stop working
+        await SessionRepository(self.db).revoke_user(user_id)
+        await revoke_subject_tokens(self.db, user.email)
         return True
     
     async def delete_user_account(self, user_id: int) -> bool:
@@ -86,6 +89,7 @@ class UserService:
         if user:
             await self.db.delete(user)
             await self.db.commit()
+            invalidate_principal(self.db.bind, user.email)
             return True
         
         return False
\ No newline at end of file
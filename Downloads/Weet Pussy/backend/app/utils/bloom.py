@@ -0,0 +1,52 @@
+"""
+A fixed-size Bloom filter of strings.
+
+Answers "definitely not added" or "possibly added": a miss is certain,
+a hit is wrong with probability about ``fp_rate`` while no more than
+``capacity`` keys have been added. Keys cannot be removed; rebuild the
+filter from the source of truth instead.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Bit array sized for ``capacity`` keys at a false-positive rate of ``fp_rate``."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        if capacity < 1 or not 0 < fp_rate < 1:
+            raise ValueError("capacity must be positive and fp_rate between 0 and 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        # Optimal bit count and number of hash functions for that rate
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> range:
+        # Double hashing: k positions from two independent 64-bit hashes,
+        # as a range to be taken modulo ``size``
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return range(first, first + self.hashes * second, second)
+
+    def add(self, key: str) -> None:
+        size, bits = self.size, self._bits
+        for position in self._positions(key):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        # Checked on every authenticated request: stop at the first clear bit
+        size, bits = self.size, self._bits
+        for position in self._positions(key):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
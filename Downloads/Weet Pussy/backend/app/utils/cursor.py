@@ -0,0 +1,40 @@
+"""
+Opaque keyset cursors.
+
+A cursor records where a page ended (the sort key of its last row) and
+the ordering it was produced under, as URL-safe base64 JSON. Clients
+pass it back unchanged to get the next page.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Sequence, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor is malformed or was made for another ordering."""
+    pass
+
+
+def encode_cursor(ordering: str, position: Sequence[Any]) -> str:
+    """Encode the position a page ended at under ``ordering``."""
+    payload = json.dumps([ordering, list(position)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, ordering: str) -> Tuple[Any, ...]:
+    """
+    Decode a cursor made by ``encode_cursor`` for the same ``ordering``.
+
+    Raises:
+        InvalidCursorError: If the cursor cannot be decoded or belongs to
+            a different ordering
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_ordering, position = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if cursor_ordering != ordering or not isinstance(position, list):
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    return tuple(position)
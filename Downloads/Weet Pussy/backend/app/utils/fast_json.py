@@ -0,0 +1,25 @@
+"""
+JSON encoding to bytes, with orjson when it is installed.
+
+orjson is optional: it encodes several times faster than the standard
+library, which matters for large cached responses, but the output is
+the same compact JSON either way. Values must already be JSON-ready
+(e.g. from ``model_dump(mode="json")``).
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Which encoder is in use, for metrics
+ENCODER = "orjson" if orjson is not None else "json"
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a JSON-ready value as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
@@ -0,0 +1,86 @@
+"""
+Cost of the auth dependency chain per request.
+
+Calls ``get_current_user`` (and ``get_admin_user`` on top of it) directly
+for REQUESTS requests spread over the bearer tokens of USERS users. This
+is the work a worker does per authenticated request at 10k req/s, where
+each request has a 100 µs budget in total. It runs with no caching, with
+the principal cache only, and with the verified-token memo as well.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_auth_dependency
+"""
+import asyncio
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+from app.models import User
+from app.security.dependencies import get_admin_user, get_current_user
+from app.security.jwt import create_access_token, token_cache
+from app.security.principal import get_principal_cache
+from benchmarks.common import bench_database, percentile
+
+USERS = 100
+REQUESTS = 10_000
+BUDGET_US = 1_000_000 / 10_000
+
+
+async def seed(session_factory) -> list:
+    async with session_factory() as session:
+        users = [
+            User(email=f"shopper{n}@example.com", hashed_password="x", is_admin=True)
+            for n in range(USERS)
+        ]
+        session.add_all(users)
+        await session.commit()
+    return [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=create_access_token({"sub": user.email, "is_admin": True})
+        )
+        for user in users
+    ]
+
+
+async def run(session_factory, credentials: list) -> list:
+    request = Request({"type": "http", "client": ("127.0.0.1", 1), "headers": []})
+    timings = []
+    async with session_factory() as session:
+        for n in range(REQUESTS):
+            started = time.perf_counter()
+            user = await get_current_user(credentials[n % USERS], session)
+            await get_admin_user(user, request)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings
+
+
+async def main() -> None:
+    async with bench_database() as (engine, session_factory):
+        credentials = await seed(session_factory)
+        principals = get_principal_cache(engine)
+        memo_size = token_cache.max_size
+
+        print(f"{REQUESTS} requests over {USERS} tokens; budget at 10k req/s: {BUDGET_US:.0f} µs")
+        print(f"{'caching':<26} {'mean µs':>8} {'p50 µs':>8} {'p99 µs':>8} {'of budget':>10}")
+        modes = [
+            ("none", 0, 0),
+            ("principals", principals.ttl_seconds or 30.0, 0),
+            ("principals + tokens", principals.ttl_seconds or 30.0, memo_size),
+        ]
+        for label, ttl, size in modes:
+            principals.ttl_seconds = ttl
+            token_cache.max_size = size
+            token_cache.clear()
+            await run(session_factory, credentials)  # warm up
+            timings = await run(session_factory, credentials)
+            mean = sum(timings) / len(timings)
+            print(
+                f"{label:<26} {mean:>8.1f} {percentile(timings, 50):>8.1f} "
+                f"{percentile(timings, 99):>8.1f} {mean / BUDGET_US:>9.0%}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Page through a 100k-sweet catalog by keyset cursor, against OFFSET.
+
+The listing query behind GET /api/sweets is walked page by page
+(category filter, price order) and the latency of each page is reported
+by depth. Keyset pages are a single index range scan, so they should
+cost the same at page 600 as at page 1; the OFFSET column shows what the
+same pages cost when the database has to skip the rows before them. The
+last line times a few pages through the full HTTP stack.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_catalog_pages
+"""
+import asyncio
+import random
+
+from sqlalchemy import insert, select
+
+from app.models import Sweet, SweetCategory
+from app.repositories.sweet_repository import LIVE_SWEET_COLUMNS, SweetRepository
+from benchmarks.common import Timer, bench_client, bench_database, percentile
+
+SWEETS = 100_000
+PAGE_SIZE = 50
+DEPTHS = [1, 10, 100, 300, 600]
+PARAMS = {"category": "Chocolate", "sort": "price", "limit": PAGE_SIZE}
+
+
+async def seed(session_factory) -> None:
+    rng = random.Random(7)
+    categories = list(SweetCategory)
+    async with session_factory() as session:
+        await session.execute(insert(Sweet.__table__), [
+            {
+                "id": f"{i:08d}-bench",
+                "name": f"Bench Sweet {i:06d}",
+                "category": categories[i % len(categories)].name,
+                "price": round(rng.uniform(0.5, 20), 2),
+                "quantity": rng.randrange(0, 100),
+                "stock_shards": 0
+            }
+            for i in range(SWEETS)
+        ])
+        await session.commit()
+
+
+async def keyset_latencies(session_factory) -> list:
+    """Walk every page; return the latency (ms) of each."""
+    latencies, after = [], None
+    while True:
+        async with session_factory() as session:
+            with Timer() as timer:
+                _, after = await SweetRepository(session).get_page(
+                    category=SweetCategory.CHOCOLATE, sort="price", after=after, limit=PAGE_SIZE
+                )
+        latencies.append(timer.elapsed_ms)
+        if after is None:
+            return latencies
+
+
+async def http_latencies(client, pages: int = 20) -> list:
+    """Fetch the first pages through the API; return the latency (ms) of each."""
+    latencies, cursor = [], None
+    for _ in range(pages):
+        params = dict(PARAMS, **({"cursor": cursor} if cursor else {}))
+        with Timer() as timer:
+            response = await client.get("/api/sweets", params=params)
+        latencies.append(timer.elapsed_ms)
+        cursor = response.headers["x-next-cursor"]
+    return latencies
+
+
+async def offset_latency(session_factory, page: int, repeats: int = 5) -> float:
+    """Median latency (ms) of fetching a page with LIMIT/OFFSET instead."""
+    samples = []
+    for _ in range(repeats):
+        async with session_factory() as session:
+            with Timer() as timer:
+                await session.execute(
+                    select(*LIVE_SWEET_COLUMNS)
+                    .where(Sweet.category == SweetCategory.CHOCOLATE)
+                    .order_by(Sweet.price, Sweet.id)
+                    .offset((page - 1) * PAGE_SIZE)
+                    .limit(PAGE_SIZE)
+                )
+        samples.append(timer.elapsed_ms)
+    return percentile(samples, 50)
+
+
+async def main() -> None:
+    async with bench_database() as (engine, session_factory):
+        await seed(session_factory)
+        latencies = await keyset_latencies(session_factory)
+        async with bench_client(session_factory) as client:
+            api = await http_latencies(client)
+
+        print(f"{len(latencies)} pages of {PAGE_SIZE} ({SWEETS} sweets, one category)")
+        print(f"{'page':>6} {'keyset p50 ms':>14} {'offset p50 ms':>14}")
+        for depth in DEPTHS:
+            if depth > len(latencies):
+                continue
+            window = latencies[depth - 1:depth + 9]
+            print(
+                f"{depth:>6} {percentile(window, 50):>14.2f} "
+                f"{await offset_latency(session_factory, depth):>14.2f}"
+            )
+        print(f"API page p50: {percentile(api, 50):.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
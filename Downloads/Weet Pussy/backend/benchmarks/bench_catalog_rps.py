@@ -0,0 +1,87 @@
+"""
+In-process load test of the hot catalog reads: requests per second for
+the full listing, a single sweet and the facets.
+
+Concurrent clients hammer each endpoint through the full ASGI stack for
+a fixed time, with the encoded-response cache on and then off (bodies
+rendered on every request from the row cache). One client buys a sweet
+every 100 ms in the background so versions keep moving, as they do in a
+live shop.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_catalog_rps
+"""
+import asyncio
+import time
+
+from app.models import Sweet, SweetCategory
+from app.services import response_cache
+from benchmarks.common import bench_client, bench_database
+
+CATALOG = 500
+CLIENTS = 8
+SECONDS = 5.0
+PURCHASE_INTERVAL = 0.1
+
+
+async def seed(session_factory) -> list:
+    async with session_factory() as session:
+        sweets = [
+            Sweet(
+                name=f"Load Sweet {i:04d}",
+                category=list(SweetCategory)[i % 3],
+                price=1.0 + i / 100,
+                quantity=1_000_000
+            )
+            for i in range(CATALOG)
+        ]
+        session.add_all(sweets)
+        await session.commit()
+        return [sweet.id for sweet in sweets]
+
+
+async def requests_per_second(client, path: str) -> float:
+    deadline = time.perf_counter() + SECONDS
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            response = await client.get(path)
+            response.raise_for_status()
+            done += 1
+
+    await asyncio.gather(*(worker() for _ in range(CLIENTS)))
+    return done / SECONDS
+
+
+async def buy_now_and_then(client, sweet_id: str) -> None:
+    while True:
+        await asyncio.sleep(PURCHASE_INTERVAL)
+        await client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 1})
+
+
+async def main() -> None:
+    async with bench_database() as (engine, session_factory):
+        sweet_ids = await seed(session_factory)
+        paths = {
+            f"listing ({CATALOG})": "/api/sweets",
+            "single sweet": f"/api/sweets/{sweet_ids[1]}",
+            "facets": "/api/sweets/facets"
+        }
+        async with bench_client(session_factory) as client:
+            buyer = asyncio.create_task(buy_now_and_then(client, sweet_ids[0]))
+            print(f"{CLIENTS} clients, {SECONDS:.0f} s per run, a purchase every "
+                  f"{PURCHASE_INTERVAL * 1000:.0f} ms")
+            print(f"{'endpoint':<16} {'cached':>10} {'uncached':>10}")
+            for label, path in paths.items():
+                results = []
+                for max_size in (response_cache.settings.CATALOG_CACHE_SIZE, 0):
+                    response_cache.get_response_cache(engine).max_size = max_size
+                    results.append(await requests_per_second(client, path))
+                print(f"{label:<16} {results[0]:>8.0f}/s {results[1]:>8.0f}/s")
+            buyer.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
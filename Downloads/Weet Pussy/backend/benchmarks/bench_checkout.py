@@ -0,0 +1,68 @@
+"""
+Compare a per-item purchase loop against a single cart checkout.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_checkout
+"""
+import asyncio
+
+from app.models import Sweet, SweetCategory
+from benchmarks.common import StatementCounter, Timer, bench_client, bench_database
+
+CART_SIZES = [1, 10, 100]
+ROUNDS = 5
+
+
+async def seed_sweets(session_factory, count: int) -> list:
+    """Create count sweets with plenty of stock and return their ids."""
+    async with session_factory() as session:
+        sweets = [
+            Sweet(
+                name=f"Bench Sweet {i}",
+                category=SweetCategory.CANDY,
+                price=1.0 + i / 100,
+                quantity=1_000_000
+            )
+            for i in range(count)
+        ]
+        session.add_all(sweets)
+        await session.commit()
+        return [sweet.id for sweet in sweets]
+
+
+async def per_item_loop(client, sweet_ids: list) -> None:
+    for sweet_id in sweet_ids:
+        response = await client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 1})
+        response.raise_for_status()
+
+
+async def single_checkout(client, sweet_ids: list) -> None:
+    response = await client.post("/api/checkout", json={
+        "items": [{"sweet_id": sweet_id, "quantity": 1} for sweet_id in sweet_ids]
+    })
+    response.raise_for_status()
+
+
+async def main() -> None:
+    print(f"{'cart':>6} {'mode':>10} {'ms/cart':>10} {'statements':>11}")
+
+    async with bench_database() as (engine, session_factory):
+        counter = StatementCounter(engine)
+        sweet_ids = await seed_sweets(session_factory, max(CART_SIZES))
+
+        async with bench_client(session_factory) as client:
+            for size in CART_SIZES:
+                cart = sweet_ids[:size]
+                for label, run in (("loop", per_item_loop), ("checkout", single_checkout)):
+                    counter.reset()
+                    with Timer() as timer:
+                        for _ in range(ROUNDS):
+                            await run(client, cart)
+                    print(
+                        f"{size:>6} {label:>10} {timer.elapsed_ms / ROUNDS:>10.2f} "
+                        f"{counter.count // ROUNDS:>11}"
+                    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
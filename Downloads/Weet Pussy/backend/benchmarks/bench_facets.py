@@ -0,0 +1,121 @@
+"""
+Time catalog facets from the columnar snapshot against the same counts
+in SQL, at 100k and 1M sweets.
+
+The snapshot answers category counts, a 10-band price histogram and the
+stock bands with a few vectorized passes over in-memory arrays. SQL
+needs three GROUP BY queries (plus a MIN/MAX for the histogram range),
+each a scan of the sweets table. Both are timed for the whole catalog
+and for one category; the snapshot's build time (a full read of the
+table) and the cost of patching it after a write are reported too.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_facets
+"""
+import asyncio
+import random
+
+from sqlalchemy import Integer, case, cast, func, insert, select
+
+from app.models import Sweet, SweetCategory
+from app.repositories.sweet_repository import SweetRepository
+from app.services.catalog_facets import CatalogColumns
+from benchmarks.common import Timer, bench_database, percentile
+
+SIZES = [100_000, 1_000_000]
+REPEATS = 30
+BUCKETS = 10
+CHUNK = 50_000
+
+
+async def seed(session_factory, size: int) -> None:
+    rng = random.Random(size)
+    categories = list(SweetCategory)
+    for start in range(0, size, CHUNK):
+        async with session_factory() as session:
+            await session.execute(insert(Sweet.__table__), [
+                {
+                    "id": f"{i:010d}-facets",
+                    "name": f"Facet Sweet {i}",
+                    "category": rng.choice(categories).name,
+                    "price": round(rng.uniform(0.5, 20), 2),
+                    "quantity": rng.choice([0, rng.randrange(1, 120)]),
+                    "stock_shards": 0
+                }
+                for i in range(start, min(start + CHUNK, size))
+            ])
+            await session.commit()
+
+
+async def sql_facets(session, category=None) -> dict:
+    """The same counts as CatalogColumns.facets, as SQL (unsharded stock)."""
+    categories = await session.execute(
+        select(Sweet.category, func.count(), func.sum(case((Sweet.quantity > 0, 1), else_=0)))
+        .group_by(Sweet.category)
+    )
+    selected = [Sweet.category == category] if category is not None else []
+    low, high = (await session.execute(
+        select(func.min(Sweet.price), func.max(Sweet.price)).where(*selected)
+    )).one()
+    width = (high - low) / BUCKETS or 1
+    band = func.min(cast((Sweet.price - low) / width, Integer), BUCKETS - 1)
+    prices = await session.execute(
+        select(band, func.count()).where(*selected).group_by(band)
+    )
+    stock_band = case((Sweet.quantity < 1, 0), (Sweet.quantity < 10, 1), (Sweet.quantity < 50, 2), else_=3)
+    stock = await session.execute(
+        select(stock_band, func.count()).where(*selected).group_by(stock_band)
+    )
+    return {"categories": categories.all(), "prices": prices.all(), "stock": stock.all()}
+
+
+def report(label: str, samples: list) -> None:
+    print(f"{label:<28} {percentile(samples, 50):>9.2f}ms {percentile(samples, 99):>9.2f}ms")
+
+
+async def run(size: int) -> None:
+    async with bench_database() as (engine, session_factory):
+        await seed(session_factory, size)
+        print(f"\n{size:,} sweets")
+
+        async with session_factory() as session:
+            with Timer() as timer:
+                rows = await SweetRepository(session).get_stock_columns()
+                columns = CatalogColumns(rows, version=0)
+            print(f"snapshot build: {timer.elapsed_ms:.0f} ms, "
+                  f"{sum(a.nbytes for a in (columns.category, columns.price, columns.quantity, columns.present)) / 2**20:.1f} MiB "
+                  f"of numeric columns")
+
+            print(f"{'query':<28} {'p50':>11} {'p99':>11}")
+            for category in (None, SweetCategory.CANDY):
+                name = category.value if category else "all"
+                samples = []
+                for _ in range(REPEATS):
+                    with Timer() as timer:
+                        columns.facets(category, BUCKETS)
+                    samples.append(timer.elapsed_ms)
+                report(f"snapshot ({name})", samples)
+
+                samples = []
+                for _ in range(REPEATS // 3):
+                    with Timer() as timer:
+                        await sql_facets(session, category)
+                    samples.append(timer.elapsed_ms)
+                report(f"sql ({name})", samples)
+
+            sweet_ids = [row[0] for row in random.Random(1).sample(rows, REPEATS)]
+            samples = []
+            for sweet_id in sweet_ids:
+                with Timer() as timer:
+                    columns.patch({sweet_id: 7}, [], [])
+                samples.append(timer.elapsed_ms)
+            report("patch one stock level", samples)
+
+
+async def main() -> None:
+    for size in SIZES:
+        await run(size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Catalog read latency while a burst of logins is being checked.
+
+Each login verifies a bcrypt hash, which takes a few hundred milliseconds
+of CPU at the default cost. Readers fetch a single sweet in a loop, once
+with nothing else going on, then during LOGINS concurrent logins with
+bcrypt in the hashing pool, and then with bcrypt called on the event loop
+as it was before the pool existed.
+
+The readers run flat out in the same process. bcrypt releases the GIL
+while it hashes, so with the pool the event loop keeps serving reads
+while the logins are checked.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_login_latency
+"""
+import asyncio
+import time
+from typing import List
+
+from app.models import Sweet, SweetCategory
+from app.security.password import verify_password
+from app.services import auth_service
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, bench_client, bench_database, percentile
+
+LOGINS = 50
+READERS = 4
+IDLE_SECONDS = 2.0
+
+
+async def read_until(client, path: str, done: asyncio.Event) -> List[float]:
+    latencies = []
+    while not done.is_set():
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def measure(client, path: str, logins: int) -> tuple:
+    """Read path from READERS clients while logins run; return (latencies, login seconds)."""
+    done = asyncio.Event()
+    readers = [asyncio.create_task(read_until(client, path, done)) for _ in range(READERS)]
+    started = time.perf_counter()
+    if logins:
+        responses = await asyncio.gather(*(
+            client.post("/api/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+            for _ in range(logins)
+        ))
+        assert all(response.status_code == 200 for response in responses)
+    else:
+        await asyncio.sleep(IDLE_SECONDS)
+    elapsed = time.perf_counter() - started
+    done.set()
+    latencies = [ms for reader in readers for ms in await reader]
+    return latencies, elapsed
+
+
+async def verify_on_the_event_loop(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def main() -> None:
+    async with bench_database() as (engine, session_factory):
+        async with session_factory() as session:
+            sweet = Sweet(name="Login Toffee", category=SweetCategory.CANDY, price=1.0, quantity=100)
+            session.add(sweet)
+            await session.commit()
+        path = f"/api/sweets/{sweet.id}"
+
+        async with bench_client(session_factory) as client:
+            print(f"{READERS} catalog readers; {LOGINS} concurrent logins")
+            print(f"{'logins':<22} {'reads':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'logins s':>9}")
+            runs = [("none", 0), ("hashing pool", LOGINS), ("on the event loop", LOGINS)]
+            for label, logins in runs:
+                if label == "on the event loop":
+                    auth_service.verify_password_async = verify_on_the_event_loop
+                latencies, elapsed = await measure(client, path, logins)
+                print(
+                    f"{label:<22} {len(latencies):>7} {percentile(latencies, 50):>8.1f} "
+                    f"{percentile(latencies, 99):>8.1f} {max(latencies):>8.1f} "
+                    f"{elapsed if logins else 0:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
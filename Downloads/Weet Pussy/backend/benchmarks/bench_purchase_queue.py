@@ -0,0 +1,83 @@
+"""
+Overload the purchase endpoint with and without the purchase queue.
+
+Without admission control every request waits on the SQLite write lock
+and latency grows with the size of the spike. With the queue only
+PURCHASE_QUEUE_MAX_DEPTH requests wait; the rest get an immediate 429,
+so the tail of accepted purchases stays close to their median.
+
+The client runs in the same process and event loop as the app, so every
+request (shed or not) still pays for its share of authentication work
+under the spike; compare the p50-to-p99 spread rather than absolute
+latencies across spike sizes.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_purchase_queue
+"""
+import asyncio
+import time
+
+from app.config import get_settings
+from app.models import Sweet, SweetCategory
+from app.services.purchase_queue import close_purchase_queues
+from benchmarks.common import bench_client, bench_database, percentile
+
+SPIKES = [50, 200, 800]
+QUEUE_WORKERS = 4
+QUEUE_MAX_DEPTH = 32
+
+settings = get_settings()
+
+
+async def spike(client, sweet_id: str, buyers: int) -> tuple:
+    """Fire buyers purchases at once; return accepted latencies, shed and failed counts."""
+    async def buy():
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 1})
+            code = response.status_code
+        except Exception:
+            # e.g. the connection pool timing out under the spike
+            code = None
+        return code, (time.perf_counter() - started) * 1000
+
+    results = await asyncio.gather(*[buy() for _ in range(buyers)])
+    accepted = [ms for code, ms in results if code == 200]
+    shed = len([code for code, _ in results if code == 429])
+    failed = len([code for code, _ in results if code not in (200, 429)])
+    return accepted, shed, failed
+
+
+async def main() -> None:
+    settings.PURCHASE_QUEUE_WORKERS = QUEUE_WORKERS
+    settings.PURCHASE_QUEUE_MAX_DEPTH = QUEUE_MAX_DEPTH
+    print(
+        f"{'spike':>6} {'mode':>7} {'accepted':>9} {'shed':>6} {'failed':>7} "
+        f"{'p50 ms':>8} {'p99 ms':>8}"
+    )
+
+    async with bench_database() as (engine, session_factory):
+        async with session_factory() as session:
+            sweet = Sweet(
+                name="Spike Lollipop",
+                category=SweetCategory.CANDY,
+                price=0.5,
+                quantity=1_000_000
+            )
+            session.add(sweet)
+            await session.commit()
+
+        async with bench_client(session_factory) as client:
+            for buyers in SPIKES:
+                for label, enabled in (("direct", False), ("queued", True)):
+                    settings.PURCHASE_QUEUE_ENABLED = enabled
+                    accepted, shed, failed = await spike(client, sweet.id, buyers)
+                    print(
+                        f"{buyers:>6} {label:>7} {len(accepted):>9} {shed:>6} {failed:>7} "
+                        f"{percentile(accepted, 50):>8.1f} {percentile(accepted, 99):>8.1f}"
+                    )
+            await close_purchase_queues()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
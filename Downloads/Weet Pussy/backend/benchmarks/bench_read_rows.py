@@ -0,0 +1,127 @@
+"""
+Compare the ORM read path with plain read-only rows for 10k-row
+listings of sweets and of a user's orders.
+
+The ORM path is what list endpoints used to do: load mapped objects
+into the session's identity map, validate each into a response model,
+then let the route's response_model dump and validate them again before
+encoding. The row path selects just the response columns as dicts, and
+the response model validates and encodes them once. Each path is run
+from the database query to JSON bytes; CPU time and peak traced memory
+are reported per row.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_read_rows
+"""
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from app.models import Order, Sweet, SweetCategory, User
+from app.repositories.order_repository import OrderRepository
+from app.repositories.sweet_repository import LIVE_QUANTITY, SweetRepository
+from app.schemas.order import OrderResponse
+from app.schemas.sweet import SweetResponse
+from benchmarks.common import bench_database
+
+ROWS = 10_000
+REPEATS = 5
+
+SWEETS = TypeAdapter(List[SweetResponse])
+ORDERS = TypeAdapter(List[OrderResponse])
+
+
+async def seed(session_factory) -> int:
+    rng = random.Random(3)
+    categories = list(SweetCategory)
+    async with session_factory() as session:
+        user_id = (await session.execute(select(User.id))).scalar_one()
+        await session.execute(insert(Sweet.__table__), [
+            {
+                "id": f"{i:08d}-rows",
+                "name": f"Row Sweet {i:05d}",
+                "category": rng.choice(categories).name,
+                "price": round(rng.uniform(0.5, 20), 2),
+                "quantity": rng.randrange(0, 100),
+                "stock_shards": 0
+            }
+            for i in range(ROWS)
+        ])
+        await session.execute(insert(Order.__table__), [
+            {
+                "user_id": user_id,
+                "sweet_id": f"{i:08d}-rows",
+                "sweet_name": f"Row Sweet {i:05d}",
+                "quantity": 1,
+                "unit_price": 1.5,
+                "total": 1.5,
+                "status": "COMPLETED",
+                "createdAt": datetime(2024, 1, 1, second=i % 60)
+            }
+            for i in range(ROWS)
+        ])
+        await session.commit()
+    return user_id
+
+
+async def orm_sweets(session, user_id) -> bytes:
+    result = await session.execute(select(Sweet, LIVE_QUANTITY).order_by(Sweet.name))
+    models = [SweetResponse.model_validate(sweet) for sweet, _ in result]
+    # What FastAPI does with models returned for a response_model
+    return SWEETS.dump_json(SWEETS.validate_python([m.model_dump() for m in models]))
+
+
+async def row_sweets(session, user_id) -> bytes:
+    rows = await SweetRepository(session).get_all()
+    return SWEETS.dump_json(SWEETS.validate_python(rows))
+
+
+async def orm_orders(session, user_id) -> bytes:
+    result = await session.execute(
+        select(Order).where(Order.user_id == user_id).order_by(Order.createdAt.desc())
+    )
+    models = [OrderResponse.model_validate(order) for order in result.scalars()]
+    return ORDERS.dump_json(ORDERS.validate_python([m.model_dump() for m in models]))
+
+
+async def row_orders(session, user_id) -> bytes:
+    rows = await OrderRepository(session).get_history(user_id)
+    return ORDERS.dump_json(ORDERS.validate_python(rows))
+
+
+async def measure(session_factory, read, user_id) -> tuple:
+    """Best CPU time (us/row) and peak traced memory (bytes/row) of one read."""
+    cpu = []
+    for _ in range(REPEATS):
+        async with session_factory() as session:
+            start = time.process_time()
+            await read(session, user_id)
+            cpu.append(time.process_time() - start)
+
+    async with session_factory() as session:
+        tracemalloc.start()
+        await read(session, user_id)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(cpu) / ROWS * 1e6, peak / ROWS
+
+
+async def main() -> None:
+    async with bench_database() as (engine, session_factory):
+        user_id = await seed(session_factory)
+        print(f"{ROWS:,} rows, query to JSON bytes")
+        print(f"{'read':<10} {'path':<5} {'cpu/row':>10} {'peak/row':>10}")
+        for name, orm, rows in (("sweets", orm_sweets, row_sweets), ("orders", orm_orders, row_orders)):
+            for label, read in (("orm", orm), ("rows", rows)):
+                cpu, peak = await measure(session_factory, read, user_id)
+                print(f"{name:<10} {label:<5} {cpu:>8.1f}us {peak:>9.0f}B")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
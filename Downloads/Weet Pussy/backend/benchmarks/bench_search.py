@@ -0,0 +1,100 @@
+"""
+Time full-text sweet search at 100k and 1M products.
+
+Each query is run through the FTS5 index (BM25-ranked) and through the
+LIKE-scan fallback used on databases without FTS5. The index only reads
+the posting lists of the query's words, so its cost follows how common
+they are; the fallback scans rows in name order until it has a page,
+which is quick only when matches are everywhere.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_search
+"""
+import asyncio
+import random
+import re
+
+from sqlalchemy import insert
+
+from app.models import Sweet, SweetCategory
+from app.repositories.sweet_repository import SweetRepository
+from benchmarks.common import Timer, bench_database, percentile
+
+SIZES = [100_000, 1_000_000]
+QUERIES = ["choc", "dark chocolate", "salted caramel fud", "truffle bar", "nonexistent"]
+FTS_REPEATS = 50
+LIKE_REPEATS = 5
+CHUNK = 50_000
+
+ADJECTIVES = [
+    "Dark", "Milk", "White", "Salted", "Spiced", "Smoked", "Roasted", "Honeyed",
+    "Zesty", "Creamy", "Crunchy", "Chewy", "Fizzy", "Sour", "Toasted", "Golden"
+]
+FLAVOURS = [
+    "Chocolate", "Caramel", "Hazelnut", "Raspberry", "Lemon", "Mint", "Coffee",
+    "Vanilla", "Cherry", "Orange", "Almond", "Coconut", "Ginger", "Toffee", "Maple"
+]
+FORMS = [
+    "Bar", "Truffle", "Fudge", "Drop", "Button", "Cookie", "Eclair", "Bonbon",
+    "Lolly", "Brittle", "Nougat", "Praline", "Cluster", "Slab", "Twist"
+]
+
+
+async def seed(session_factory, size: int) -> None:
+    rng = random.Random(size)
+    categories = list(SweetCategory)
+    for start in range(0, size, CHUNK):
+        async with session_factory() as session:
+            await session.execute(insert(Sweet.__table__), [
+                {
+                    "id": f"{i:010d}-search",
+                    "name": f"{rng.choice(ADJECTIVES)} {rng.choice(FLAVOURS)} {rng.choice(FORMS)} No. {i}",
+                    "category": rng.choice(categories).name,
+                    "price": 1.0,
+                    "quantity": 10,
+                    "stock_shards": 0
+                }
+                for i in range(start, min(start + CHUNK, size))
+            ])
+            await session.commit()
+
+
+async def latencies(session_factory, search, repeats: int) -> list:
+    samples = []
+    async with session_factory() as session:
+        repo = SweetRepository(session)
+        for _ in range(repeats):
+            with Timer() as timer:
+                await search(repo)
+            samples.append(timer.elapsed_ms)
+    return samples
+
+
+async def run(size: int) -> None:
+    async with bench_database() as (engine, session_factory):
+        with Timer() as timer:
+            await seed(session_factory, size)
+        print(f"\n{size:,} sweets (seeded and indexed in {timer.elapsed_ms / 1000:.1f} s)")
+        print(f"{'query':<22} {'fts p50':>9} {'fts p99':>9} {'like p50':>10}")
+
+        for query in QUERIES:
+            words = re.findall(r"\w+", query)
+            fts = await latencies(
+                session_factory, lambda repo: repo.search(query), FTS_REPEATS
+            )
+            like = await latencies(
+                session_factory, lambda repo: repo._search_like(words, 20), LIKE_REPEATS
+            )
+            print(
+                f"{query:<22} {percentile(fts, 50):>8.2f}ms {percentile(fts, 99):>8.2f}ms "
+                f"{percentile(like, 50):>9.1f}ms"
+            )
+
+
+async def main() -> None:
+    for size in SIZES:
+        await run(size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
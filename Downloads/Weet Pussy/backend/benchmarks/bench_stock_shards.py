@@ -0,0 +1,86 @@
+"""
+Stress concurrent purchases of one hot sweet at growing shard counts.
+
+For every shard count the benchmark reports throughput, the share of
+decrements that landed on the hottest row (the row-lock contention a
+row-locking engine such as PostgreSQL would see), and how often the
+randomly chosen shard was short and a fallback scan was needed.
+
+SQLite serializes writers on a database-wide lock, so on SQLite the
+throughput column stays roughly flat; the hot-row share is the number
+that tracks contention.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_stock_shards
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app.models import Sweet, SweetCategory, SweetStockShard
+from app.repositories.sweet_repository import SweetRepository, shard_stats
+from benchmarks.common import Timer, bench_database
+
+SHARD_COUNTS = [0, 2, 4, 8, 16]
+BUYERS = 32
+PURCHASES_PER_BUYER = 25
+
+
+async def row_quantities(session, sweet_id: str) -> list:
+    result = await session.execute(
+        select(SweetStockShard.quantity)
+        .where(SweetStockShard.sweet_id == sweet_id)
+        .order_by(SweetStockShard.shard_no)
+    )
+    quantities = list(result.scalars().all())
+    if not quantities:
+        result = await session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+        quantities = [result.scalar_one()]
+    return quantities
+
+
+async def run(session_factory, shards: int) -> None:
+    total = BUYERS * PURCHASES_PER_BUYER * 2
+
+    async with session_factory() as session:
+        sweet = Sweet(
+            name=f"Hot Sweet x{shards}",
+            category=SweetCategory.CHOCOLATE,
+            price=1.0,
+            quantity=total
+        )
+        session.add(sweet)
+        await session.commit()
+        sweet_id = sweet.id
+        await SweetRepository(session).set_stock_shards(sweet_id, shards)
+        before = await row_quantities(session, sweet_id)
+
+    async def buyer():
+        for _ in range(PURCHASES_PER_BUYER):
+            async with session_factory() as session:
+                await SweetRepository(session).atomic_purchase(sweet_id, 1)
+
+    shard_stats.first_choice_hits = shard_stats.fallback_scans = 0
+    with Timer() as timer:
+        await asyncio.gather(*[buyer() for _ in range(BUYERS)])
+
+    async with session_factory() as session:
+        after = await row_quantities(session, sweet_id)
+
+    writes = [b - a for b, a in zip(before, after)]
+    purchases = BUYERS * PURCHASES_PER_BUYER
+    print(
+        f"{max(shards, 1):>7} {purchases / (timer.elapsed_ms / 1000):>12.0f} "
+        f"{max(writes) / purchases:>13.1%} {shard_stats.fallback_scans:>15}"
+    )
+
+
+async def main() -> None:
+    print(f"{'shards':>7} {'purchases/s':>12} {'hot-row share':>13} {'fallback scans':>15}")
+    async with bench_database() as (engine, session_factory):
+        for shards in SHARD_COUNTS:
+            await run(session_factory, shards)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Time name suggestions from the in-memory index at 100k and 1M sweets,
+and report what the index costs in memory.
+
+Prefixes are taken from the start of random names, 1 to 8 characters
+long, the way they arrive while someone types. The first lookup of a
+broad prefix ranks its whole slice of names and remembers the top
+sellers, so lookups are timed on a cold pass and again once warm.
+Renames are timed too: each shifts the sorted lists and forgets the
+remembered rankings of the name's prefixes.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_suggest
+"""
+import random
+import time
+import tracemalloc
+
+from app.services.suggest_index import SuggestIndex
+from benchmarks.bench_search import ADJECTIVES, FLAVOURS, FORMS
+from benchmarks.common import Timer, percentile
+
+SIZES = [100_000, 1_000_000]
+LOOKUPS = 20_000
+RENAMES = 1_000
+SOLD_SHARE = 0.2
+
+
+def catalog(size: int):
+    rng = random.Random(size)
+    names = [
+        (f"{i:010d}-suggest", f"{rng.choice(ADJECTIVES)} {rng.choice(FLAVOURS)} {rng.choice(FORMS)} No. {i}")
+        for i in range(size)
+    ]
+    popularity = {
+        sweet_id: rng.randint(1, 10_000)
+        for sweet_id, _ in rng.sample(names, int(size * SOLD_SHARE))
+    }
+    return names, popularity
+
+
+def timed(samples: list, call) -> None:
+    start = time.perf_counter()
+    call()
+    samples.append((time.perf_counter() - start) * 1000)
+
+
+def run(size: int) -> None:
+    names, popularity = catalog(size)
+    rng = random.Random(0)
+
+    tracemalloc.start()
+    with Timer() as timer:
+        index = SuggestIndex(names, popularity)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"\n{size:,} names: built in {timer.elapsed_ms / 1000:.2f} s, "
+          f"{memory / 2**20:.0f} MiB ({memory / size:.0f} bytes per name, "
+          f"popularity and id strings shared with the caller)")
+
+    prefixes = [
+        rng.choice(names)[1][:rng.randint(1, 8)]
+        for _ in range(LOOKUPS)
+    ]
+    print(f"{'pass':<8} {'p50':>9} {'p99':>9} {'max':>9}")
+    for label in ("cold", "warm"):
+        samples = []
+        for prefix in prefixes:
+            timed(samples, lambda: index.suggest(prefix, 10))
+        print(f"{label:<8} {percentile(samples, 50) * 1000:>7.1f}us "
+              f"{percentile(samples, 99) * 1000:>7.1f}us {max(samples):>7.2f}ms")
+
+    samples = []
+    for sweet_id, name in rng.sample(names, RENAMES):
+        timed(samples, lambda: index.apply({sweet_id: f"Renamed {name}"}))
+    print(f"{'rename':<8} {percentile(samples, 50) * 1000:>7.1f}us "
+          f"{percentile(samples, 99) * 1000:>7.1f}us {max(samples):>7.2f}ms")
+
+
+def main() -> None:
+    for size in SIZES:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
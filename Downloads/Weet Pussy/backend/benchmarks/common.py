@@ -0,0 +1,106 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway file-backed SQLite database so that
+commit and fsync costs show up the way they do in production.
+"""
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import User
+from app.security.password import hash_password
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "benchpass123"
+
+
+class StatementCounter:
+    """Count SQL statements issued through an engine."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self) -> None:
+        self.count = 0
+
+
+@asynccontextmanager
+async def bench_database() -> AsyncIterator[tuple]:
+    """Yield an (engine, session factory) pair backed by a temporary file."""
+    directory = tempfile.mkdtemp(prefix="sweetshop-bench-")
+    path = os.path.join(directory, "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        session.add(User(
+            email=BENCH_EMAIL,
+            hashed_password=hash_password(BENCH_PASSWORD),
+            is_admin=True
+        ))
+        await session.commit()
+
+    try:
+        yield engine, session_factory
+    finally:
+        await engine.dispose()
+        os.remove(path)
+        os.rmdir(directory)
+
+
+@asynccontextmanager
+async def bench_client(session_factory) -> AsyncIterator[AsyncClient]:
+    """Yield an authenticated in-process client bound to the bench database."""
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = ASGITransport(app=app)
+
+    try:
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/api/auth/login", json={
+                "email": BENCH_EMAIL,
+                "password": BENCH_PASSWORD
+            })
+            token = response.json()["access_token"]
+            client.headers["Authorization"] = f"Bearer {token}"
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile of samples (nearest rank)."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Timer:
+    """Context manager measuring wall-clock time in milliseconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = (time.perf_counter() - self.start) * 1000
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 """
-Database migration script to add user profile fields and orders table.
+Database migration script to add user profile fields, orders table,
+sharded stock support, cart stock holds,
+idempotency keys, the catalog version counter,
+the sweets listing indexes, the stock change log,
+refresh-token sessions and revoked access tokens.
 """
 
 import asyncio
 import sqlite3
 from pathlib import Path
 
+from app.models.catalog_version import CATALOG_VERSION_TRIGGERS
+from app.models.stock_change import STOCK_CHANGE_TRIGGERS
+
 DATABASE_PATH = Path(__file__).parent / "sweetshop.db"
 
 
@@ -60,6 +67,145 @@ def migrate_database():
         """)
         print("Created orders table")
         
+        # Sharded stock for hot sweets
+        print("Adding stock sharding support...")
+        cursor.execute("PRAGMA table_info(sweets)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'stock_shards' not in columns:
+            cursor.execute("ALTER TABLE sweets ADD COLUMN stock_shards INTEGER NOT NULL DEFAULT 0")
+            print("Added stock_shards column")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sweet_stock_shards (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sweet_id CHAR(36) NOT NULL,
+                shard_no INTEGER NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                CONSTRAINT uq_stock_shard UNIQUE (sweet_id, shard_no),
+                CONSTRAINT check_shard_quantity_non_negative CHECK (quantity >= 0),
+                FOREIGN KEY (sweet_id) REFERENCES sweets (id) ON DELETE CASCADE
+            )
+        """)
+        print("Created sweet_stock_shards table")
+        
+        # Time-limited cart reservations
+        print("Creating stock_holds table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stock_holds (
+                id CHAR(36) PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                sweet_id CHAR(36) NOT NULL,
+                quantity INTEGER NOT NULL,
+                status VARCHAR(9) NOT NULL DEFAULT 'ACTIVE',
+                expires_at DATETIME NOT NULL,
+                createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (sweet_id) REFERENCES sweets (id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_stock_holds_status_expires_at
+            ON stock_holds (status, expires_at)
+        """)
+        print("Created stock_holds table")
+        
+        # Stored responses for Idempotency-Key replays
+        print("Creating idempotency_keys table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                key VARCHAR(255) NOT NULL,
+                fingerprint VARCHAR(64) NOT NULL,
+                response_body TEXT,
+                expires_at DATETIME NOT NULL,
+                createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT uq_idempotency_key UNIQUE (user_id, key),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at
+            ON idempotency_keys (expires_at)
+        """)
+        print("Created idempotency_keys table")
+        
+        # Change counter behind the catalog ETags
+        print("Creating catalog_version table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
+        for _, statement in CATALOG_VERSION_TRIGGERS:
+            cursor.execute(statement)
+        print("Created catalog_version table")
+        
+        # Indexes behind the keyset-paginated listing
+        print("Creating sweets listing indexes...")
+        for name, columns in (
+            ("ix_sweets_category_name", "category, name"),
+            ("ix_sweets_price_id", "price, id"),
+            ("ix_sweets_category_price_id", "category, price, id"),
+            ("ix_sweets_quantity_id", "quantity, id"),
+            ("ix_sweets_category_quantity_id", "category, quantity, id"),
+        ):
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON sweets ({columns})")
+        print("Created sweets listing indexes")
+        
+        # Log of stock changes followed by the stock event stream
+        print("Creating stock_changes table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stock_changes (
+                seq INTEGER PRIMARY KEY,
+                sweet_id CHAR(36) NOT NULL
+            )
+        """)
+        for _, statement in STOCK_CHANGE_TRIGGERS:
+            cursor.execute(statement)
+        print("Created stock_changes table")
+        
+        # Refresh-token sessions
+        print("Creating sessions table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                family_id CHAR(36) NOT NULL,
+                token_hash VARCHAR(64) NOT NULL UNIQUE,
+                expires_at DATETIME NOT NULL,
+                rotated_at DATETIME,
+                revoked_at DATETIME,
+                createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        """)
+        for name, column in (
+            ("ix_sessions_family_id", "family_id"),
+            ("ix_sessions_user_id", "user_id"),
+            ("ix_sessions_expires_at", "expires_at"),
+        ):
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON sessions ({column})")
+        print("Created sessions table")
+        
+        # Revoked access tokens
+        print("Creating revoked_tokens table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                jti VARCHAR(64) NOT NULL UNIQUE,
+                expires_at DATETIME NOT NULL,
+                revoked_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at)"
+        )
+        print("Created revoked_tokens table")
+        
         conn.commit()
         print("Migration completed successfully!")
         
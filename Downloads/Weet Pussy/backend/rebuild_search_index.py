@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Create or rebuild the full-text search index (sweets_fts) of an
+existing database, e.g. after upgrading or restoring sweetshop.db.
+
+Usage:
+    python rebuild_search_index.py [path/to/database.db]
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+from app.models.catalog_version import BUMP_CATALOG_VERSION
+from app.models.sweet_search import SEARCH_INDEX_DDL, SEARCH_INDEX_REBUILD
+
+DATABASE_PATH = Path(__file__).parent / "sweetshop.db"
+
+
+def rebuild_search_index(database_path: Path = DATABASE_PATH):
+    """Create the search index and its triggers if missing, then refill it."""
+    print(f"Rebuilding search index of {database_path}...")
+    
+    conn = sqlite3.connect(database_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA compile_options")
+        if "ENABLE_FTS5" not in [row[0] for row in cursor.fetchall()]:
+            print("This SQLite build has no FTS5; searches will use LIKE scans")
+            return
+        
+        for statement in SEARCH_INDEX_DDL + SEARCH_INDEX_REBUILD:
+            cursor.execute(statement)
+        
+        cursor.execute("SELECT count(*) FROM sweets_fts")
+        print(f"Indexed {cursor.fetchone()[0]} sweets")
+        
+        # Running workers look for the index again when the catalog moves on
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_version'"
+        )
+        if cursor.fetchone():
+            cursor.execute(BUMP_CATALOG_VERSION)
+        
+        conn.commit()
+        print("Search index rebuilt successfully!")
+        
+    except Exception as e:
+        print(f"Rebuild failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    rebuild_search_index(Path(sys.argv[1]) if len(sys.argv) > 1 else DATABASE_PATH)
@@ -1,9 +1,14 @@
 """
 Authentication Tests for Sweet Shop API
 """
+import asyncio
+import time
+
 import pytest
 from httpx import AsyncClient
 
+from app.security import password
+
 
 @pytest.mark.asyncio
 async def test_register_new_user(client: AsyncClient):
@@ -104,3 +109,42 @@ async def test_protected_endpoint_with_invalid_token(client: AsyncClient, test_s
     )
     
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logins_do_not_block_the_event_loop(client: AsyncClient, test_user):
+    """Test bcrypt runs off the event loop, so other requests keep being served."""
+    longest_gap = 0.0
+    
+    async def tick():
+        nonlocal longest_gap
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            longest_gap = max(longest_gap, time.perf_counter() - started)
+    
+    ticker = asyncio.create_task(tick())
+    responses = await asyncio.gather(*(
+        client.post("/api/auth/login", json={"email": "test@example.com", "password": "password123"})
+        for _ in range(4)
+    ))
+    ticker.cancel()
+    
+    assert all(response.status_code == 200 for response in responses)
+    # A single bcrypt check at the default cost takes ~250 ms
+    assert longest_gap < 0.1
+
+
+@pytest.mark.asyncio
+async def test_full_hashing_backlog_is_refused(client: AsyncClient, test_user, monkeypatch):
+    """Test sign-ins get 429 with Retry-After once the hashing pool's backlog is full."""
+    monkeypatch.setattr(password, "_in_flight", password.settings.PASSWORD_HASH_WORKERS
+                        + password.settings.PASSWORD_HASH_MAX_PENDING)
+    
+    response = await client.post("/api/auth/login", json={
+        "email": "test@example.com",
+        "password": "password123"
+    })
+    
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,111 @@
+"""
+Bulk Admin Operation Tests
+
+POST /api/sweets/bulk restocks, reprices or deletes many sweets with
+single set-based statements.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+
+from app.models import Sweet, SweetCategory
+from app.repositories.sweet_repository import SweetRepository
+
+
+async def create_catalog(session) -> list:
+    sweets = [
+        Sweet(name="Bulk Truffle", category=SweetCategory.CHOCOLATE, price=2.00, quantity=5),
+        Sweet(name="Bulk Praline", category=SweetCategory.CHOCOLATE, price=3.50, quantity=0),
+        Sweet(name="Bulk Gummy", category=SweetCategory.CANDY, price=1.00, quantity=7),
+    ]
+    session.add_all(sweets)
+    await session.commit()
+    return [sweet.id for sweet in sweets]
+
+
+async def catalog(session) -> dict:
+    result = await session.execute(
+        select(Sweet.name, Sweet.price, Sweet.quantity)
+        .order_by(Sweet.name)
+        .execution_options(populate_existing=True)
+    )
+    return {name: (price, quantity) for name, price, quantity in result}
+
+
+@pytest.mark.asyncio
+async def test_bulk_restock(client: AsyncClient, test_session, admin_headers):
+    """Test restocking a list of sweets, including a sharded one."""
+    ids = await create_catalog(test_session)
+    await SweetRepository(test_session).set_stock_shards(ids[0], 2)
+
+    response = await client.post(
+        "/api/sweets/bulk",
+        json={"op": "restock", "sweet_ids": ids[:2] + ["nonexistent-id-12345"], "quantity": 10},
+        headers=admin_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"op": "restock", "affected": 2}
+    listing = {s["name"]: s["quantity"] for s in (await client.get("/api/sweets")).json()}
+    assert listing == {"Bulk Gummy": 7, "Bulk Praline": 10, "Bulk Truffle": 15}
+
+
+@pytest.mark.asyncio
+async def test_bulk_reprice_by_category(client: AsyncClient, test_session, test_engine, admin_headers):
+    """Test a category discount is one UPDATE and leaves other categories alone."""
+    await create_catalog(test_session)
+    statements = []
+    event.listen(
+        test_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+
+    response = await client.post(
+        "/api/sweets/bulk",
+        json={"op": "reprice", "category": "Chocolate", "percent": -20},
+        headers=admin_headers
+    )
+
+    assert response.json() == {"op": "reprice", "affected": 2}
+    assert len([s for s in statements if s.startswith("UPDATE sweets")]) == 1
+    assert await catalog(test_session) == {
+        "Bulk Gummy": (1.00, 7),
+        "Bulk Praline": (2.80, 0),
+        "Bulk Truffle": (1.60, 5)
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete(client: AsyncClient, test_session, admin_headers):
+    """Test deleting a list of sweets."""
+    ids = await create_catalog(test_session)
+
+    response = await client.post(
+        "/api/sweets/bulk",
+        json={"op": "delete", "sweet_ids": ids[1:]},
+        headers=admin_headers
+    )
+
+    assert response.json() == {"op": "delete", "affected": 2}
+    assert list(await catalog(test_session)) == ["Bulk Truffle"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_validation_and_auth(client: AsyncClient, auth_headers, admin_headers):
+    """Test malformed operations are rejected up front and non-admins are refused."""
+    for body in (
+        {"op": "rename", "sweet_ids": ["a"]},
+        {"op": "restock", "sweet_ids": [], "quantity": 5},
+        {"op": "restock", "sweet_ids": ["a"], "quantity": 0},
+        {"op": "reprice", "category": "Chocolate", "percent": -100},
+        {"op": "reprice", "category": "Biscuits", "percent": 10},
+    ):
+        response = await client.post("/api/sweets/bulk", json=body, headers=admin_headers)
+        assert response.status_code == 422, body
+
+    response = await client.post(
+        "/api/sweets/bulk",
+        json={"op": "delete", "sweet_ids": ["a"]},
+        headers=auth_headers
+    )
+    assert response.status_code == 403
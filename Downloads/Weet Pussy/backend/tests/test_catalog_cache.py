@@ -0,0 +1,136 @@
+"""
+Catalog Cache Tests
+
+GET /api/sweets and GET /api/sweets/{id} are answered from an in-process
+cache. Writes made through the repository patch or drop cached entries,
+so a purchaser sees their own stock change straight away.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.repositories.sweet_repository import SweetRepository
+from app.services import catalog_cache
+from app.services.catalog_cache import CatalogCache, catalog_cache_stats
+from app.services.response_cache import response_cache_stats
+from app.services.sweet_service import SweetService
+
+
+def record_statements(engine) -> list:
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+    return statements
+
+
+def make_sweet(sweet_id: str, quantity: int = 5) -> dict:
+    return {
+        "id": sweet_id, "name": f"Sweet {sweet_id}", "category": "Candy",
+        "price": 1.00, "quantity": quantity, "image_url": None
+    }
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_hit_the_cache(client: AsyncClient, test_sweet, test_engine):
+    """Test the listing and a single sweet are read and encoded once."""
+    hits_before = response_cache_stats.hits
+    statements = record_statements(test_engine)
+
+    for _ in range(3):
+        assert (await client.get("/api/sweets")).status_code == 200
+        assert (await client.get(f"/api/sweets/{test_sweet.id}")).status_code == 200
+
+    assert len([s for s in statements if "FROM sweets" in s]) == 2
+    assert response_cache_stats.hits == hits_before + 4
+
+
+@pytest.mark.asyncio
+async def test_purchase_patches_cached_stock(client: AsyncClient, test_sweet, auth_headers, test_engine):
+    """Test a purchaser sees their stock change without a cache reload."""
+    sweet_id = test_sweet.id
+    await client.get("/api/sweets")
+    await client.get(f"/api/sweets/{sweet_id}")
+    await client.get("/api/sweets/facets")
+
+    statements = record_statements(test_engine)
+    response = await client.post(
+        f"/api/sweets/{sweet_id}/purchase",
+        json={"quantity": 3},
+        headers=auth_headers
+    )
+    assert response.json()["sweet"]["quantity"] == 7
+    # One version read serves the cache and the facet index alike
+    assert len([s for s in statements if "FROM catalog_version" in s]) == 1
+
+    statements = record_statements(test_engine)
+    assert (await client.get("/api/sweets")).json()[0]["quantity"] == 7
+    assert (await client.get(f"/api/sweets/{sweet_id}")).json()["quantity"] == 7
+    assert not [s for s in statements if "FROM sweets" in s]
+
+
+@pytest.mark.asyncio
+async def test_admin_writes_invalidate(client: AsyncClient, test_sweet, admin_headers):
+    """Test updates, holds and deletes drop the entries they touch."""
+    sweet_id = test_sweet.id
+    await client.get("/api/sweets")
+    await client.get(f"/api/sweets/{sweet_id}")
+
+    await client.put(
+        f"/api/sweets/{sweet_id}",
+        json={"name": "Renamed Chocolate"},
+        headers=admin_headers
+    )
+    assert (await client.get("/api/sweets")).json()[0]["name"] == "Renamed Chocolate"
+    assert (await client.get(f"/api/sweets/{sweet_id}")).json()["name"] == "Renamed Chocolate"
+
+    response = await client.post(
+        f"/api/sweets/{sweet_id}/reserve",
+        json={"quantity": 4},
+        headers=admin_headers
+    )
+    assert (await client.get(f"/api/sweets/{sweet_id}")).json()["quantity"] == 6
+    await client.delete(f"/api/holds/{response.json()['id']}", headers=admin_headers)
+    assert (await client.get("/api/sweets")).json()[0]["quantity"] == 10
+
+    await client.delete(f"/api/sweets/{sweet_id}", headers=admin_headers)
+    assert (await client.get("/api/sweets")).json() == []
+    assert (await client.get(f"/api/sweets/{sweet_id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl(monkeypatch):
+    """Test the least recently used entry is evicted and old entries expire."""
+    now = [100.0]
+    monkeypatch.setattr(catalog_cache.time, "monotonic", lambda: now[0])
+    evictions_before = catalog_cache_stats.evictions
+    cache = CatalogCache(max_size=2, ttl_seconds=5)
+    cache.observe(1)
+
+    cache.put_sweet(make_sweet("a"), cache.version)
+    cache.put_sweet(make_sweet("b"), cache.version)
+    assert cache.get_sweet("a") is not None
+    cache.put_sweet(make_sweet("c"), cache.version)
+
+    assert cache.get_sweet("b") is None
+    assert catalog_cache_stats.evictions == evictions_before + 1
+
+    now[0] += 5
+    assert cache.get_sweet("a") is None
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_racing_a_write_is_not_cached(test_session, test_sweet):
+    """Test a miss that overlaps a committed write does not store old data."""
+    sweet_id = test_sweet.id
+    service = SweetService(test_session)
+    cache = service.catalog_cache
+
+    version = await service.get_catalog_version()
+    stale = await SweetRepository(test_session).get_all()
+    await SweetRepository(test_session).atomic_purchase(sweet_id, 2)
+    cache.put_listing(stale, version)
+
+    assert cache.get_listing() is None
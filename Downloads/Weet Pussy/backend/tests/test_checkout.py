@@ -0,0 +1,123 @@
+"""
+Checkout Tests for Sweet Shop API
+"""
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Sweet, SweetCategory, Order
+
+
+@pytest_asyncio.fixture
+async def second_sweet(test_session: AsyncSession) -> Sweet:
+    """Create a second sweet with limited stock."""
+    sweet = Sweet(
+        name="Test Lollipop",
+        category=SweetCategory.CANDY,
+        price=1.50,
+        quantity=3
+    )
+    test_session.add(sweet)
+    await test_session.commit()
+    await test_session.refresh(sweet)
+    return sweet
+
+
+@pytest.mark.asyncio
+async def test_checkout_multiple_items(
+    client: AsyncClient, test_sweet, second_sweet, auth_headers, test_session
+):
+    """Test a multi-line cart is purchased in one request."""
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [
+            {"sweet_id": test_sweet.id, "quantity": 2},
+            {"sweet_id": second_sweet.id, "quantity": 3}
+        ]},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert [line["sweet"]["quantity"] for line in data["items"]] == [8, 0]
+    assert data["total"] == pytest.approx(5.99 * 2 + 1.50 * 3)
+
+    result = await test_session.execute(select(Order).order_by(Order.id))
+    orders = result.scalars().all()
+    assert [(o.sweet_id, o.quantity) for o in orders] == [
+        (test_sweet.id, 2), (second_sweet.id, 3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_checkout_merges_repeated_lines(client: AsyncClient, test_sweet, auth_headers):
+    """Test repeated lines for the same sweet are checked as one."""
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [
+            {"sweet_id": test_sweet.id, "quantity": 6},
+            {"sweet_id": test_sweet.id, "quantity": 6}
+        ]},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 422
+    shortfalls = response.json()["detail"]["shortfalls"]
+    assert shortfalls == [{"sweet_id": test_sweet.id, "requested": 12, "available": 10}]
+
+
+@pytest.mark.asyncio
+async def test_checkout_is_all_or_nothing(
+    client: AsyncClient, test_sweet, second_sweet, auth_headers, test_session
+):
+    """Test a single short line leaves every sweet untouched."""
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [
+            {"sweet_id": test_sweet.id, "quantity": 1},
+            {"sweet_id": second_sweet.id, "quantity": 5}
+        ]},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["shortfalls"] == [
+        {"sweet_id": second_sweet.id, "requested": 5, "available": 3}
+    ]
+
+    result = await test_session.execute(
+        select(Sweet.quantity).where(Sweet.id == test_sweet.id)
+    )
+    assert result.scalar_one() == 10
+    result = await test_session.execute(select(Order))
+    assert result.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_checkout_unknown_sweet(client: AsyncClient, test_sweet, auth_headers):
+    """Test a cart containing an unknown sweet returns 404."""
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [
+            {"sweet_id": test_sweet.id, "quantity": 1},
+            {"sweet_id": "nonexistent-id-12345", "quantity": 1}
+        ]},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_checkout_requires_authentication(client: AsyncClient, test_sweet):
+    """Test unauthenticated checkout fails."""
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [{"sweet_id": test_sweet.id, "quantity": 1}]}
+    )
+
+    assert response.status_code == 401
@@ -7,14 +7,16 @@ concurrent access scenarios, particularly the "last item" race condition.
 Written FIRST as per TDD methodology.
 """
 import asyncio
+import time
 import pytest
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy import select
+from sqlalchemy import event, func, select
 
 from app.main import app
 from app.database import Base, get_db
-from app.models import User, Sweet, SweetCategory
+from app.models import User, Sweet, SweetCategory, Order
+from app.repositories.sweet_repository import SweetRepository
 from app.security.password import hash_password
 
 
@@ -334,3 +336,88 @@ async def test_purchase_more_than_available_fails():
     
     app.dependency_overrides.clear()
     await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_single_commit_purchase_throughput(tmp_path):
+    """
+    Compare purchases per second with the order insert folded into the
+    stock transaction against the old decrement-then-order two-commit flow.
+    
+    Uses a file-backed database so every commit pays a real journal sync.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'throughput.db'}", echo=False
+    )
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async_session_factory = async_sessionmaker(
+        engine, 
+        class_=AsyncSession, 
+        expire_on_commit=False
+    )
+    
+    purchases = 200
+    
+    async with async_session_factory() as session:
+        user = User(
+            email="throughput@test.com",
+            hashed_password=hash_password("testpass123"),
+            is_admin=False
+        )
+        sweet = Sweet(
+            name="Bulk Toffee",
+            category=SweetCategory.CANDY,
+            price=1.25,
+            quantity=purchases * 2
+        )
+        session.add_all([user, sweet])
+        await session.commit()
+        user_id, sweet_id = user.id, sweet.id
+    
+    commits = []
+    event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+    
+    async def two_commit_purchase(session):
+        sweet = await SweetRepository(session).atomic_purchase(sweet_id, 1)
+        session.add(Order(
+            user_id=user_id,
+            sweet_id=sweet_id,
+            sweet_name=sweet.name,
+            quantity=1,
+            unit_price=sweet.price,
+            total=sweet.price
+        ))
+        await session.commit()
+    
+    async def single_commit_purchase(session):
+        await SweetRepository(session).atomic_purchase(sweet_id, 1, user_id)
+    
+    rates = {}
+    commit_counts = {}
+    for label, purchase in (("two_commit", two_commit_purchase), ("single_commit", single_commit_purchase)):
+        commits.clear()
+        started = time.perf_counter()
+        for _ in range(purchases):
+            async with async_session_factory() as session:
+                await purchase(session)
+        rates[label] = purchases / (time.perf_counter() - started)
+        commit_counts[label] = len(commits)
+    
+    print(
+        f"\npurchases/s two-commit={rates['two_commit']:.0f} "
+        f"single-commit={rates['single_commit']:.0f} "
+        f"speedup={rates['single_commit'] / rates['two_commit']:.2f}x"
+    )
+    
+    assert commit_counts == {"two_commit": purchases * 2, "single_commit": purchases}
+    
+    async with async_session_factory() as session:
+        result = await session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+        assert result.scalar_one() == 0
+        result = await session.execute(select(func.count()).select_from(Order))
+        assert result.scalar_one() == purchases * 2
+    
+    await engine.dispose()
@@ -0,0 +1,112 @@
+"""
+Conditional GET Tests
+
+Catalog reads carry a strong ETag of the catalog version, which every
+write to sweets bumps. A matching If-None-Match gets a 304 without any
+sweets being read.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, text, update
+
+from app.models import Sweet
+from app.repositories.sweet_repository import SweetRepository
+
+
+def record_statements(engine) -> list:
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_is_not_modified(client: AsyncClient, test_sweet, test_engine):
+    """Test a 304 is answered from the version check alone."""
+    response = await client.get("/api/sweets")
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert response.headers["cache-control"] == "no-cache"
+
+    statements = record_statements(test_engine)
+    for path in ("/api/sweets", f"/api/sweets/{test_sweet.id}"):
+        response = await client.get(path, headers={"If-None-Match": f'"stale", W/{etag}'})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    assert statements and all("catalog_version" in s for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_writes_change_the_etag(client: AsyncClient, test_sweet, auth_headers, admin_headers):
+    """Test purchases and admin edits each move the ETag on."""
+    etags = [(await client.get("/api/sweets")).headers["etag"]]
+
+    await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 1},
+        headers=auth_headers
+    )
+    etags.append((await client.get(f"/api/sweets/{test_sweet.id}")).headers["etag"])
+
+    await client.put(
+        f"/api/sweets/{test_sweet.id}",
+        json={"price": 6.49},
+        headers=admin_headers
+    )
+    response = await client.get("/api/sweets", headers={"If-None-Match": etags[-1]})
+    assert response.status_code == 200
+    assert response.json()[0]["price"] == 6.49
+    etags.append(response.headers["etag"])
+
+    assert len(set(etags)) == 3
+
+
+@pytest.mark.asyncio
+async def test_write_from_another_worker_refreshes_the_cache(client: AsyncClient, test_sweet, test_session):
+    """Test a write made outside this process's repositories is still seen."""
+    sweet_id = test_sweet.id
+    response = await client.get("/api/sweets")
+    etag = response.headers["etag"]
+
+    await test_session.execute(update(Sweet).where(Sweet.id == sweet_id).values(quantity=42))
+    await test_session.commit()
+
+    response = await client.get("/api/sweets", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["quantity"] == 42
+    assert (await client.get(f"/api/sweets/{sweet_id}")).json()["quantity"] == 42
+
+
+@pytest.mark.asyncio
+async def test_writes_bump_the_version_without_triggers(
+    client: AsyncClient, test_sweet, test_session, auth_headers, admin_headers, monkeypatch
+):
+    """Test databases without the catalog triggers still get a new ETag per write."""
+    triggers = await test_session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'bump_catalog_version_%'"
+    ))
+    for name in triggers.scalars().all():
+        await test_session.execute(text(f"DROP TRIGGER {name}"))
+    await test_session.commit()
+    monkeypatch.setattr(SweetRepository, "_has_catalog_triggers", lambda self: False)
+
+    etags = [(await client.get("/api/sweets")).headers["etag"]]
+    await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 1},
+        headers=auth_headers
+    )
+    response = await client.get("/api/sweets", headers={"If-None-Match": etags[-1]})
+    assert response.status_code == 200
+    assert response.json()[0]["quantity"] == 9
+    etags.append(response.headers["etag"])
+
+    response = await client.put(f"/api/sweets/{test_sweet.id}/shards", json={"shards": 4}, headers=admin_headers)
+    assert response.status_code == 200
+    etags.append((await client.get("/api/sweets")).headers["etag"])
+
+    assert len(set(etags)) == 3
@@ -0,0 +1,162 @@
+"""
+Export Tests
+
+GET /api/admin/export/{sweets|orders} streams whole tables as NDJSON or
+CSV a page at a time, so memory use does not grow with the table and no
+read lock is held while a client downloads.
+"""
+import csv
+import gc
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import get_settings
+from app.database import Base, build_engine
+from app.models import Order, OrderStatus, Sweet, SweetCategory
+from app.repositories.sweet_repository import SweetRepository
+from app.services.export import stream_export
+
+# Buffering this many orders would add about 64 MiB
+ORDERS = 100_000
+RSS_CEILING = 16 * 2**20
+
+
+def rss() -> int:
+    """Current resident set size in bytes (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("VmRSS not reported")
+
+
+async def buy(client: AsyncClient, sweet_id: str, headers: dict, quantity: int) -> None:
+    response = await client.post(
+        f"/api/sweets/{sweet_id}/purchase",
+        json={"quantity": quantity},
+        headers=headers
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_export_sweets(client: AsyncClient, test_sweet, admin_headers):
+    """Test the catalog exports as NDJSON and as CSV with a header row."""
+    response = await client.get("/api/admin/export/sweets", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [{
+        "id": test_sweet.id, "name": "Test Chocolate", "category": "Chocolate",
+        "price": 5.99, "quantity": 10, "image_url": None
+    }]
+
+    response = await client.get("/api/admin/export/sweets?format=csv", headers=admin_headers)
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert 'filename="sweets.csv"' in response.headers["content-disposition"]
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        ["id", "name", "category", "price", "quantity", "image_url"],
+        [test_sweet.id, "Test Chocolate", "Chocolate", "5.99", "10", ""]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_orders_by_date(client: AsyncClient, test_sweet, auth_headers, admin_headers):
+    """Test orders can be limited to a date range, and only admins export."""
+    sweet_id = test_sweet.id
+    await buy(client, sweet_id, auth_headers, 1)
+    now = datetime.utcnow()
+    await buy(client, sweet_id, auth_headers, 2)
+
+    response = await client.get(
+        "/api/admin/export/orders",
+        params={"since": now.isoformat()},
+        headers=admin_headers
+    )
+    orders = [json.loads(line) for line in response.text.splitlines()]
+    assert [(o["quantity"], o["status"]) for o in orders] == [(2, "completed")]
+
+    response = await client.get(
+        "/api/admin/export/orders",
+        params={"until": (now - timedelta(days=1)).isoformat(), "format": "csv"},
+        headers=admin_headers
+    )
+    assert len(response.text.splitlines()) == 1
+
+    response = await client.get(
+        "/api/admin/export/sweets",
+        params={"since": now.isoformat()},
+        headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert (await client.get("/api/admin/export/orders", headers=auth_headers)).status_code == 403
+    assert (await client.get("/api/admin/export/users", headers=admin_headers)).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_partly_sent_export_does_not_block_writers(tmp_path, monkeypatch):
+    """Test a purchase commits while an export is only partly consumed."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 200)
+    monkeypatch.setattr(settings, "DB_WRITE_RETRY_DEADLINE_SECONDS", 0.5)
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Sweet.__table__), [
+            {"id": f"sweet-{i:05d}", "name": f"Sweet {i}", "category": SweetCategory.CANDY,
+             "price": 1.0, "quantity": 10}
+            for i in range(2500)
+        ])
+
+    export = stream_export(engine, "sweets", "ndjson")
+    try:
+        first = await export.__anext__()
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            sweet = await SweetRepository(session).atomic_purchase("sweet-02499", 4)
+        assert sweet.quantity == 6
+
+        rest = [chunk async for chunk in export]
+    finally:
+        await export.aclose()
+        await engine.dispose()
+
+    lines = [json.loads(line) for line in b"".join([first, *rest]).splitlines()]
+    assert len(lines) == 2500
+    # Pages after the purchase see it
+    assert lines[-1]["quantity"] == 6
+
+
+@pytest.mark.asyncio
+async def test_large_order_export_memory(tmp_path):
+    """Test exporting 100k orders stays under a fixed RSS ceiling."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        created = datetime(2024, 1, 1)
+        for start in range(0, ORDERS, 10_000):
+            await conn.execute(insert(Order.__table__), [
+                {
+                    "user_id": 1, "sweet_id": "synthetic", "sweet_name": "Synthetic Sweet",
+                    "quantity": 1, "unit_price": 1.25, "total": 1.25,
+                    "status": OrderStatus.COMPLETED, "createdAt": created
+                }
+                for _ in range(start, start + 10_000)
+            ])
+
+    gc.collect()
+    baseline = peak = rss()
+    lines = 0
+    try:
+        async for chunk in stream_export(engine, "orders", "csv"):
+            lines += chunk.count(b"\n")
+            peak = max(peak, rss())
+    finally:
+        await engine.dispose()
+
+    assert lines == ORDERS + 1
+    assert peak - baseline < RSS_CEILING
@@ -0,0 +1,131 @@
+"""
+Catalog Facet Tests
+
+GET /api/sweets/facets counts sweets per category, by price band and by
+stock band from a columnar (NumPy) snapshot of the catalog, which
+repository writes patch in place.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models import Sweet, SweetCategory
+from app.services import catalog_facets
+from app.services.catalog_facets import facet_stats
+from app.services.sweet_service import SweetService
+
+
+async def create_catalog(session) -> dict:
+    sweets = [
+        Sweet(name="Facet Truffle", category=SweetCategory.CHOCOLATE, price=1.00, quantity=0),
+        Sweet(name="Facet Bar", category=SweetCategory.CHOCOLATE, price=3.00, quantity=12),
+        Sweet(name="Facet Gummy", category=SweetCategory.CANDY, price=2.00, quantity=5),
+        Sweet(name="Facet Tart", category=SweetCategory.PASTRY, price=5.00, quantity=80),
+    ]
+    session.add_all(sweets)
+    await session.commit()
+    return {sweet.name: sweet.id for sweet in sweets}
+
+
+async def get_facets(client: AsyncClient, **params) -> dict:
+    response = await client.get("/api/sweets/facets", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def category_counts(facets: dict) -> dict:
+    return {c["category"]: (c["count"], c["in_stock"]) for c in facets["categories"]}
+
+
+def stock_counts(facets: dict) -> list:
+    return [band["count"] for band in facets["stock"]]
+
+
+@pytest.mark.asyncio
+async def test_facet_counts(client: AsyncClient, test_session):
+    """Test category counts, the price histogram and stock bands."""
+    await create_catalog(test_session)
+
+    facets = await get_facets(client, buckets=4)
+    assert (facets["total"], facets["in_stock"]) == (4, 3)
+    assert category_counts(facets) == {"Chocolate": (2, 1), "Candy": (1, 1), "Pastry": (1, 1)}
+    assert facets["price_histogram"] == [
+        {"min": 1.0, "max": 2.0, "count": 1},
+        {"min": 2.0, "max": 3.0, "count": 1},
+        {"min": 3.0, "max": 4.0, "count": 1},
+        {"min": 4.0, "max": 5.0, "count": 1},
+    ]
+    assert facets["stock"] == [
+        {"min": 0, "max": 1, "count": 1},
+        {"min": 1, "max": 10, "count": 1},
+        {"min": 10, "max": 50, "count": 1},
+        {"min": 50, "max": None, "count": 1},
+    ]
+
+    chocolate = await get_facets(client, category="Chocolate", buckets=2)
+    assert (chocolate["total"], chocolate["in_stock"]) == (2, 1)
+    assert category_counts(chocolate) == category_counts(facets)
+    assert [bucket["count"] for bucket in chocolate["price_histogram"]] == [1, 1]
+    assert stock_counts(chocolate) == [1, 0, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_writes_patch_the_snapshot(client: AsyncClient, test_session, auth_headers, admin_headers):
+    """Test purchases, creates, updates and deletes are patched in without a rebuild."""
+    ids = await create_catalog(test_session)
+    gummy_id, tart_id = ids["Facet Gummy"], ids["Facet Tart"]
+    await get_facets(client)
+    builds_before = facet_stats.builds
+
+    await client.post(f"/api/sweets/{gummy_id}/purchase", json={"quantity": 5}, headers=auth_headers)
+    await client.post(
+        "/api/sweets",
+        json={"name": "Facet Lolly", "category": "Candy", "price": 0.5, "quantity": 3},
+        headers=admin_headers
+    )
+    await client.put(f"/api/sweets/{tart_id}", json={"category": "Chocolate"}, headers=admin_headers)
+    await client.delete(f"/api/sweets/{ids['Facet Truffle']}", headers=admin_headers)
+
+    facets = await get_facets(client)
+    assert category_counts(facets) == {"Chocolate": (2, 2), "Candy": (2, 1), "Pastry": (0, 0)}
+    assert stock_counts(facets) == [1, 1, 1, 1]
+    assert facets["price_histogram"][0]["min"] == 0.5
+    assert facet_stats.builds == builds_before
+
+
+@pytest.mark.asyncio
+async def test_rebuilt_after_unseen_write(client: AsyncClient, test_session, monkeypatch):
+    """Test a write this worker was not told about is picked up by a rebuild."""
+    ids = await create_catalog(test_session)
+    monkeypatch.setattr(catalog_facets.settings, "CATALOG_FACETS_REFRESH_SECONDS", 0)
+    response = await client.get("/api/sweets/facets")
+    etag = response.headers["ETag"]
+
+    response = await client.get("/api/sweets/facets", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # As another worker would: straight to the database
+    await test_session.execute(
+        update(Sweet).where(Sweet.id == ids["Facet Truffle"]).values(quantity=20)
+    )
+    await test_session.commit()
+
+    response = await client.get("/api/sweets/facets", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["in_stock"] == 4
+
+
+@pytest.mark.asyncio
+async def test_not_modified_skips_counting(client: AsyncClient, test_session, monkeypatch):
+    """Test a matching If-None-Match is answered before any facets are counted."""
+    await create_catalog(test_session)
+    response = await client.get("/api/sweets/facets")
+    etag = response.headers["ETag"]
+
+    async def no_counting(*args):
+        raise AssertionError("facets counted for a 304")
+
+    monkeypatch.setattr(SweetService, "get_facets_json", no_counting)
+    response = await client.get("/api/sweets/facets", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
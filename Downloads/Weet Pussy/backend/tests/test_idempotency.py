@@ -0,0 +1,196 @@
+"""
+Idempotency-Key Tests
+
+A retried purchase or checkout with the same Idempotency-Key must get the
+first response back without buying again.
+"""
+import asyncio
+import hashlib
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient
+from sqlalchemy import func, insert, select, update
+
+from app.models import Sweet, Order, IdempotencyKey
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.services import idempotency
+from app.services.idempotency import idempotency_stats
+
+
+async def stock_and_orders(session, sweet_id: str) -> tuple:
+    result = await session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+    quantity = result.scalar_one()
+    result = await session.execute(select(func.count()).select_from(Order))
+    return quantity, result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_first_purchase(client: AsyncClient, test_sweet, auth_headers, test_session):
+    """Test a retried purchase returns the stored response and buys once."""
+    headers = {**auth_headers, "Idempotency-Key": "retry-1"}
+
+    first = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 2}, headers=headers)
+    retry = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 2}, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert await stock_and_orders(test_session, test_sweet.id) == (8, 1)
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_other_request(client: AsyncClient, test_sweet, auth_headers):
+    """Test a key cannot be reused with a different body."""
+    headers = {**auth_headers, "Idempotency-Key": "reused"}
+
+    await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 1}, headers=headers)
+    response = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 3}, headers=headers)
+
+    assert response.status_code == 422
+    assert "different request" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_first(client: AsyncClient, test_sweet, auth_headers, test_session):
+    """Test duplicates arriving together share one purchase."""
+    headers = {**auth_headers, "Idempotency-Key": "storm"}
+    waits_before = idempotency_stats.inflight_waits
+
+    responses = await asyncio.gather(*[
+        client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 1}, headers=headers)
+        for _ in range(5)
+    ])
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len({r.json()["sweet"]["quantity"] for r in responses}) == 1
+    assert idempotency_stats.inflight_waits == waits_before + 4
+    assert await stock_and_orders(test_session, test_sweet.id) == (9, 1)
+
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_key(client: AsyncClient, test_sweet, auth_headers, admin_headers):
+    """Test a key whose purchase failed can be retried once stock is back."""
+    headers = {**auth_headers, "Idempotency-Key": "too-early"}
+
+    response = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 15}, headers=headers)
+    assert response.status_code == 422
+
+    await client.put(f"/api/sweets/{test_sweet.id}", json={"quantity": 20}, headers=admin_headers)
+    response = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 15}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["sweet"]["quantity"] == 5
+
+
+@pytest.mark.asyncio
+async def test_replay_from_table_and_in_progress(
+    client: AsyncClient, test_sweet, test_user, auth_headers, test_session, monkeypatch
+):
+    """Test another worker replays from the table and sees in-progress keys."""
+    headers = {**auth_headers, "Idempotency-Key": "shared"}
+    first = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 1}, headers=headers)
+
+    # A fresh worker has an empty cache
+    monkeypatch.setattr(idempotency, "_caches", {})
+    replay = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 1}, headers=headers)
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+    await test_session.execute(insert(IdempotencyKey.__table__).values(
+        user_id=test_user.id,
+        key="pending",
+        fingerprint=hashlib.sha256(f"purchase:{test_sweet.id}:1".encode()).hexdigest(),
+        expires_at=datetime.utcnow() + timedelta(hours=1)
+    ))
+    await test_session.commit()
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 1},
+        headers={**auth_headers, "Idempotency-Key": "pending"}
+    )
+    assert response.status_code == 409
+
+    # Its worker died before buying: once the claim's lease is over the
+    # client can retry
+    await test_session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == "pending")
+        .values(createdAt=datetime.utcnow() - timedelta(minutes=5))
+    )
+    await test_session.execute(update(Order).values(createdAt=datetime.utcnow() - timedelta(minutes=10)))
+    await test_session.commit()
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 1},
+        headers={**auth_headers, "Idempotency-Key": "pending"}
+    )
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_abandoned_key_with_committed_purchase_is_not_rerun(
+    client: AsyncClient, test_sweet, auth_headers, test_session, monkeypatch
+):
+    """Test a purchase that committed before its worker died is not bought again."""
+    headers = {**auth_headers, "Idempotency-Key": "crashed"}
+
+    async def die(self, user_id, key, response_body):
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(IdempotencyRepository, "complete", die)
+    with pytest.raises(RuntimeError):
+        await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 2}, headers=headers)
+    monkeypatch.undo()
+    assert await stock_and_orders(test_session, test_sweet.id) == (8, 1)
+
+    monkeypatch.setattr(idempotency, "_caches", {})
+    await test_session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == "crashed")
+        .values(createdAt=datetime.utcnow() - timedelta(minutes=5))
+    )
+    await test_session.commit()
+    response = await client.post(f"/api/sweets/{test_sweet.id}/purchase", json={"quantity": 2}, headers=headers)
+
+    assert response.status_code == 409
+    assert "may have completed" in response.json()["detail"]
+    assert await stock_and_orders(test_session, test_sweet.id) == (8, 1)
+
+
+@pytest.mark.asyncio
+async def test_checkout_honours_key(client: AsyncClient, test_sweet, auth_headers, admin_headers, test_session):
+    """Test checkout retries replay and keys are scoped per user."""
+    body = {"items": [{"sweet_id": test_sweet.id, "quantity": 3}]}
+
+    first = await client.post("/api/checkout", json=body, headers={**auth_headers, "Idempotency-Key": "cart"})
+    retry = await client.post("/api/checkout", json=body, headers={**auth_headers, "Idempotency-Key": "cart"})
+    other_user = await client.post("/api/checkout", json=body, headers={**admin_headers, "Idempotency-Key": "cart"})
+
+    assert retry.json() == first.json()
+    assert "Idempotent-Replayed" not in other_user.headers
+    assert await stock_and_orders(test_session, test_sweet.id) == (4, 2)
+
+
+@pytest.mark.asyncio
+async def test_prune_expired_keys_in_batches(test_session, test_user):
+    """Test expired keys are deleted in batches and live ones are kept."""
+    now = datetime.utcnow()
+    await test_session.execute(insert(IdempotencyKey.__table__), [
+        {
+            "user_id": test_user.id,
+            "key": f"key-{i}",
+            "fingerprint": "f",
+            "response_body": "{}",
+            "expires_at": now + timedelta(hours=-1 if i < 5 else 1)
+        }
+        for i in range(7)
+    ])
+    await test_session.commit()
+    repo = IdempotencyRepository(test_session)
+
+    assert await repo.prune_expired(batch_size=3) == 3
+    assert await repo.prune_expired(batch_size=3) == 2
+    assert await repo.prune_expired(batch_size=3) == 0
+    result = await test_session.execute(select(func.count()).select_from(IdempotencyKey))
+    assert result.scalar_one() == 2
@@ -0,0 +1,125 @@
+"""
+SQLite Lock Contention Tests
+
+Several worker processes (as with ``uvicorn --workers 4``) write to the
+same database file. With busy_timeout, BEGIN IMMEDIATE write
+transactions and lock retries, none of them may see "database is locked".
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import Base, build_engine
+from app.models import User, Sweet, SweetCategory, Order
+from app.repositories.sweet_repository import SweetRepository
+from app.repositories.transactions import is_lock_error, lock_stats, write_transaction
+
+WORKERS = 4
+PURCHASES_PER_WORKER = 40
+
+
+async def _buy_and_browse(url: str, sweet_id: str, user_id: int) -> dict:
+    engine = build_engine(url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    outcome = {"purchases": 0, "lock_errors": 0}
+
+    for i in range(PURCHASES_PER_WORKER):
+        async with session_factory() as session:
+            repo = SweetRepository(session)
+            try:
+                # Read first, like a request that looks the user up
+                await repo.get_all()
+                if i % 2:
+                    hold, _ = await repo.reserve(sweet_id, 1, user_id, ttl_seconds=60)
+                    await repo.confirm_hold(hold["id"], user_id)
+                else:
+                    await repo.atomic_purchase(sweet_id, 1, user_id)
+                outcome["purchases"] += 1
+            except OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                outcome["lock_errors"] += 1
+
+    await engine.dispose()
+    outcome["retries"] = lock_stats.retries
+    return outcome
+
+
+def _worker(url: str, sweet_id: str, user_id: int) -> dict:
+    return asyncio.run(_buy_and_browse(url, sweet_id, user_id))
+
+
+class FlakyRepository:
+    """Fails with a lock error on the first ``failures`` calls."""
+
+    def __init__(self, session, failures: int, commit_first: bool = False):
+        self.session = session
+        self.failures = failures
+        self.commit_first = commit_first
+        self.calls = 0
+
+    @write_transaction
+    async def write(self) -> str:
+        self.calls += 1
+        if self.commit_first:
+            await self.session.commit()
+        if self.calls <= self.failures:
+            raise OperationalError("UPDATE sweets", {}, Exception("database is locked"))
+        return "written"
+
+
+@pytest.mark.asyncio
+async def test_lock_errors_are_retried(test_session):
+    """Test lock errors are retried, but not once the method has committed."""
+    retries_before = lock_stats.retries
+
+    repo = FlakyRepository(test_session, failures=2)
+    assert await repo.write() == "written"
+    assert repo.calls == 3
+    assert lock_stats.retries == retries_before + 2
+
+    repo = FlakyRepository(test_session, failures=1, commit_first=True)
+    with pytest.raises(OperationalError):
+        await repo.write()
+    assert repo.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_four_writer_processes_see_no_lock_errors(tmp_path):
+    """Test 4 processes buying the same sweet never fail with a lock error."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'contention.db'}"
+    engine = build_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        user = User(email="contention@test.com", hashed_password="not-used")
+        sweet = Sweet(name="Contended Nougat", category=SweetCategory.CANDY, price=1.00, quantity=1000)
+        session.add_all([user, sweet])
+        await session.commit()
+        user_id, sweet_id = user.id, sweet.id
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+        outcomes = await asyncio.gather(*[
+            loop.run_in_executor(pool, _worker, url, sweet_id, user_id)
+            for _ in range(WORKERS)
+        ])
+
+    print(f"\nLock retries per worker: {[o['retries'] for o in outcomes]}")
+    assert sum(o["lock_errors"] for o in outcomes) == 0
+    assert sum(o["purchases"] for o in outcomes) == WORKERS * PURCHASES_PER_WORKER
+
+    async with session_factory() as session:
+        result = await session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+        assert result.scalar_one() == 1000 - WORKERS * PURCHASES_PER_WORKER
+        result = await session.execute(select(func.count()).select_from(Order))
+        assert result.scalar_one() == WORKERS * PURCHASES_PER_WORKER
+
+    await engine.dispose()
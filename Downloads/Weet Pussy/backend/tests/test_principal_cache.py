@@ -0,0 +1,73 @@
+"""
+Principal Cache Tests
+
+Authenticated requests resolve their token subject through a short-lived
+cache of principals instead of querying the users table every time.
+Writes to a user through this worker drop its cached principal.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.security.principal import get_principal_cache, principal_cache_stats
+
+
+class UsersQueryCounter:
+    """Count statements that read the users table."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM users" in statement:
+            self.count += 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_skip_the_users_lookup(client: AsyncClient, test_engine, auth_headers):
+    """Test only the first authenticated request reads the users table."""
+    counter = UsersQueryCounter(test_engine)
+    hits_before = principal_cache_stats.hits
+
+    for _ in range(5):
+        response = await client.get("/api/users/orders", headers=auth_headers)
+        assert response.status_code == 200
+
+    assert counter.count == 1
+    assert principal_cache_stats.hits == hits_before + 4
+
+
+@pytest.mark.asyncio
+async def test_user_writes_invalidate_the_principal(client: AsyncClient, test_engine, test_user, auth_headers):
+    """Test profile and password changes drop the principal, and a deleted user is refused at once."""
+    cache = get_principal_cache(test_engine)
+    await client.get("/api/users/orders", headers=auth_headers)
+    assert cache.get(test_user.email) is not None
+
+    await client.put("/api/users/profile", json={"firstName": "Sugar"}, headers=auth_headers)
+    assert cache.get(test_user.email) is None
+
+    await client.get("/api/users/orders", headers=auth_headers)
+    response = await client.put("/api/users/password", json={
+        "current_password": "password123",
+        "new_password": "newpassword123"
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert cache.get(test_user.email) is None
+
+    await client.get("/api/users/orders", headers=auth_headers)
+    await client.delete("/api/users/profile", headers=auth_headers)
+    response = await client.get("/api/users/orders", headers=auth_headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_metrics_report_the_hit_ratio(client: AsyncClient, admin_headers):
+    """Test the metrics endpoint exports principal cache hits and saved queries."""
+    await client.get("/api/metrics", headers=admin_headers)
+    metrics = (await client.get("/api/metrics", headers=admin_headers)).json()
+
+    stats = metrics["principal_cache"]
+    assert stats["saved_queries"] == stats["hits"] >= 1
+    assert 0 < stats["hit_ratio"] <= 1
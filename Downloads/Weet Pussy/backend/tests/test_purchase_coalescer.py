@@ -0,0 +1,101 @@
+"""
+Purchase Coalescer Tests
+
+The coalescer must keep the same guarantees as the direct purchase path:
+no oversell and exactly one winner for the last item.
+"""
+import asyncio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.models import Sweet, SweetCategory, Order
+from app.repositories.sweet_repository import InsufficientStockError, SweetNotFoundError
+from app.services import sweet_service
+from app.services.purchase_coalescer import PurchaseCoalescer, coalescer_stats
+
+
+async def create_sweet(session, name: str, quantity: int) -> str:
+    sweet = Sweet(name=name, category=SweetCategory.CANDY, price=2.00, quantity=quantity)
+    session.add(sweet)
+    await session.commit()
+    return sweet.id
+
+
+@pytest.mark.asyncio
+async def test_coalescer_never_oversells(test_engine, test_session, test_user):
+    """10 concurrent purchases for 5 items: exactly 5 succeed in one batch."""
+    sweet_id = await create_sweet(test_session, "Flash Candy", 5)
+    coalescer = PurchaseCoalescer(test_engine, window_ms=20, max_batch=64)
+    batches_before = coalescer_stats.batches
+
+    results = await asyncio.gather(
+        *[coalescer.submit(sweet_id, 1, test_user.id) for _ in range(10)],
+        return_exceptions=True
+    )
+
+    successes = [r for r in results if not isinstance(r, Exception)]
+    failures = [r for r in results if isinstance(r, InsufficientStockError)]
+    assert len(successes) == 5
+    assert len(failures) == 5
+    assert coalescer_stats.batches == batches_before + 1
+
+    result = await test_session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+    assert result.scalar_one() == 0
+    result = await test_session.execute(select(func.count()).select_from(Order))
+    assert result.scalar_one() == 5
+
+
+@pytest.mark.asyncio
+async def test_coalescer_serves_in_arrival_order(test_engine, test_session):
+    """A request that does not fit is skipped without blocking later ones."""
+    sweet_id = await create_sweet(test_session, "Ordered Fudge", 5)
+    coalescer = PurchaseCoalescer(test_engine, window_ms=20, max_batch=64)
+
+    first, second, third, missing = await asyncio.gather(
+        coalescer.submit(sweet_id, 3),
+        coalescer.submit(sweet_id, 5),
+        coalescer.submit(sweet_id, 2),
+        coalescer.submit("nonexistent-id-12345", 1),
+        return_exceptions=True
+    )
+
+    assert first.sweet.quantity == 2
+    assert isinstance(second, InsufficientStockError)
+    assert "Available: 2, Requested: 5" in str(second)
+    assert third.sweet.quantity == 0
+    assert isinstance(missing, SweetNotFoundError)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_flushes_when_batch_is_full(test_engine, test_session):
+    """Reaching max_batch flushes without waiting for the window."""
+    sweet_id = await create_sweet(test_session, "Quick Toffee", 10)
+    coalescer = PurchaseCoalescer(test_engine, window_ms=60_000, max_batch=4)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*[coalescer.submit(sweet_id, 1) for _ in range(4)]),
+        timeout=5
+    )
+
+    assert sorted(r.sweet.quantity for r in results) == [6, 7, 8, 9]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_endpoint_last_item(client: AsyncClient, test_session, auth_headers, monkeypatch):
+    """With coalescing enabled, two buyers of the last item get one 200 and one 422."""
+    monkeypatch.setattr(sweet_service.settings, "PURCHASE_COALESCING_ENABLED", True)
+    sweet_id = await create_sweet(test_session, "Last Truffle", 1)
+
+    async def purchase():
+        return await client.post(
+            f"/api/sweets/{sweet_id}/purchase",
+            json={"quantity": 1},
+            headers=auth_headers
+        )
+
+    responses = await asyncio.gather(purchase(), purchase())
+
+    assert sorted(r.status_code for r in responses) == [200, 422]
+    result = await test_session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+    assert result.scalar_one() == 0
@@ -0,0 +1,119 @@
+"""
+Purchase Queue Tests
+
+The purchase queue bounds how many purchases wait on the database and
+sheds the rest with 429 instead of letting latency collapse.
+"""
+import asyncio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base
+from app.models import Sweet, SweetCategory
+from app.repositories.sweet_repository import InsufficientStockError
+from app.services import purchase_queue, sweet_service
+from app.services.purchase_queue import PurchaseQueue, PurchaseQueueFullError, queue_stats
+from app.services.sweet_service import SweetService
+
+
+async def blocked_queue(engine, max_depth: int) -> tuple:
+    """A one-worker queue whose worker is stuck until the event is set."""
+    queue = PurchaseQueue(engine, workers=1, max_depth=max_depth)
+    release = asyncio.Event()
+
+    async def wait(session):
+        await release.wait()
+
+    blocker = asyncio.ensure_future(queue.submit(wait))
+    await asyncio.sleep(0)
+    return queue, release, blocker
+
+
+@pytest.mark.asyncio
+async def test_queue_never_oversells(tmp_path):
+    """Test 4 writers draining 15 purchases of 10 items sell exactly 10."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    queue = PurchaseQueue(engine, workers=4, max_depth=64)
+
+    async with queue.session_factory() as session:
+        sweet = Sweet(name="Queued Caramel", category=SweetCategory.CANDY, price=2.00, quantity=10)
+        session.add(sweet)
+        await session.commit()
+
+    results = await asyncio.gather(
+        *[
+            queue.submit(lambda session: SweetService(session)._purchase(sweet.id, 1, None))
+            for _ in range(15)
+        ],
+        return_exceptions=True
+    )
+
+    assert len([r for r in results if not isinstance(r, Exception)]) == 10
+    assert len([r for r in results if isinstance(r, InsufficientStockError)]) == 5
+    async with queue.session_factory() as session:
+        result = await session.execute(select(Sweet.quantity).where(Sweet.id == sweet.id))
+        assert result.scalar_one() == 0
+
+    await queue.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_immediately(test_engine):
+    """Test purchases beyond max_depth are refused without waiting."""
+    queue, release, blocker = await blocked_queue(test_engine, max_depth=2)
+    shed_before = queue_stats.shed
+
+    async def noop(session):
+        return "done"
+
+    queued = [asyncio.ensure_future(queue.submit(noop)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(PurchaseQueueFullError) as excinfo:
+        await queue.submit(noop)
+
+    assert excinfo.value.retry_after >= 1
+    assert queue_stats.shed == shed_before + 1
+
+    release.set()
+    assert await asyncio.gather(*queued) == ["done", "done"]
+    await blocker
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_purchase_endpoint_through_queue(
+    client: AsyncClient, test_engine, test_sweet, auth_headers, monkeypatch
+):
+    """Test queued purchases succeed and a full queue returns 429 with Retry-After."""
+    monkeypatch.setattr(sweet_service.settings, "PURCHASE_QUEUE_ENABLED", True)
+
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 2},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["sweet"]["quantity"] == 8
+    await purchase_queue.close_purchase_queues()
+
+    queue, release, blocker = await blocked_queue(test_engine, max_depth=1)
+    monkeypatch.setitem(purchase_queue._queues, test_engine, queue)
+    queued = asyncio.ensure_future(queue.submit(lambda session: asyncio.sleep(0)))
+    await asyncio.sleep(0)
+
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 1},
+        headers=auth_headers
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    release.set()
+    await asyncio.gather(blocker, queued)
+    await queue.close()
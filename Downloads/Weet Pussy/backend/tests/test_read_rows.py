@@ -0,0 +1,52 @@
+"""
+Read Row Tests
+
+Catalog listings and order history are read as plain dicts of the
+response columns, without loading ORM objects, and validated once by
+the route's response model.
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.repositories.order_repository import ORDER_FIELDS
+from app.repositories.sweet_repository import SWEET_FIELDS, SweetRepository
+
+
+@pytest.mark.asyncio
+async def test_sweet_reads_return_plain_rows(test_session, test_sweet):
+    """Test listing, paging and single reads skip the identity map."""
+    sweet_id = test_sweet.id
+    await SweetRepository(test_session).set_stock_shards(sweet_id, 2)
+    test_session.expunge_all()
+    repo = SweetRepository(test_session)
+
+    listing = await repo.get_all()
+    page, _ = await repo.get_page(sort="price", limit=5)
+    row = await repo.get_row(sweet_id)
+
+    assert listing == page == [row]
+    assert tuple(row) == SWEET_FIELDS
+    assert row["quantity"] == 10
+    assert len(test_session.identity_map) == 0
+
+
+@pytest.mark.asyncio
+async def test_order_history(client: AsyncClient, test_sweet, auth_headers):
+    """Test the history lists a user's orders newest first, as before."""
+    sweet_id = test_sweet.id
+    for quantity in (1, 2):
+        await client.post(
+            f"/api/sweets/{sweet_id}/purchase",
+            json={"quantity": quantity},
+            headers=auth_headers
+        )
+
+    response = await client.get("/api/users/orders", headers=auth_headers)
+
+    assert response.status_code == 200
+    orders = response.json()
+    assert [order["quantity"] for order in orders] == [2, 1]
+    assert orders[0]["sweet_name"] == "Test Chocolate"
+    assert orders[0]["total"] == pytest.approx(11.98)
+    assert orders[0]["status"] == "completed"
+    assert tuple(orders[0]) == ORDER_FIELDS
@@ -0,0 +1,98 @@
+"""
+Refresh Token Tests
+
+Login returns a refresh token that POST /api/auth/refresh exchanges for
+new tokens without checking a password. Each refresh token works once;
+presenting a spent one revokes its whole session.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.models import UserSession
+from app.repositories.session_repository import SessionRepository
+from app.security import password
+
+
+async def login(client: AsyncClient) -> dict:
+    response = await client.post("/api/auth/login", json={
+        "email": "test@example.com",
+        "password": "password123"
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_issues_new_tokens_without_hashing(client: AsyncClient, test_user, test_session, monkeypatch):
+    """Test a refresh token buys a working access token and a new refresh token, with no bcrypt."""
+    tokens = await login(client)
+
+    def no_bcrypt(*args):
+        raise AssertionError("refresh must not hash passwords")
+
+    monkeypatch.setattr(password, "verify_password", no_bcrypt)
+    monkeypatch.setattr(password, "hash_password", no_bcrypt)
+
+    response = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+    assert refreshed["user"]["email"] == "test@example.com"
+
+    response = await client.get(
+        "/api/users/orders",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"}
+    )
+    assert response.status_code == 200
+
+    stored = (await test_session.execute(select(UserSession.token_hash))).scalars().all()
+    assert len(stored) == 2
+    assert tokens["refresh_token"] not in stored
+
+
+@pytest.mark.asyncio
+async def test_reused_refresh_token_revokes_the_session(client: AsyncClient, test_user):
+    """Test presenting a spent refresh token signs out its whole session."""
+    tokens = await login(client)
+    other_device = await login(client)
+
+    first = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert first.status_code == 200
+
+    replayed = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replayed.status_code == 401
+    assert "already used" in replayed.json()["detail"]
+
+    rotated = await client.post("/api/auth/refresh", json={"refresh_token": first.json()["refresh_token"]})
+    assert rotated.status_code == 401
+
+    untouched = await client.post("/api/auth/refresh", json={"refresh_token": other_device["refresh_token"]})
+    assert untouched.status_code == 200
+
+    unknown = await client.post("/api/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert unknown.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_password_change_and_pruning(client: AsyncClient, test_user, test_session, auth_headers):
+    """Test a password change revokes sessions and expired sessions are pruned in batches."""
+    tokens = await login(client)
+    response = await client.put("/api/users/password", json={
+        "current_password": "password123",
+        "new_password": "newpassword123"
+    }, headers=auth_headers)
+    assert response.status_code == 200
+
+    response = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    repository = SessionRepository(test_session)
+    for _ in range(3):
+        await repository.create(test_user.id, ttl_seconds=-1)
+
+    assert await repository.prune_expired(batch_size=2) == 2
+    assert await repository.prune_expired(batch_size=2) == 1
+    assert await repository.prune_expired(batch_size=2) == 0
+    remaining = (await test_session.execute(select(UserSession.id))).scalars().all()
+    assert len(remaining) == 2
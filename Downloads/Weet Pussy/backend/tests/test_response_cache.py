@@ -0,0 +1,72 @@
+"""
+Response Cache Tests
+
+The catalog listing, single sweets and facets are sent as JSON bodies
+encoded once per catalog version. Any write to the catalog moves the
+version on, so the next read renders a fresh body.
+"""
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.response_cache import ResponseCache, response_cache_stats
+from app.utils import fast_json
+
+
+@pytest.mark.asyncio
+async def test_bodies_are_reused_until_a_write(client: AsyncClient, test_sweet, auth_headers):
+    """Test repeated reads get the same bytes and a purchase re-renders them."""
+    sweet_id = test_sweet.id
+    hits_before = response_cache_stats.hits
+
+    paths = ["/api/sweets", f"/api/sweets/{sweet_id}", "/api/sweets/facets"]
+    first = [await client.get(path) for path in paths]
+    again = [await client.get(path) for path in paths]
+
+    assert [r.content for r in again] == [r.content for r in first]
+    assert all(r.headers["content-type"] == "application/json" for r in again)
+    assert all(r.headers["ETag"] == first[0].headers["ETag"] for r in again)
+    assert response_cache_stats.hits == hits_before + 3
+    assert first[1].json() == {
+        "id": sweet_id, "name": "Test Chocolate", "category": "Chocolate",
+        "price": 5.99, "quantity": 10, "image_url": None
+    }
+
+    await client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 4}, headers=auth_headers)
+
+    listing, sweet, facets = [await client.get(path) for path in paths]
+    assert listing.json()[0]["quantity"] == 6
+    assert sweet.json()["quantity"] == 6
+    assert facets.json()["stock"][1]["count"] == 1
+    assert sweet.headers["ETag"] != first[1].headers["ETag"]
+
+
+@pytest.mark.asyncio
+async def test_cache_follows_the_newest_version():
+    """Test a newer version drops old bodies and older ones are not stored."""
+    cache = ResponseCache(max_size=2)
+    cache.put(5, ("list",), b"[]")
+    assert cache.get(5, ("list",)) == b"[]"
+
+    assert cache.get(6, ("sweet", "a")) is None
+    assert len(cache) == 0
+    cache.put(5, ("list",), b"[old]")
+    assert cache.get(6, ("list",)) is None
+
+    for key in ("a", "b", "c"):
+        cache.put(6, ("sweet", key), key.encode())
+    assert cache.get(6, ("sweet", "a")) is None
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_stdlib_fallback_matches(monkeypatch):
+    """Test the encoder without orjson produces the same compact JSON."""
+    value = {"name": "Crème Brûlée", "price": 2.5, "tags": [1, None, True]}
+    encoded = fast_json.dumps(value)
+
+    monkeypatch.setattr(fast_json, "orjson", None)
+
+    assert fast_json.dumps(value) == encoded
+    assert json.loads(encoded) == value
@@ -0,0 +1,114 @@
+"""
+Search Tests
+
+GET /api/sweets/search ranks sweets by BM25 over an FTS5 index of names
+and categories, kept in step with the sweets table by triggers. Without
+the index it falls back to a LIKE scan.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, text
+
+from app.models import Sweet, SweetCategory
+from app.models.catalog_version import BUMP_CATALOG_VERSION
+from app.repositories import sweet_repository
+from app.repositories.sweet_repository import SweetRepository
+
+
+async def create_catalog(session) -> None:
+    session.add_all([
+        Sweet(name="Chocolate Chip Cookie", category=SweetCategory.PASTRY, price=1.50, quantity=3),
+        Sweet(name="Hazelnut Truffle", category=SweetCategory.CHOCOLATE, price=2.25, quantity=8),
+        Sweet(name="Lemon Drop", category=SweetCategory.CANDY, price=0.50, quantity=20),
+        Sweet(name="Milk Chocolate Buttons", category=SweetCategory.CHOCOLATE, price=1.10, quantity=0),
+    ])
+    await session.commit()
+
+
+async def search(client: AsyncClient, q: str, **params) -> list:
+    response = await client.get("/api/sweets/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [sweet["name"] for sweet in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_ranked_prefix_search(client: AsyncClient, test_session):
+    """Test word prefixes match and name hits outrank category hits."""
+    await create_catalog(test_session)
+
+    names = await search(client, "choc")
+    assert set(names) == {"Chocolate Chip Cookie", "Hazelnut Truffle", "Milk Chocolate Buttons"}
+    assert names[-1] == "Hazelnut Truffle"
+
+    assert await search(client, "MILK choc") == ["Milk Chocolate Buttons"]
+    assert await search(client, "late") == []
+    assert await search(client, "choc", limit=1) == names[:1]
+    assert await search(client, '"*: ()') == []
+
+
+@pytest.mark.asyncio
+async def test_index_follows_writes(client: AsyncClient, test_session, admin_headers):
+    """Test renames, deletes and bulk deletes reach the index."""
+    await create_catalog(test_session)
+    repo = SweetRepository(test_session)
+    lemon = await repo.get_by_name("Lemon Drop")
+    truffle = await repo.get_by_name("Hazelnut Truffle")
+    lemon_id, truffle_id = lemon.id, truffle.id
+
+    await client.put(f"/api/sweets/{lemon_id}", json={"name": "Sherbet Lemon"}, headers=admin_headers)
+    assert await search(client, "sherbet") == ["Sherbet Lemon"]
+    assert await search(client, "drop") == []
+
+    await client.delete(f"/api/sweets/{lemon_id}", headers=admin_headers)
+    await client.post(
+        "/api/sweets/bulk",
+        json={"op": "delete", "sweet_ids": [truffle_id]},
+        headers=admin_headers
+    )
+    assert await search(client, "lemon") == []
+    assert await search(client, "truffle") == []
+
+
+@pytest.mark.asyncio
+async def test_candidates_are_the_best_matches(client: AsyncClient, test_session, monkeypatch):
+    """Test the candidate cut keeps the best-ranked matches, not the first found."""
+    await create_catalog(test_session)
+    ranked = await search(client, "choc")
+
+    monkeypatch.setattr(sweet_repository, "SEARCH_CANDIDATES", 1)
+    assert await search(client, "choc") == ranked[:1]
+
+
+@pytest.mark.asyncio
+async def test_like_fallback(client: AsyncClient, test_session, test_engine, monkeypatch):
+    """Test databases without FTS5 still find the same sweets."""
+    await create_catalog(test_session)
+    ranked = set(await search(client, "choc"))
+
+    version = await SweetRepository(test_session).get_catalog_version()
+    monkeypatch.setitem(sweet_repository._search_indexes, test_engine, (version, False))
+    assert set(await search(client, "choc")) == ranked
+    assert await search(client, "milk CHOC") == ["Milk Chocolate Buttons"]
+
+    # rebuild_search_index.py moves the catalog on: the index is found again
+    await test_session.execute(text(BUMP_CATALOG_VERSION))
+    await test_session.commit()
+    assert set(await search(client, "choc")) == ranked
+    assert sweet_repository._search_indexes[test_engine] == (version + 1, True)
+
+    # Once found, searches no longer read the catalog version
+    statements = []
+    event.listen(
+        test_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+    assert set(await search(client, "choc")) == ranked
+    assert not any("catalog_version" in statement for statement in statements)
+
+
+@pytest.mark.asyncio
+async def test_search_validation(client: AsyncClient):
+    """Test the query is required and the limit bounded."""
+    assert (await client.get("/api/sweets/search")).status_code == 422
+    assert (await client.get("/api/sweets/search", params={"q": ""})).status_code == 422
+    assert (await client.get("/api/sweets/search", params={"q": "a", "limit": 101})).status_code == 422
@@ -0,0 +1,160 @@
+"""
+Stock Event Tests
+
+GET /api/sweets/stream pushes {id, quantity} deltas as server-sent
+events. One broadcaster per worker fans them out to every subscriber,
+keeping only the latest stock of each sweet for slow clients, and polls
+the stock change log for writes made by other workers.
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Sweet
+from app.repositories.sweet_repository import SweetRepository
+from app.services.stock_events import (
+    StockBroadcaster, close_stock_broadcasters, get_stock_broadcaster, stock_event_stats
+)
+
+SUBSCRIBERS = 1000
+
+
+async def next_event(subscription):
+    return await asyncio.wait_for(subscription.next(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_purchases_and_admin_updates_are_pushed(
+    client: AsyncClient, test_engine, test_sweet, auth_headers, admin_headers
+):
+    """Test a subscriber gets the new stock after a purchase, an update and a delete."""
+    sweet_id = test_sweet.id
+    broadcaster = get_stock_broadcaster(test_engine)
+    broadcaster.poll_interval = 0
+    subscription = broadcaster.subscribe()
+    try:
+        await client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 3}, headers=auth_headers)
+        assert await next_event(subscription) == (False, {sweet_id: 7})
+
+        await client.put(f"/api/sweets/{sweet_id}", json={"quantity": 50}, headers=admin_headers)
+        assert await next_event(subscription) == (False, {sweet_id: 50})
+
+        await client.delete(f"/api/sweets/{sweet_id}", headers=admin_headers)
+        assert await next_event(subscription) == (False, {sweet_id: None})
+    finally:
+        await close_stock_broadcasters()
+
+
+@pytest.mark.asyncio
+async def test_thousand_subscribers_get_the_latest_stock(test_engine):
+    """Test 1,000 concurrent subscribers all end on the latest stock, slow ones without a backlog."""
+    broadcaster = StockBroadcaster(test_engine, poll_interval=0, max_pending=256)
+    received = [[] for _ in range(SUBSCRIBERS)]
+
+    async def follow(subscription, events):
+        while True:
+            _, deltas = await subscription.next()
+            events.append(deltas)
+            if deltas.get("a") == 0:
+                return
+
+    subscriptions = [broadcaster.subscribe() for _ in range(SUBSCRIBERS)]
+    followers = [
+        asyncio.create_task(follow(subscription, events))
+        for subscription, events in zip(subscriptions, received)
+    ]
+    slow = broadcaster.subscribe()
+    superseded_before = stock_event_stats.superseded
+
+    for quantity in range(100, -1, -1):
+        broadcaster.publish({"a": quantity, "b": 100 - quantity})
+        if quantity % 10 == 0:
+            await asyncio.sleep(0)
+    await asyncio.wait_for(asyncio.gather(*followers), timeout=10)
+
+    assert all(events[-1] == {"a": 0, "b": 100} for events in received)
+    assert all(len(events) <= 101 for events in received)
+    assert await next_event(slow) == (False, {"a": 0, "b": 100})
+    assert stock_event_stats.superseded - superseded_before >= 2 * 100
+
+    broadcaster.publish({f"sweet-{n}": n for n in range(300)})
+    assert await next_event(slow) == (True, {})
+    await broadcaster.close()
+    assert len(broadcaster) == 0
+
+
+@pytest.mark.asyncio
+async def test_other_workers_writes_are_polled(test_engine, test_session: AsyncSession, test_sweet):
+    """Test writes that bypass this worker reach subscribers through the change log."""
+    sweet_id = test_sweet.id
+    broadcaster = StockBroadcaster(test_engine, poll_interval=0, max_pending=256)
+    subscription = broadcaster.subscribe()
+    assert await broadcaster.poll() == 0
+
+    async def another_worker_sets(quantity: int) -> None:
+        await test_session.execute(
+            update(Sweet).where(Sweet.id == sweet_id).values(quantity=quantity)
+        )
+        await test_session.commit()
+
+    await another_worker_sets(4)
+    assert await broadcaster.poll() == 1
+    assert await next_event(subscription) == (False, {sweet_id: 4})
+
+    for quantity in (3, 2, 1):
+        await another_worker_sets(quantity)
+    # The sweet's insert and the first three updates go
+    assert await SweetRepository(test_session).prune_stock_changes(keep=1) == 4
+    assert await broadcaster.poll() == 1
+    assert await next_event(subscription) == (True, {})
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_repository_logs_changes_without_triggers(
+    test_engine, test_session: AsyncSession, test_sweet, monkeypatch
+):
+    """Test databases without the change log triggers still feed the poller."""
+    sweet_id = test_sweet.id
+    triggers = await test_session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'log_stock_change_%'"
+    ))
+    for name in triggers.scalars().all():
+        await test_session.execute(text(f"DROP TRIGGER {name}"))
+    await test_session.commit()
+    monkeypatch.setattr(SweetRepository, "_has_catalog_triggers", lambda self: False)
+
+    broadcaster = StockBroadcaster(test_engine, poll_interval=0, max_pending=256)
+    subscription = broadcaster.subscribe()
+    assert await broadcaster.poll() == 0
+
+    await SweetRepository(test_session).atomic_purchase(sweet_id, 3)
+    assert await broadcaster.poll() == 1
+    assert await next_event(subscription) == (False, {sweet_id: 7})
+    await broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_sends_events(client: AsyncClient, test_engine):
+    """Test the endpoint streams server-sent events until the stream is closed."""
+    request = asyncio.create_task(client.get("/api/sweets/stream"))
+    broadcaster = get_stock_broadcaster(test_engine)
+    for _ in range(100):
+        if len(broadcaster):
+            break
+        await asyncio.sleep(0.01)
+
+    broadcaster.publish({"a": 5})
+    await asyncio.sleep(0.05)
+    await close_stock_broadcasters()
+    response = await asyncio.wait_for(request, timeout=5)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        "retry: 3000\n\n"
+        'event: stock\ndata: [{"id":"a","quantity":5}]\n\n'
+    )
@@ -0,0 +1,217 @@
+"""
+Stock Hold Tests
+
+Reserving takes stock into a time-limited hold. Confirming turns the
+hold into an order without another stock check; holds that are released
+or expire give their stock back.
+"""
+import time
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.database import Base
+from app.models import User, Sweet, SweetCategory, Order, StockHold, HoldStatus
+from app.repositories.sweet_repository import SweetRepository, HoldNotActiveError
+from app.security.password import hash_password
+
+
+async def sweet_quantity(session, sweet_id: str) -> int:
+    result = await session.execute(select(Sweet.quantity).where(Sweet.id == sweet_id))
+    return result.scalar_one()
+
+
+async def expire_all_holds(session) -> None:
+    await session.execute(
+        update(StockHold).values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_reserve_and_confirm(client: AsyncClient, test_sweet, auth_headers, test_session):
+    """Test a hold takes stock at once and confirms into an order."""
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/reserve",
+        json={"quantity": 3},
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+    hold = response.json()
+    assert hold["status"] == "active"
+    assert hold["sweet"]["quantity"] == 7
+
+    response = await client.post(f"/api/holds/{hold['id']}/confirm", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["quantity_purchased"] == 3
+    assert response.json()["sweet"]["quantity"] == 7
+
+    result = await test_session.execute(select(Order.quantity, Order.total))
+    assert result.one() == (3, pytest.approx(17.97))
+
+    response = await client.post(f"/api/holds/{hold['id']}/confirm", headers=auth_headers)
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_reserve_insufficient_stock(client: AsyncClient, test_sweet, auth_headers):
+    """Test reserving more than is in stock fails like a purchase."""
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/reserve",
+        json={"quantity": 11},
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+
+    response = await client.post(
+        "/api/sweets/nonexistent-id-12345/reserve",
+        json={"quantity": 1},
+        headers=auth_headers
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_confirm_does_not_recheck_stock(client: AsyncClient, test_sweet, auth_headers, test_session):
+    """Test a held quantity can be bought even after the rest sells out."""
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/reserve",
+        json={"quantity": 4},
+        headers=auth_headers
+    )
+    hold_id = response.json()["id"]
+    await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 6},
+        headers=auth_headers
+    )
+    assert await sweet_quantity(test_session, test_sweet.id) == 0
+
+    response = await client.post(f"/api/holds/{hold_id}/confirm", headers=auth_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_release_returns_stock(client: AsyncClient, test_sweet, auth_headers, test_session):
+    """Test releasing a hold restocks it and it can no longer be confirmed."""
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/reserve",
+        json={"quantity": 5},
+        headers=auth_headers
+    )
+    hold_id = response.json()["id"]
+
+    response = await client.delete(f"/api/holds/{hold_id}", headers=auth_headers)
+    assert response.status_code == 204
+    assert await sweet_quantity(test_session, test_sweet.id) == 10
+
+    response = await client.post(f"/api/holds/{hold_id}/confirm", headers=auth_headers)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Hold is released"
+
+
+@pytest.mark.asyncio
+async def test_holds_are_private(client: AsyncClient, test_sweet, auth_headers, admin_headers):
+    """Test a user cannot confirm or release someone else's hold."""
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/reserve",
+        json={"quantity": 1},
+        headers=auth_headers
+    )
+    hold_id = response.json()["id"]
+
+    response = await client.post(f"/api/holds/{hold_id}/confirm", headers=admin_headers)
+    assert response.status_code == 404
+    response = await client.delete(f"/api/holds/{hold_id}", headers=admin_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_expired_holds_are_swept(test_session, test_user, test_sweet):
+    """Test the sweeper restocks expired holds, including sharded sweets."""
+    repo = SweetRepository(test_session)
+    sharded = Sweet(name="Sharded Fudge", category=SweetCategory.CANDY, price=1.50, quantity=8)
+    test_session.add(sharded)
+    await test_session.commit()
+    sweet_id, user_id, sharded_id = test_sweet.id, test_user.id, sharded.id
+    await repo.set_stock_shards(sharded_id, 4)
+
+    plain_hold, _ = await repo.reserve(sweet_id, 2, user_id, ttl_seconds=60)
+    await repo.reserve(sweet_id, 3, user_id, ttl_seconds=60)
+    await repo.reserve(sharded_id, 5, user_id, ttl_seconds=60)
+    assert await repo.expire_holds() == 0
+
+    await expire_all_holds(test_session)
+    with pytest.raises(HoldNotActiveError, match="expired"):
+        await repo.confirm_hold(plain_hold["id"], user_id)
+
+    assert await repo.expire_holds(batch_size=2) == 2
+    assert await repo.expire_holds(batch_size=2) == 1
+    assert await repo.expire_holds(batch_size=2) == 0
+
+    assert await sweet_quantity(test_session, sweet_id) == 10
+    assert (await repo.get_by_id(sharded_id)).quantity == 8
+    result = await test_session.execute(
+        select(func.count()).select_from(StockHold).where(StockHold.status == HoldStatus.EXPIRED)
+    )
+    assert result.scalar_one() == 3
+
+
+@pytest.mark.asyncio
+async def test_hold_throughput(tmp_path):
+    """
+    Measure reservation, confirmation and expiry throughput.
+
+    Uses a file-backed database so every commit pays a real journal sync.
+    Expiry runs in batches, so it should far outpace per-hold commits.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'holds.db'}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    holds = 200
+    async with session_factory() as session:
+        user = User(email="holds@test.com", hashed_password=hash_password("testpass123"))
+        sweet = Sweet(name="Held Toffee", category=SweetCategory.CANDY, price=1.25, quantity=holds * 2)
+        session.add_all([user, sweet])
+        await session.commit()
+        user_id, sweet_id = user.id, sweet.id
+
+    rates = {}
+    async with session_factory() as session:
+        repo = SweetRepository(session)
+
+        started = time.perf_counter()
+        hold_ids = [
+            (await repo.reserve(sweet_id, 1, user_id, ttl_seconds=60))[0]["id"]
+            for _ in range(holds * 2)
+        ]
+        rates["reserve"] = holds * 2 / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for hold_id in hold_ids[:holds]:
+            await repo.confirm_hold(hold_id, user_id)
+        rates["confirm"] = holds / (time.perf_counter() - started)
+
+        await expire_all_holds(session)
+        started = time.perf_counter()
+        expired = 0
+        while batch := await repo.expire_holds(batch_size=50):
+            expired += batch
+        rates["expire"] = holds / (time.perf_counter() - started)
+
+        assert expired == holds
+        assert await sweet_quantity(session, sweet_id) == holds
+        result = await session.execute(select(func.count()).select_from(Order))
+        assert result.scalar_one() == holds
+
+    await engine.dispose()
+
+    print(
+        f"\nHolds/s: reserve {rates['reserve']:.0f}, confirm {rates['confirm']:.0f}, "
+        f"expire {rates['expire']:.0f}"
+    )
+    assert rates["expire"] > rates["confirm"]
@@ -0,0 +1,171 @@
+"""
+Sharded Stock Tests
+
+A sharded sweet keeps its stock in sweet_stock_shards rows. Purchases
+must still never oversell and read endpoints must report the live total.
+"""
+import asyncio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.database import Base
+from app.models import Sweet, SweetCategory, SweetStockShard
+from app.repositories.sweet_repository import SweetRepository, InsufficientStockError
+
+
+async def shard_quantities(session, sweet_id: str) -> list:
+    result = await session.execute(
+        select(SweetStockShard.quantity)
+        .where(SweetStockShard.sweet_id == sweet_id)
+        .order_by(SweetStockShard.shard_no)
+    )
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_split_stock_across_shards(client: AsyncClient, test_sweet, admin_headers, test_session):
+    """Test an admin can split stock and the total is preserved."""
+    response = await client.put(
+        f"/api/sweets/{test_sweet.id}/shards",
+        json={"shards": 3},
+        headers=admin_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["quantity"] == 10
+    assert await shard_quantities(test_session, test_sweet.id) == [4, 3, 3]
+
+
+@pytest.mark.asyncio
+async def test_split_stock_requires_admin(client: AsyncClient, test_sweet, auth_headers):
+    """Test non-admins cannot shard stock."""
+    response = await client.put(
+        f"/api/sweets/{test_sweet.id}/shards",
+        json={"shards": 3},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_sharded_purchase_reports_live_total(
+    client: AsyncClient, test_sweet, admin_headers, auth_headers
+):
+    """Test purchases decrement shards and reads see the shard total."""
+    await client.put(f"/api/sweets/{test_sweet.id}/shards", json={"shards": 4}, headers=admin_headers)
+
+    response = await client.post(
+        f"/api/sweets/{test_sweet.id}/purchase",
+        json={"quantity": 2},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["sweet"]["quantity"] == 8
+
+    listing = await client.get("/api/sweets")
+    assert listing.json()[0]["quantity"] == 8
+    single = await client.get(f"/api/sweets/{test_sweet.id}")
+    assert single.json()["quantity"] == 8
+
+
+@pytest.mark.asyncio
+async def test_sharded_purchase_spans_shards(test_session, test_sweet):
+    """Test a purchase larger than any one shard is served from several."""
+    repo = SweetRepository(test_session)
+    await repo.set_stock_shards(test_sweet.id, 4)
+
+    sweet = await repo.atomic_purchase(test_sweet.id, 7)
+
+    assert sweet.quantity == 3
+    assert sum(await shard_quantities(test_session, test_sweet.id)) == 3
+    with pytest.raises(InsufficientStockError, match="Available: 3, Requested: 4"):
+        await repo.atomic_purchase(test_sweet.id, 4)
+
+
+@pytest.mark.asyncio
+async def test_sharded_concurrent_purchases_never_oversell(tmp_path):
+    """
+    Test 15 concurrent buyers of 10 sharded items: exactly 10 succeed.
+    
+    Uses a file-backed database so each buyer gets its own connection
+    and transaction, as it would in production.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'shards.db'}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with session_factory() as session:
+        sweet = Sweet(name="Sharded Chocolate", category=SweetCategory.CHOCOLATE, price=3.00, quantity=10)
+        session.add(sweet)
+        await session.commit()
+        sweet_id = sweet.id
+        await SweetRepository(session).set_stock_shards(sweet_id, 3)
+    
+    async def purchase():
+        async with session_factory() as session:
+            return await SweetRepository(session).atomic_purchase(sweet_id, 1)
+    
+    results = await asyncio.gather(*[purchase() for _ in range(15)], return_exceptions=True)
+    
+    assert len([r for r in results if not isinstance(r, Exception)]) == 10
+    assert len([r for r in results if isinstance(r, InsufficientStockError)]) == 5
+    async with session_factory() as session:
+        assert await shard_quantities(session, sweet_id) == [0, 0, 0]
+    
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_checkout_with_sharded_line(
+    client: AsyncClient, test_sweet, admin_headers, auth_headers
+):
+    """Test checkout handles sharded and plain sweets in one cart."""
+    await client.put(f"/api/sweets/{test_sweet.id}/shards", json={"shards": 2}, headers=admin_headers)
+    plain = await client.post(
+        "/api/sweets",
+        json={"name": "Plain Candy", "category": "Candy", "price": 1.00, "quantity": 5},
+        headers=admin_headers
+    )
+    plain_id = plain.json()["id"]
+
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [
+            {"sweet_id": test_sweet.id, "quantity": 6},
+            {"sweet_id": plain_id, "quantity": 5}
+        ]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [line["sweet"]["quantity"] for line in response.json()["items"]] == [4, 0]
+
+    response = await client.post(
+        "/api/checkout",
+        json={"items": [{"sweet_id": test_sweet.id, "quantity": 5}]},
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"]["shortfalls"][0]["available"] == 4
+
+
+@pytest.mark.asyncio
+async def test_reconcile_and_merge_shards(test_session, test_sweet):
+    """Test reconciliation refreshes quantity and merging restores plain stock."""
+    repo = SweetRepository(test_session)
+    await repo.set_stock_shards(test_sweet.id, 3)
+    await repo.atomic_purchase(test_sweet.id, 4)
+
+    assert await repo.reconcile_stock_shards() == 1
+    result = await test_session.execute(select(Sweet.quantity).where(Sweet.id == test_sweet.id))
+    assert result.scalar_one() == 6
+
+    merged = await repo.set_stock_shards(test_sweet.id, 0)
+    assert merged.quantity == 6
+    assert await shard_quantities(test_session, test_sweet.id) == []
+
+    sweet = await repo.atomic_purchase(test_sweet.id, 1)
+    assert sweet.quantity == 5
@@ -0,0 +1,99 @@
+"""
+Suggestion Tests
+
+GET /api/sweets/suggest completes sweet names from an in-memory index of
+casefolded names, best sellers first. Repository writes keep the index
+current without reloading it.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.models import Sweet, SweetCategory
+from app.services import suggest_index
+from app.services.suggest_index import SuggestIndex
+
+
+async def create_catalog(session) -> dict:
+    sweets = [
+        Sweet(name="Caramel Fudge", category=SweetCategory.CANDY, price=1.00, quantity=50),
+        Sweet(name="caramel Apple", category=SweetCategory.CANDY, price=1.20, quantity=50),
+        Sweet(name="Candy Floss", category=SweetCategory.CANDY, price=0.80, quantity=50),
+        Sweet(name="Éclair", category=SweetCategory.PASTRY, price=2.00, quantity=50),
+    ]
+    session.add_all(sweets)
+    await session.commit()
+    return {sweet.name: sweet.id for sweet in sweets}
+
+
+async def suggest(client: AsyncClient, prefix: str, **params) -> list:
+    response = await client.get("/api/sweets/suggest", params={"prefix": prefix, **params})
+    assert response.status_code == 200
+    return [sweet["name"] for sweet in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_suggestions_ranked_by_units_sold(client: AsyncClient, test_session, auth_headers):
+    """Test prefixes match in any case and best sellers come first."""
+    ids = await create_catalog(test_session)
+    await client.post(
+        f"/api/sweets/{ids['Caramel Fudge']}/purchase",
+        json={"quantity": 3},
+        headers=auth_headers
+    )
+
+    assert await suggest(client, "CA") == ["Caramel Fudge", "Candy Floss", "caramel Apple"]
+    assert await suggest(client, "caramel a") == ["caramel Apple"]
+    assert await suggest(client, "éc") == ["Éclair"]
+    assert await suggest(client, "ca", limit=1) == ["Caramel Fudge"]
+    assert await suggest(client, "zz") == []
+
+
+@pytest.mark.asyncio
+async def test_writes_update_index_without_reload(client: AsyncClient, test_session, test_engine, admin_headers):
+    """Test creates, renames and deletes reach suggestions without a database read."""
+    ids = await create_catalog(test_session)
+    await suggest(client, "c")
+    statements = []
+    event.listen(
+        test_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+
+    await client.post(
+        "/api/sweets",
+        json={"name": "Cinder Toffee", "category": "Candy", "price": 1.5, "quantity": 4},
+        headers=admin_headers
+    )
+    await client.put(f"/api/sweets/{ids['Candy Floss']}", json={"name": "Fairy Floss"}, headers=admin_headers)
+    await client.delete(f"/api/sweets/{ids['Caramel Fudge']}", headers=admin_headers)
+    statements.clear()
+
+    assert await suggest(client, "c") == ["caramel Apple", "Cinder Toffee"]
+    assert await suggest(client, "fairy") == ["Fairy Floss"]
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_memoized_ranking_is_dropped_on_change(monkeypatch):
+    """Test a broad prefix's remembered top sellers follow renames and popularity."""
+    monkeypatch.setattr(suggest_index, "SCAN_LIMIT", 2)
+    index = SuggestIndex(
+        [("1", "Mint Humbug"), ("2", "Mint Imperial"), ("3", "Mint Crisp"), ("4", "Sherbet")],
+        {"2": 5, "3": 1}
+    )
+
+    assert [name for _, name in index.suggest("mint")] == ["Mint Imperial", "Mint Crisp", "Mint Humbug"]
+    index.apply({"2": "Peppermint Imperial", "5": "Mint Aero"})
+    assert [name for _, name in index.suggest("mint")] == ["Mint Crisp", "Mint Aero", "Mint Humbug"]
+    index.apply({"3": None})
+    assert [name for _, name in index.suggest("mint", limit=1)] == ["Mint Aero"]
+    assert len(index) == 4
+
+
+@pytest.mark.asyncio
+async def test_suggest_validation(client: AsyncClient):
+    """Test the prefix is required and the limit bounded."""
+    assert (await client.get("/api/sweets/suggest")).status_code == 422
+    assert (await client.get("/api/sweets/suggest", params={"prefix": ""})).status_code == 422
+    assert (await client.get("/api/sweets/suggest", params={"prefix": "a", "limit": 21})).status_code == 422
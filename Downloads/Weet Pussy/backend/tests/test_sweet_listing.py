@@ -0,0 +1,112 @@
+"""
+Sweets Listing Tests
+
+GET /api/sweets filters, sorts and pages on the server. Pages are
+fetched by keyset, so each page is a single index range scan.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.models import Sweet, SweetCategory
+from app.repositories.sweet_repository import SweetRepository
+
+
+async def create_catalog(session) -> None:
+    session.add_all([
+        Sweet(name="Almond Bar", category=SweetCategory.CHOCOLATE, price=2.50, quantity=4),
+        Sweet(name="Berry Gum", category=SweetCategory.CANDY, price=0.75, quantity=0),
+        Sweet(name="Cocoa Bite", category=SweetCategory.CHOCOLATE, price=1.25, quantity=9),
+        Sweet(name="Dark Slab", category=SweetCategory.CHOCOLATE, price=2.50, quantity=0),
+        Sweet(name="Eclair", category=SweetCategory.PASTRY, price=3.10, quantity=2),
+        Sweet(name="Fudge Cube", category=SweetCategory.CHOCOLATE, price=2.50, quantity=6),
+    ])
+    await session.commit()
+
+
+async def walk(client: AsyncClient, params: dict) -> list:
+    """Fetch every page and return the names in order."""
+    names, cursor = [], None
+    while True:
+        page_params = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = await client.get("/api/sweets", params=page_params)
+        assert response.status_code == 200
+        assert len(response.json()) <= params["limit"]
+        names += [sweet["name"] for sweet in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return names
+
+
+@pytest.mark.asyncio
+async def test_filters(client: AsyncClient, test_session):
+    """Test category, price range and stock filters combine."""
+    await create_catalog(test_session)
+
+    response = await client.get("/api/sweets", params={
+        "category": "Chocolate", "min_price": 1.5, "max_price": 2.5, "in_stock": "true"
+    })
+    assert [s["name"] for s in response.json()] == ["Almond Bar", "Fudge Cube"]
+
+    response = await client.get("/api/sweets", params={"in_stock": "false"})
+    assert [s["name"] for s in response.json()] == ["Berry Gum", "Dark Slab"]
+    assert "x-next-cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_everything_once(client: AsyncClient, test_session):
+    """Test walking the cursor returns every sweet once, ties broken by id."""
+    await create_catalog(test_session)
+    everything = (await client.get("/api/sweets")).json()
+
+    names = await walk(client, {"sort": "price", "order": "desc", "limit": 2})
+    by_price = sorted(everything, key=lambda s: (s["price"], s["id"]), reverse=True)
+    assert names == [s["name"] for s in by_price]
+
+    names = await walk(client, {"category": "Chocolate", "sort": "quantity", "limit": 1})
+    assert names == ["Dark Slab", "Almond Bar", "Fudge Cube", "Cocoa Bite"]
+
+    names = await walk(client, {"sort": "name", "order": "desc", "limit": 4})
+    assert names == sorted((s["name"] for s in everything), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_bad_cursors_are_rejected(client: AsyncClient, test_session):
+    """Test malformed cursors and cursors from another sort order get a 400."""
+    await create_catalog(test_session)
+    response = await client.get("/api/sweets", params={"sort": "price", "limit": 2})
+    cursor = response.headers["x-next-cursor"]
+
+    for params in (
+        {"sort": "price", "limit": 2, "cursor": "not-a-cursor"},
+        {"sort": "name", "limit": 2, "cursor": cursor},
+        {"sort": "price", "order": "desc", "limit": 2, "cursor": cursor},
+    ):
+        assert (await client.get("/api/sweets", params=params)).status_code == 400
+
+    assert (await client.get("/api/sweets", params={"limit": 0})).status_code == 422
+    assert (await client.get("/api/sweets", params={"sort": "colour"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_deep_pages_use_an_index_range(test_session, test_engine):
+    """Test a filtered, sorted page after a cursor needs no scan or sort."""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await SweetRepository(test_session).get_page(
+            category=SweetCategory.CHOCOLATE, sort="price", after=(2.5, "x"), limit=20
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+    statement, parameters = statements[-1]
+    connection = await test_session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    plan = " ".join(row[-1] for row in result)
+    assert "ix_sweets_category_price_id" in plan
+    assert "TEMP B-TREE" not in plan
@@ -3,6 +3,12 @@ Sweet API Tests
 """
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.repositories import sweet_repository
+from app.repositories.sweet_repository import (
+    SweetRepository, InsufficientStockError, SweetNotFoundError
+)
 
 
 @pytest.mark.asyncio
@@ -128,3 +134,57 @@ async def test_purchase_sweet_unauthenticated_fails(client: AsyncClient, test_sw
     )
     
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_purchase_returning_single_statement(test_engine, test_session, test_sweet):
+    """Test the RETURNING fast path decrements stock in one statement."""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        sweet = await SweetRepository(test_session).atomic_purchase(test_sweet.id, 4)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+    
+    assert sweet.quantity == 6
+    assert len(statements) == 1
+    assert "RETURNING" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_purchase_returning_distinguishes_errors(test_session, test_sweet):
+    """Test the fast path reports missing sweets and short stock separately."""
+    repo = SweetRepository(test_session)
+    # A failed write rolls the session back, expiring loaded objects
+    sweet_id = test_sweet.id
+    
+    with pytest.raises(SweetNotFoundError):
+        await repo.atomic_purchase("nonexistent-id-12345", 1)
+    
+    with pytest.raises(InsufficientStockError, match="Available: 10, Requested: 11"):
+        await repo.atomic_purchase(sweet_id, 11)
+
+
+@pytest.mark.asyncio
+async def test_purchase_fallback_without_returning(test_session, test_sweet, monkeypatch):
+    """Test engines without UPDATE ... RETURNING use the SELECT/UPDATE path."""
+    monkeypatch.setattr(SweetRepository, "_supports_returning", lambda self: False)
+    reported = []
+    
+    async def listener(session, get_version, changes):
+        reported.append(changes)
+    
+    monkeypatch.setattr(sweet_repository, "_catalog_listeners", [listener])
+    repo = SweetRepository(test_session)
+    
+    sweet = await repo.atomic_purchase(test_sweet.id, 3)
+    
+    assert sweet.quantity == 7
+    # Listeners (catalog cache, stock events) see the new stock, not 10 - 3 - 3
+    assert reported == [{test_sweet.id: 7}]
+    with pytest.raises(InsufficientStockError):
+        await repo.atomic_purchase(test_sweet.id, 8)
@@ -0,0 +1,55 @@
+"""
+Token Cache Tests
+
+Bearer tokens are verified once and their claims remembered until the
+token expires, so repeat requests skip the HMAC check and JSON parsing.
+"""
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.security import jwt as security_jwt
+from app.security.jwt import TokenCache, create_access_token, token_cache_stats, verify_token
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_verify_the_token_once(client: AsyncClient, auth_headers, monkeypatch):
+    """Test the signature is checked on the first request with a token only."""
+    decoded = []
+    decode = security_jwt.decode_token
+    monkeypatch.setattr(security_jwt, "decode_token", lambda token: decoded.append(token) or decode(token))
+
+    for _ in range(3):
+        response = await client.get("/api/users/orders", headers=auth_headers)
+        assert response.status_code == 200
+
+    assert len(decoded) == 1
+    tampered = {"Authorization": auth_headers["Authorization"][:-2] + "xx"}
+    for _ in range(2):
+        response = await client.get("/api/users/orders", headers=tampered)
+        assert response.status_code == 401
+    # Invalid tokens are never remembered
+    assert len(decoded) == 3
+
+
+@pytest.mark.asyncio
+async def test_entries_end_at_expiry_or_when_forgotten():
+    """Test expired and forgotten tokens are verified again rather than served from memory."""
+    cache = TokenCache(max_size=2)
+    token = create_access_token({"sub": "a@example.com"})
+    claims = verify_token(token)
+    cache.put(token, claims)
+    assert cache.get(token) == claims
+
+    expirations = token_cache_stats.expirations
+    cache.put("stale", {"sub": "b@example.com", "exp": time.time() - 1})
+    assert cache.get("stale") is None
+    assert token_cache_stats.expirations == expirations + 1
+
+    cache.put("no-exp", {"sub": "c@example.com"})
+    assert cache.get("no-exp") is None
+
+    cache.forget(token)
+    assert cache.get(token) is None
+    assert len(cache) == 0
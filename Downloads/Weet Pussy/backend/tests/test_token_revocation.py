@@ -0,0 +1,120 @@
+"""
+Token Revocation Tests
+
+Logout and password changes revoke access tokens before they expire.
+A Bloom filter of revocations in each worker lets tokens that were
+never revoked through without querying the revoked_tokens table, and
+revocations made by other workers are picked up within a sync interval.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.config import get_settings
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+from app.security import revocation
+from app.security.jwt import verify_token
+from app.security.revocation import load_revocations, revocation_stats
+from app.utils.bloom import BloomFilter
+
+
+class RevokedTokensQueryCounter:
+    """Count statements that read the revoked_tokens table."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM revoked_tokens" in statement:
+            self.count += 1
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    """Test every added key is found and unseen keys rarely are."""
+    bloom = BloomFilter(capacity=2000, fp_rate=0.01)
+    for i in range(2000):
+        bloom.add(f"revoked-{i}")
+
+    assert len(bloom) == 2000
+    assert all(f"revoked-{i}" in bloom for i in range(2000))
+    false_positives = sum(f"valid-{i}" in bloom for i in range(20000))
+    assert false_positives < 20000 * 0.01 * 2
+
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=10, fp_rate=1.5)
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_the_token_without_querying_for_valid_ones(client: AsyncClient, test_engine, test_user):
+    """Test a logged-out token is refused while other tokens skip the revoked_tokens lookup."""
+    tokens = []
+    for _ in range(2):
+        response = await client.post("/api/auth/login", json={
+            "email": "test@example.com",
+            "password": "password123"
+        })
+        tokens.append(response.json())
+    logged_out = {"Authorization": f"Bearer {tokens[0]['access_token']}"}
+    other = {"Authorization": f"Bearer {tokens[1]['access_token']}"}
+
+    # The first check loads the filter
+    assert (await client.get("/api/users/orders", headers=other)).status_code == 200
+    counter = RevokedTokensQueryCounter(test_engine)
+    negatives_before = revocation_stats.bloom_negatives
+    for _ in range(3):
+        assert (await client.get("/api/users/orders", headers=other)).status_code == 200
+    assert counter.count == 0
+    assert revocation_stats.bloom_negatives == negatives_before + 3
+
+    response = await client.post(
+        "/api/auth/logout",
+        json={"refresh_token": tokens[0]["refresh_token"]},
+        headers=logged_out
+    )
+    assert response.status_code == 204
+
+    assert (await client.get("/api/users/orders", headers=logged_out)).status_code == 401
+    assert (await client.get("/api/users/orders", headers=other)).status_code == 200
+    refreshed = await client.post("/api/auth/refresh", json={"refresh_token": tokens[0]["refresh_token"]})
+    assert refreshed.status_code == 401
+
+    # Optional auth treats the revoked token as anonymous
+    assert (await client.get("/api/sweets", headers=logged_out)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_other_workers_password_change_and_compaction(client: AsyncClient, test_engine, test_session, auth_headers):
+    """Test revocations by other workers arrive at the next sync, and expired ones are compacted."""
+    response = await client.put("/api/users/password", json={
+        "current_password": "password123",
+        "new_password": "newpassword123"
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert (await client.get("/api/users/orders", headers=auth_headers)).status_code == 401
+
+    response = await client.post("/api/auth/login", json={
+        "email": "test@example.com",
+        "password": "newpassword123"
+    })
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.get("/api/users/orders", headers=headers)).status_code == 200
+
+    # Another worker logs the new token out; seen here once the filter syncs
+    claims = verify_token(token)
+    repository = RevokedTokenRepository(test_session)
+    now = datetime.utcnow()
+    await repository.revoke(claims["jti"], now + timedelta(minutes=5), now)
+    revocation._filters[test_engine].synced_at -= get_settings().TOKEN_REVOCATION_SYNC_SECONDS
+    assert (await client.get("/api/users/orders", headers=headers)).status_code == 401
+
+    for i in range(3):
+        await repository.revoke(f"expired-{i}", now - timedelta(minutes=1), now)
+    assert await repository.prune_expired(batch_size=2) == 2
+    assert await repository.prune_expired(batch_size=2) == 1
+    revocations = await load_revocations(test_session)
+    assert "expired-0" not in revocations
+    assert claims["jti"] in revocations
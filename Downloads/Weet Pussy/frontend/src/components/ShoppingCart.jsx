@@ -42,36 +42,26 @@ export function ShoppingCart({ isOpen, onClose, onToast }) {
     setIsProcessing(true);
 
     try {
-      // Process each item in the cart
-      const results = [];
-      for (const item of cart) {
-        try {
-          const result = await sweetsApi.purchase(item.id, item.quantity);
-          results.push({ success: true, item, result });
-          updateSweet(item.id, { quantity: result.sweet.quantity });
-        } catch (error) {
-          results.push({ success: false, item, error: error.response?.data?.detail || 'Purchase failed' });
-        }
-      }
-
-      // Check results
-      const successful = results.filter(r => r.success);
-      const failed = results.filter(r => !r.success);
-
-      if (successful.length > 0) {
-        clearCart();
-        onToast(`Successfully purchased ${successful.length} item(s)!`, 'success');
-      }
-
-      if (failed.length > 0) {
-        onToast(`${failed.length} item(s) could not be purchased`, 'error');
-      }
-
-      if (successful.length > 0) {
-        onClose();
-      }
+      // Purchase the whole cart in a single all-or-nothing request
+      const result = await sweetsApi.checkout(cart);
+      result.items.forEach(line => {
+        updateSweet(line.sweet.id, { quantity: line.sweet.quantity });
+      });
+
+      clearCart();
+      onToast(`Successfully purchased ${result.items.length} item(s)!`, 'success');
+      onClose();
     } catch (error) {
-      onToast('Checkout failed. Please try again.', 'error');
+      const shortfalls = error.response?.data?.detail?.shortfalls;
+      if (shortfalls?.length) {
+        const names = shortfalls.map(s => {
+          const item = cart.find(i => i.id === s.sweet_id);
+          return `${item?.name || 'Item'} (only ${s.available} left)`;
+        });
+        onToast(`Not enough stock: ${names.join(', ')}`, 'error');
+      } else {
+        onToast('Checkout failed. Please try again.', 'error');
+      }
     } finally {
       setIsProcessing(false);
     }
@@ -109,6 +109,13 @@ export const sweetsApi = {
 		const response = await api.post(`/sweets/${id}/purchase`, { quantity });
 		return response.data;
 	},
+
+	checkout: async (items) => {
+		const response = await api.post('/checkout', {
+			items: items.map(({ id, quantity }) => ({ sweet_id: id, quantity }))
+		});
+		return response.data;
+	},
 };
 
 // User API